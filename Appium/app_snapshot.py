@@ -0,0 +1,132 @@
+"""
+Snapshot of the Amazon app's data directory after onboarding.
+
+Every fresh session starts on the language screen, and choosing English and
+skipping sign-in takes seconds before a test can do anything. Once a test has
+reached the home page, capture() tars /data/data/<package> into
+/data/local/tmp on the device. Later sessions restore() it, so the app
+starts straight on the home page. The snapshot name includes the app's
+versionCode, so an app update invalidates it.
+
+Needs a rooted device or emulator (su) and an Appium server started with
+--allow-insecure=adb_shell, since everything runs through 'mobile: shell'.
+
+    MEASURE_ONBOARDING=1       no snapshot: run (and time) onboarding every session
+    APP_SNAPSHOT=0             never capture or restore snapshots
+    APP_SNAPSHOT_SU="su 0"     how to run a command as root on the device
+"""
+import os
+import re
+import shlex
+import time
+
+MEASURE_ONBOARDING = os.environ.get("MEASURE_ONBOARDING", "0") == "1"
+ENABLED = os.environ.get("APP_SNAPSHOT", "1") != "0" and not MEASURE_ONBOARDING
+SU = os.environ.get("APP_SNAPSHOT_SU", "su 0")
+SNAPSHOT_DIR = "/data/local/tmp"
+# Rebuilt by the app on start; leaving them out keeps the snapshot small
+EXCLUDES = ["./cache", "./code_cache", "./lib", "./app_webview/Default/Service Worker/CacheStorage"]
+
+
+def _shell(driver, script, timeout=60000):
+    """Run a shell script as root on the device and return its output"""
+    command, *args = shlex.split(SU)
+    return driver.execute_script("mobile: shell", {
+        "command": command,
+        "args": args + ["sh", "-c", script],
+        "timeout": timeout,
+        "includeStderr": False,
+    }) or ""
+
+
+class AppSnapshot:
+
+    def __init__(self, app_id):
+        self.app_id = app_id
+        self.data_dir = f"/data/data/{app_id}"
+        self.available = True
+        self._path = None
+
+    def path(self, driver):
+        """Snapshot file for the installed app version"""
+        if self._path is None:
+            output = driver.execute_script("mobile: shell", {"command": "dumpsys", "args": ["package", self.app_id]})
+            match = re.search(r"versionCode=(\d+)", output or "")
+            version = match.group(1) if match else "unknown"
+            self._path = f"{SNAPSHOT_DIR}/{self.app_id}-onboarded-{version}.tar.gz"
+        return self._path
+
+    def exists(self, driver):
+        path = self.path(driver)
+        return _shell(driver, f"test -s {path} && echo yes").strip() == "yes"
+
+    def capture(self, driver):
+        """Tar the app data directory, stopping the app first so its files are consistent"""
+        path = self.path(driver)
+        start_time = time.perf_counter()
+        driver.execute_script("mobile: terminateApp", {"appId": self.app_id})
+        excludes = " ".join(f"--exclude={shlex.quote(pattern)}" for pattern in EXCLUDES)
+        _shell(driver, f"cd {self.data_dir} && tar -czf {path}.tmp {excludes} . && mv {path}.tmp {path}")
+        driver.execute_script("mobile: activateApp", {"appId": self.app_id})
+        elapsed = time.perf_counter() - start_time
+        print(f"Captured app snapshot {path} in {elapsed:.2f} seconds")
+        return elapsed
+
+    def restore(self, driver):
+        """Replace the app data with the snapshot and start the app; False when there is none"""
+        if not self.exists(driver):
+            return False
+        path = self.path(driver)
+        start_time = time.perf_counter()
+        driver.execute_script("mobile: terminateApp", {"appId": self.app_id})
+        # Files must belong to the app's uid and carry its SELinux label again after extraction
+        _shell(driver, f"owner=$(stat -c %u:%g {self.data_dir}) && "
+                       f"find {self.data_dir} -mindepth 1 -maxdepth 1 ! -name lib -exec rm -rf {{}} + && "
+                       f"tar -xzf {path} -C {self.data_dir} && "
+                       f"chown -R $owner {self.data_dir} && restorecon -R {self.data_dir}")
+        driver.execute_script("mobile: activateApp", {"appId": self.app_id})
+        print(f"Restored app snapshot in {time.perf_counter() - start_time:.2f} seconds")
+        return True
+
+    def delete(self, driver):
+        _shell(driver, f"rm -f {self.path(driver)}")
+
+
+_snapshots = {}
+
+
+def get(app_id):
+    """Shared AppSnapshot per app, so the installed version is looked up once"""
+    if app_id not in _snapshots:
+        _snapshots[app_id] = AppSnapshot(app_id)
+    return _snapshots[app_id]
+
+
+def _unavailable(snapshot, action, error):
+    # Usually a server without adb_shell or a device without su: don't retry on every test
+    snapshot.available = False
+    print(f"Could not {action} app snapshot, snapshots are off for this run: {str(error)[:200]}")
+
+
+def restore(driver, app_id):
+    """Restore the snapshot when snapshots are enabled; True if the app now starts onboarded"""
+    snapshot = get(app_id)
+    if not ENABLED or not snapshot.available:
+        return False
+    try:
+        return snapshot.restore(driver)
+    except Exception as e:
+        _unavailable(snapshot, "restore", e)
+        return False
+
+
+def capture_if_missing(driver, app_id):
+    """Capture the onboarded state once, when snapshots are enabled and none exists yet"""
+    snapshot = get(app_id)
+    if not ENABLED or not snapshot.available:
+        return
+    try:
+        if not snapshot.exists(driver):
+            snapshot.capture(driver)
+    except Exception as e:
+        _unavailable(snapshot, "capture", e)
@@ -0,0 +1,163 @@
+"""
+Benchmark per-element product extraction against the page_source mode.
+
+Both modes run the real TestAppium methods from testc.py against a fixture
+driver that answers every command from the saved XML in fixtures/ and sleeps
+for --rtt-ms per command to model the round trip to the device.
+
+    python bench_page_source.py
+    python bench_page_source.py --rtt-ms 60 --iterations 10
+
+Needs lxml for the XPath expressions the per-element mode sends.
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+import types
+
+import page_source
+import testc
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class NoSuchFixtureElement(Exception):
+    pass
+
+
+class FixtureElement:
+
+    def __init__(self, driver, node):
+        self.driver = driver
+        self.node = node
+
+    def find_elements(self, by, value):
+        return self.driver.find_elements(by, value, node=self.node)
+
+    def find_element(self, by, value):
+        return self.driver.find_element(by, value, node=self.node)
+
+    @property
+    def text(self):
+        self.driver.command()
+        return page_source.node_text(self.node)
+
+    @property
+    def rect(self):
+        self.driver.command()
+        x1, y1, x2, y2 = page_source.parse_bounds(self.node.get("bounds"))
+        return {"x": x1, "y": y1, "width": x2 - x1, "height": y2 - y1}
+
+    def click(self):
+        self.driver.command()
+
+
+class FixtureDriver:
+    """Just enough of the Appium driver API, served from saved page source"""
+
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.commands = 0
+        self.xml = None
+        self.snapshot = None
+
+    def load(self, name):
+        with open(os.path.join(FIXTURES, name + ".xml"), encoding="utf-8") as f:
+            self.xml = f.read()
+        self.snapshot = page_source.PageSnapshot(self.xml)
+
+    def command(self):
+        self.commands += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    @property
+    def page_source(self):
+        self.command()
+        return self.xml
+
+    def find_elements(self, by, value, node=None):
+        self.command()
+        return [FixtureElement(self, n) for n in self.snapshot.find_all(by, value, node)]
+
+    def find_element(self, by, value, node=None):
+        elements = self.find_elements(by, value, node)
+        if not elements:
+            raise NoSuchFixtureElement(f"{by}={value}")
+        return elements[0]
+
+    def tap(self, positions, duration=None):
+        self.command()
+
+
+def per_element(case):
+    """The current flow: price lookup, three parent climbs, panel reads, product page reads"""
+    testc.PAGE_SOURCE_MODE = False
+    case.driver.load("search_results")
+    price_elements = case.driver.find_elements("xpath", '//android.widget.TextView[contains(@text, "₹")]')
+    container = price_elements[2]
+    for _ in range(3):
+        container = container.find_element("xpath", "./..")
+    info = testc.TestAppium.extract_product_info_from_panel(case, container)
+    container.click()
+    case.driver.load("product_page")
+    testc.TestAppium.extract_product_details(case)
+    return info
+
+
+def from_page_source(case):
+    """The page_source mode: one dump per screen, tap by bounds"""
+    testc.PAGE_SOURCE_MODE = True
+    case.driver.load("search_results")
+    info = testc.TestAppium.select_product_from_page_source(case)
+    case.driver.tap([info["center"]], 100)
+    case.driver.load("product_page")
+    testc.TestAppium.extract_product_details(case)
+    return info
+
+
+def run(flow, rtt, iterations):
+    timings = []
+    commands = 0
+    info = None
+    for _ in range(iterations):
+        case = types.SimpleNamespace(driver=FixtureDriver(rtt))
+        start_time = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            info = flow(case)
+        timings.append(time.perf_counter() - start_time)
+        commands = case.driver.commands
+    return min(timings), commands, info
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rtt-ms", type=float, default=40.0, help="modelled round trip per Appium command")
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    if not page_source.HAVE_LXML:
+        raise SystemExit("The per-element mode needs XPath support: pip install lxml")
+
+    rtt = args.rtt_ms / 1000
+    old_time, old_commands, old_info = run(per_element, rtt, args.iterations)
+    new_time, new_commands, new_info = run(from_page_source, rtt, args.iterations)
+    old_local, _, _ = run(per_element, 0, args.iterations)
+    new_local, _, _ = run(from_page_source, 0, args.iterations)
+
+    print("\n----- PAGE SOURCE BENCHMARK -----")
+    print(f"Modelled round trip: {args.rtt_ms:.1f} ms, best of {args.iterations}")
+    print(f"Per-element:  {old_commands:3d} commands, {old_time * 1000:8.1f} ms "
+          f"({old_local * 1000:.2f} ms local work)")
+    print(f"Page source:  {new_commands:3d} commands, {new_time * 1000:8.1f} ms "
+          f"({new_local * 1000:.2f} ms local work)")
+    print(f"Speedup: {old_time / new_time:.1f}x")
+    same = old_info["name"] == new_info["name"] and old_info["price"] == new_info["price"]
+    print(f"Same product extracted: {'yes' if same else 'NO'} ({new_info['name']}, {new_info['price']})")
+    print("---------------------------------")
+
+
+if __name__ == "__main__":
+    main()
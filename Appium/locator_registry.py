@@ -0,0 +1,206 @@
+"""
+Self-ranking locator cascades.
+
+Several screens can be found in more than one way (accessibility id, XPath,
+UiAutomator, text), and every strategy that misses costs a full implicit
+wait before the next one is tried. LocatorRegistry.find() records, per
+element and strategy, how often the strategy matched and how long hits and
+misses took, keeps that history in a JSON file between runs, and tries the
+strategies in the order that minimises the expected lookup time.
+
+That order is ascending cost / success probability, which is optimal for
+trying independent alternatives one after another. Without any history
+all strategies tie and the declared order is kept.
+
+    registry = locator_registry.default()
+    english = registry.find(driver, "language.english", [
+        (AppiumBy.ACCESSIBILITY_ID, "Select English"),
+        (AppiumBy.XPATH, '//android.widget.RadioButton[contains(@text, "English")]'),
+    ])
+    registry.save()
+    registry.report()
+
+    LOCATOR_CACHE=path          history file (default ~/.cache/amazon-automated/locators.json)
+    LOCATOR_CACHE=off           no history, always use the declared order
+"""
+import json
+import os
+import tempfile
+import time
+
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+
+CACHE_PATH = os.environ.get(
+    "LOCATOR_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "amazon-automated", "locators.json"))
+
+# Assumed costs before a strategy has any history
+DEFAULT_HIT_MS = 500.0
+DEFAULT_MISS_MS = 5000.0
+# Older attempts are faded out so a strategy that stopped working sinks quickly
+HISTORY_LIMIT = 30
+SMOOTHING = 0.3
+
+
+def _key(by, value):
+    return f"{by}::{value}"
+
+
+class StrategyStats:
+    __slots__ = ("hits", "misses", "hit_ms", "miss_ms")
+
+    def __init__(self, hits=0.0, misses=0.0, hit_ms=None, miss_ms=None):
+        self.hits = hits
+        self.misses = misses
+        self.hit_ms = hit_ms
+        self.miss_ms = miss_ms
+
+    @property
+    def tries(self):
+        return self.hits + self.misses
+
+    def add(self, found, ms):
+        if self.tries >= HISTORY_LIMIT:
+            scale = (HISTORY_LIMIT - 1) / self.tries
+            self.hits *= scale
+            self.misses *= scale
+        if found:
+            self.hits += 1
+            self.hit_ms = ms if self.hit_ms is None else self.hit_ms + SMOOTHING * (ms - self.hit_ms)
+        else:
+            self.misses += 1
+            self.miss_ms = ms if self.miss_ms is None else self.miss_ms + SMOOTHING * (ms - self.miss_ms)
+
+    def probability(self):
+        # Laplace rule of succession, so one lucky or unlucky try is not decisive
+        return (self.hits + 1) / (self.tries + 2)
+
+    def expected_ms(self, hit_default, miss_default):
+        hit_ms = self.hit_ms if self.hit_ms is not None else hit_default
+        miss_ms = self.miss_ms if self.miss_ms is not None else miss_default
+        p = self.probability()
+        return p * hit_ms + (1 - p) * miss_ms
+
+    def to_json(self):
+        return {"hits": round(self.hits, 3), "misses": round(self.misses, 3), "hit_ms": self.hit_ms,
+                "miss_ms": self.miss_ms}
+
+
+class LocatorRegistry:
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = None if path in ("", "off", None) else path
+        self.stats = {}
+        self.session = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    for element, strategies in json.load(f).items():
+                        self.stats[element] = {key: StrategyStats(**value) for key, value in strategies.items()}
+            except (OSError, ValueError, TypeError) as e:
+                print(f"Ignoring unreadable locator cache {self.path}: {e}")
+
+    def ranked(self, element, strategies):
+        """The strategies in the order find() will try them"""
+        history = self.stats.get(element, {})
+        known = [history[_key(by, value)] for by, value in strategies if _key(by, value) in history]
+        hit_default = min((s.hit_ms for s in known if s.hit_ms is not None), default=DEFAULT_HIT_MS)
+        miss_default = max((s.miss_ms for s in known if s.miss_ms is not None), default=DEFAULT_MISS_MS)
+
+        def order(item):
+            index, (by, value) = item
+            stats = history.get(_key(by, value)) or StrategyStats()
+            return (stats.expected_ms(hit_default, miss_default) / stats.probability(), index)
+        return [strategy for _, strategy in sorted(enumerate(strategies), key=order)]
+
+    def find(self, driver, element, strategies):
+        """
+        Find `element` with the first strategy that matches, best-ranked first.
+
+        `strategies` is a list of (by, value) in the declared (fallback)
+        order. Raises NoSuchElementException when none of them matches.
+        """
+        history = self.stats.setdefault(element, {})
+        attempts = []
+        found = None
+        for by, value in self.ranked(element, strategies):
+            start_time = time.perf_counter()
+            try:
+                found = driver.find_element(by, value)
+            except WebDriverException:
+                found = None
+            ms = (time.perf_counter() - start_time) * 1000
+            attempts.append((by, value, found is not None, ms))
+            history.setdefault(_key(by, value), StrategyStats()).add(found is not None, ms)
+            if found is not None:
+                break
+        self._account(element, strategies, attempts)
+        if found is None:
+            raise NoSuchElementException(f"{element}: none of {len(strategies)} strategies matched")
+        by, value = attempts[-1][:2]
+        print(f"Found {element} by {by} after {len(attempts)} attempt(s), {sum(a[3] for a in attempts):.0f} ms")
+        return found
+
+    def _account(self, element, strategies, attempts):
+        """Compare this lookup with what the declared cascade order would have cost"""
+        actual = sum(ms for _, _, _, ms in attempts)
+        declared = actual
+        if attempts[-1][2]:
+            winner = attempts[-1][:2]
+            measured = {(by, value): ms for by, value, _, ms in attempts}
+            history = self.stats[element]
+            declared = 0.0
+            for by, value in strategies:
+                if (by, value) == winner:
+                    declared += measured[winner]
+                    break
+                # Misses we skipped are estimated from their history
+                miss_ms = measured.get((by, value))
+                if miss_ms is None:
+                    stats = history.get(_key(by, value))
+                    miss_ms = stats.miss_ms if stats and stats.miss_ms is not None else 0.0
+                declared += miss_ms
+        entry = self.session.setdefault(element, {"lookups": 0, "attempts": 0, "actual_ms": 0.0,
+                                                  "declared_ms": 0.0, "winner": None})
+        entry["lookups"] += 1
+        entry["attempts"] += len(attempts)
+        entry["actual_ms"] += actual
+        entry["declared_ms"] += declared
+        entry["winner"] = f"{attempts[-1][0]}" if attempts[-1][2] else "not found"
+
+    def save(self):
+        """Write the history atomically, so parallel runs never leave a torn file"""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        data = {element: {key: stats.to_json() for key, stats in strategies.items()}
+                for element, strategies in sorted(self.stats.items())}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def report(self):
+        """Print per element the lookup time against the declared cascade order"""
+        if not self.session:
+            return
+        print("\n----- LOCATOR REGISTRY -----")
+        total_saved = 0.0
+        for element, entry in self.session.items():
+            saved = entry["declared_ms"] - entry["actual_ms"]
+            total_saved += saved
+            print(f"{element}: {entry['lookups']} lookup(s), {entry['attempts']} attempt(s), "
+                  f"{entry['actual_ms']:.0f} ms (declared order ~{entry['declared_ms']:.0f} ms, "
+                  f"saved {saved:.0f} ms) via {entry['winner']}")
+        print(f"Total saved: {total_saved:.0f} ms")
+        print("----------------------------")
+
+
+_default = None
+
+
+def default():
+    """The registry shared by all tests of this process, backed by LOCATOR_CACHE"""
+    global _default
+    if _default is None:
+        _default = LocatorRegistry()
+    return _default
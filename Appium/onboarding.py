@@ -0,0 +1,141 @@
+"""
+Onboarding steps shared by the Appium tests: choose English, skip sign-in
+and confirm the home page. The element lookups with several possible
+locators go through locator_registry, which tries the historically fastest
+strategy first instead of walking the cascade in a fixed order.
+
+When the session restored an onboarded app snapshot (see app_snapshot.py)
+the app starts on the home page and open_app() skips the onboarding.
+"""
+import os
+import time
+
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+import app_snapshot
+import locator_registry
+
+APP_PACKAGE = 'in.amazon.mShop.android.shopping'
+APP_ID = APP_PACKAGE + ':id/'
+
+# Typed into the search bar by the search tests
+SEARCH_QUERY = os.environ.get("SEARCH_QUERY", "").strip() or "Wireless Headphones"
+
+HOME_HINT = (AppiumBy.ID, APP_ID + 'chrome_search_hint_view')
+
+ENGLISH_OPTION = [
+    (AppiumBy.ACCESSIBILITY_ID, "Select English"),
+    (AppiumBy.XPATH, '//android.widget.ImageView[@content-desc="Select English"]'),
+    (AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().description("Select English")'),
+    (AppiumBy.XPATH, '//android.widget.RadioButton[contains(@text, "English")]'),
+]
+
+SKIP_SIGN_IN = [
+    (AppiumBy.ID, APP_ID + 'skip_sign_in_button'),
+    (AppiumBy.XPATH, '//android.widget.Button[contains(@text, "Skip sign in")]'),
+    (AppiumBy.XPATH, '//android.widget.TextView[contains(@text, "Skip")]'),
+]
+
+CONTINUE_AS_GUEST = [
+    (AppiumBy.XPATH, '//android.widget.Button[contains(@text, "Continue as guest") or contains(@text, "Skip")]'),
+]
+
+
+def start_screen(driver, timeout=15):
+    """Wait for the first screen: "home" when the app is already onboarded, else "onboarding" (None on timeout)"""
+    english = ENGLISH_OPTION[-1]
+    skip = SKIP_SIGN_IN[0]
+
+    def screen(driver):
+        if driver.find_elements(*HOME_HINT):
+            return "home"
+        if driver.find_elements(*english) or driver.find_elements(*skip):
+            return "onboarding"
+        return None
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.1).until(screen)
+    except TimeoutException:
+        return None
+
+
+def select_english(driver, registry=None):
+    registry = registry or locator_registry.default()
+    try:
+        registry.find(driver, "language.english", ENGLISH_OPTION).click()
+        print("Selected English")
+        return True
+    except WebDriverException:
+        print("Could not select English language, may already be selected")
+        return False
+
+
+def continue_after_language(driver):
+    try:
+        driver.find_element(AppiumBy.ID, APP_ID + 'continue_button').click()
+        print("Clicked continue after selecting language")
+        return True
+    except WebDriverException:
+        print("Could not find continue button after language selection")
+        return False
+
+
+def skip_sign_in(driver, registry=None, pause=0):
+    """Skip sign-in; if no skip option is shown, continue first and then go on as guest"""
+    registry = registry or locator_registry.default()
+    try:
+        registry.find(driver, "sign_in.skip", SKIP_SIGN_IN).click()
+        print("Skipped sign-in")
+        return True
+    except WebDriverException:
+        print("Could not find skip option, trying to continue as guest...")
+    # If we can't find a skip button, we may need to click continue first
+    driver.find_element(AppiumBy.ID, APP_ID + 'sso_continue').click()
+    time.sleep(pause)
+    try:
+        registry.find(driver, "sign_in.guest", CONTINUE_AS_GUEST).click()
+        print("Continued as guest after clicking continue")
+        return True
+    except WebDriverException:
+        print("Continuing without explicit skip")
+        return False
+
+
+def on_home_page(driver):
+    try:
+        driver.find_element(*HOME_HINT)
+        print("Successfully verified we're on the home page")
+        return True
+    except WebDriverException:
+        print("Could not verify home page")
+        return False
+
+
+def skip_if_onboarded(driver):
+    """True when the app started on the home page, so onboarding can be skipped"""
+    if app_snapshot.MEASURE_ONBOARDING or start_screen(driver) != "home":
+        return False
+    print("App started on the home page from the onboarding snapshot, skipping language and sign-in")
+    return True
+
+
+def save_onboarded_state(driver):
+    """Snapshot the onboarded app once, then wait for the home page it restarts on"""
+    if app_snapshot.ENABLED:
+        app_snapshot.capture_if_missing(driver, APP_PACKAGE)
+        start_screen(driver)
+
+
+def open_app(driver, registry=None):
+    """Open the app, select English language, and skip sign in"""
+    if skip_if_onboarded(driver):
+        return True
+    select_english(driver, registry)
+    continue_after_language(driver)
+    skip_sign_in(driver, registry)
+    print("App successfully opened with English language and sign-in skipped")
+    home_page_loaded = on_home_page(driver)
+    if home_page_loaded:
+        save_onboarded_state(driver)
+    return home_page_loaded
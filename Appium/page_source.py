@@ -0,0 +1,262 @@
+"""
+Offline parsing of UiAutomator2 page source.
+
+Every find_elements, "./.." and .text call against the device is a round
+trip to the Appium server. PageSnapshot pulls driver.page_source once and
+answers the same questions from the in-memory XML tree: it finds the product
+panel the tests pick, runs the name/price/rating/delivery heuristics and
+returns element bounds so the flow can tap the chosen element directly.
+
+lxml is used when installed (full XPath support); otherwise the stdlib
+ElementTree parser handles everything except XPath predicates.
+"""
+import re
+
+try:
+    from lxml import etree
+    HAVE_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as etree
+    HAVE_LXML = False
+
+TEXT_VIEW = "android.widget.TextView"
+VIEW = "android.view.View"
+BUTTON = "android.widget.Button"
+
+BOUNDS_PATTERN = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+UI_SELECTOR_PATTERN = re.compile(r'\.(\w+)\(\s*"((?:[^"\\]|\\.)*)"\s*\)')
+
+
+def parse_bounds(value):
+    """Turn "[x1,y1][x2,y2]" into a (x1, y1, x2, y2) tuple"""
+    match = BOUNDS_PATTERN.fullmatch(value or "")
+    if not match:
+        return None
+    return tuple(int(part) for part in match.groups())
+
+
+def center(bounds):
+    x1, y1, x2, y2 = bounds
+    return ((x1 + x2) // 2, (y1 + y2) // 2)
+
+
+def node_class(node):
+    return node.get("class") or node.tag
+
+
+def node_text(node):
+    return node.get("text") or ""
+
+
+def clean(text):
+    return text.replace("\n", " ").strip()
+
+
+def truncate(text, limit=200):
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+def bounds_xpath(node):
+    """XPath that finds this node again on the device in a single lookup"""
+    return '//*[@bounds="%s"]' % node.get("bounds")
+
+
+class PageSnapshot:
+
+    def __init__(self, xml):
+        """`xml` is page source text, or an already parsed root element"""
+        if isinstance(xml, str):
+            xml = xml.encode("utf-8")
+        self.root = etree.fromstring(xml) if isinstance(xml, bytes) else xml
+        self.nodes = list(self.root.iter())
+        # ElementTree has no getparent(), so build the parent map once
+        self._parents = None if HAVE_LXML else {child: parent for parent in self.nodes for child in parent}
+
+    def parent(self, node):
+        if HAVE_LXML:
+            return node.getparent()
+        return self._parents.get(node)
+
+    def descendants(self, node=None, cls=None):
+        nodes = self.nodes[1:] if node is None else list(node.iter())[1:]
+        if cls is None:
+            return nodes
+        return [n for n in nodes if node_class(n) == cls]
+
+    def text_views(self, node=None):
+        return self.descendants(node, TEXT_VIEW)
+
+    # ----- Locator strategies, matching what the Appium server would return -----
+
+    def find_all(self, by, value, node=None):
+        """Resolve an Appium locator against the snapshot"""
+        scope = self.descendants(node)
+        if by == "id":
+            return [n for n in scope if n.get("resource-id") == value or
+                    (n.get("resource-id") or "").endswith(":id/" + value)]
+        if by == "accessibility id":
+            return [n for n in scope if n.get("content-desc") == value]
+        if by == "class name":
+            return [n for n in scope if node_class(n) == value]
+        if by == "-android uiautomator":
+            return [n for n in scope if _matches_ui_selector(n, value)]
+        if by == "xpath":
+            return self._xpath(value, node)
+        raise ValueError(f"Unsupported locator strategy: {by}")
+
+    def _xpath(self, expression, node=None):
+        context = self.root if node is None else node
+        if HAVE_LXML:
+            result = context.xpath(expression)
+            return [n for n in result if isinstance(n, etree._Element)]
+        # ElementTree only understands relative paths with simple predicates
+        if expression == "./..":
+            parent = self.parent(context)
+            return [parent] if parent is not None else []
+        if expression.startswith("//"):
+            expression = "." + expression
+        try:
+            return list(context.iterfind(expression))
+        except SyntaxError:
+            raise ValueError(f"XPath '{expression}' needs lxml: pip install lxml")
+
+    # ----- Search results heuristics -----
+
+    def price_nodes(self, node=None):
+        return [n for n in self.text_views(node) if "₹" in node_text(n)]
+
+    def climb(self, node, levels=3):
+        for _ in range(levels):
+            parent = self.parent(node)
+            if parent is None:
+                break
+            node = parent
+        return node
+
+    def find_product_panel(self, index=2, levels=3):
+        """
+        Pick a product panel the same way the tests do: take the price
+        TextView at `index`, climb `levels` parents and skip panels that
+        have no TextView longer than 15 characters.
+        """
+        prices = self.price_nodes()
+        if not prices:
+            return None
+        start = index if len(prices) > index else 0
+        for price in prices[start:start + 2]:
+            panel = self.climb(price, levels)
+            if any(len(node_text(n)) > 15 for n in self.text_views(panel)):
+                return panel
+        return self.climb(prices[start], levels)
+
+    def panel_info(self, panel):
+        """Name, price, bounds and add-to-cart button of a search results panel"""
+        texts = self.text_views(panel)
+        info = {"name": None, "price": None, "bounds": parse_bounds(panel.get("bounds")),
+                "xpath": bounds_xpath(panel), "add_to_cart_bounds": None}
+        info["center"] = center(info["bounds"]) if info["bounds"] else None
+
+        long_names = [n for n in texts if len(node_text(n)) > 50]
+        if long_names:
+            info["name"] = truncate(node_text(long_names[0]))
+        else:
+            candidates = [node_text(n) for n in texts if len(node_text(n)) > 20 and "₹" not in node_text(n)]
+            if candidates:
+                info["name"] = truncate(max(candidates, key=len))
+            else:
+                fallback = [node_text(n) for n in texts
+                            if len(node_text(n)) > 15 and "₹" not in node_text(n) and "%" not in node_text(n)]
+                info["name"] = fallback[0] if fallback else None
+
+        prices = [n for n in texts if "₹" in node_text(n)]
+        if prices:
+            info["price"] = clean(node_text(prices[0]))
+
+        # Look for the Add to cart button near the price, up to three levels up
+        scope = prices[0] if prices else panel
+        for _ in range(3):
+            scope = self.parent(scope)
+            if scope is None:
+                break
+            buttons = [n for n in self.descendants(scope, BUTTON) if "add to cart" in node_text(n).lower()]
+            if buttons:
+                info["add_to_cart_bounds"] = parse_bounds(buttons[0].get("bounds"))
+                break
+        info["add_to_cart_center"] = center(info["add_to_cart_bounds"]) if info["add_to_cart_bounds"] else None
+        return info
+
+    # ----- Product page heuristics -----
+
+    def product_details(self):
+        """Title, price, rating and delivery text of a product page"""
+        details = {"title": None, "price": None, "price_source": None, "rating": None, "delivery": None}
+
+        titles = [n for n in self.descendants(cls=VIEW) if len(node_text(n)) > 40]
+        if not titles:
+            titles = [n for n in self.text_views() if len(node_text(n)) > 10]
+        if titles:
+            details["title"] = truncate(node_text(titles[0]))
+
+        containers = [n for n in self.nodes if n.get("resource-id") == "reinvent_price_tabular_mobile_feature_div"]
+        container_prices = self.price_nodes(containers[0]) if containers else []
+        if container_prices:
+            details["price"] = clean(node_text(container_prices[0]))
+            details["price_source"] = "container"
+        elif self.price_nodes():
+            details["price"] = clean(node_text(self.price_nodes()[0]))
+            details["price_source"] = "fallback"
+
+        ratings = [n for n in self.text_views() if "stars" in node_text(n) or "out of" in node_text(n)]
+        if not ratings:
+            ratings = [n for n in self.text_views() if "★" in node_text(n)]
+        if ratings:
+            details["rating"] = clean(node_text(ratings[0]))
+
+        delivery = [n for n in self.text_views() if "Delivery" in node_text(n) or "delivery" in node_text(n)]
+        if delivery:
+            details["delivery"] = clean(node_text(delivery[0]))
+        return details
+
+
+def _matches_ui_selector(node, selector):
+    """Evaluate the subset of UiSelector() chains the tests use"""
+    checks = {
+        "resourceId": lambda n, v: n.get("resource-id") == v,
+        "resourceIdMatches": lambda n, v: re.fullmatch(v, n.get("resource-id") or "") is not None,
+        "description": lambda n, v: n.get("content-desc") == v,
+        "descriptionContains": lambda n, v: v in (n.get("content-desc") or ""),
+        "text": lambda n, v: node_text(n) == v,
+        "textContains": lambda n, v: v in node_text(n),
+        "className": lambda n, v: node_class(n) == v,
+    }
+    calls = UI_SELECTOR_PATTERN.findall(selector)
+    if not calls or any(name not in checks for name, _ in calls):
+        raise ValueError(f"Unsupported UiSelector: {selector}")
+    return all(checks[name](node, value.replace('\\"', '"')) for name, value in calls)
+
+
+def print_panel_info(info):
+    print("\n----- SEARCH RESULTS PANEL INFO -----")
+    if info["name"]:
+        print(f"Product Name: {info['name']}")
+    else:
+        print("No suitable product name candidates found")
+    if info["price"]:
+        print(f"Product Price: {info['price']}")
+    else:
+        print("No price elements found with rupee symbol")
+    print("---------------------------------")
+
+
+def print_product_details(details):
+    print("\n----- PRODUCT DETAILS -----")
+    if details["title"]:
+        print(f"Product Title: {details['title']}")
+    if details["price"]:
+        print(f"Product Price (from {details['price_source']}): {details['price']}")
+    if details["rating"]:
+        print(f"Product Rating: {details['rating']}")
+    if details["delivery"]:
+        print(f"Delivery Info: {details['delivery']}")
+    print("--------------------------\n")
+    print("Product details extraction completed")
@@ -0,0 +1,167 @@
+"""
+One Appium session per worker, reused across test methods.
+
+Creating a UiAutomator2 session installs and starts the instrumentation
+server on the device and launches the app, which takes seconds per test. The
+manager creates the session once, resets the Amazon app before every test
+that reuses it and quits the session at exit (the tests never quit theirs,
+which leaked sessions on the server).
+
+    APPIUM_SESSION_REUSE=0     new session per test, quit after it (no reuse)
+    APPIUM_RESET=clear         pm clear + relaunch: onboarding starts over (default)
+    APPIUM_RESET=terminate     force-stop + relaunch: app data and language kept
+    APPIUM_SESSION_MAX_USES=50 start a fresh session after this many tests
+    WEBDRIVER_CLIENT=async     sessions run on harness/async_webdriver.py
+
+After every reset (and on a new session) the onboarded app snapshot is
+restored when one exists, see app_snapshot.py.
+"""
+import atexit
+import json
+import os
+import sys
+import time
+
+from appium import webdriver
+from appium.options.android import UiAutomator2Options
+
+import app_snapshot
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RESET_MODES = ("clear", "terminate")
+WEBDRIVER_CLIENT = os.environ.get("WEBDRIVER_CLIENT", "appium")
+
+
+class AppiumSessionManager:
+
+    def __init__(self, server_url, capabilities, reuse=True, reset="clear", max_uses=50):
+        if reset not in RESET_MODES:
+            raise ValueError(f"Unknown reset mode '{reset}', choose from {', '.join(RESET_MODES)}")
+        self.server_url = server_url
+        self.capabilities = dict(capabilities)
+        self.app_id = capabilities.get("appPackage") or capabilities.get("appium:appPackage")
+        self.reuse = reuse
+        self.reset = reset
+        self.max_uses = max_uses
+        self.driver = None
+        self.uses = 0
+        self.session_times = []
+        self.reset_times = []
+        self.reused = 0
+
+    def _create(self):
+        start_time = time.perf_counter()
+        options = UiAutomator2Options().load_capabilities(self.capabilities)
+        if WEBDRIVER_CLIENT == "async":
+            from harness.async_webdriver import SyncWebDriver
+            driver = SyncWebDriver.create(self.server_url, options.to_capabilities())
+        else:
+            driver = webdriver.Remote(self.server_url, options=options)
+        elapsed = time.perf_counter() - start_time
+        self.session_times.append(elapsed)
+        print(f"Created Appium session {driver.session_id} in {elapsed:.2f} seconds")
+        app_snapshot.restore(driver, self.app_id)
+        return driver
+
+    def acquire(self):
+        """The worker's session, with the app in a freshly reset state"""
+        if not self.reuse:
+            return self._create()
+        if self.driver is not None:
+            # Reset when the session is handed out again, so the last test's session is never reset for nothing
+            try:
+                self.reset_app(self.driver)
+                self.reused += 1
+            except Exception as e:
+                print(f"Could not reset the app, starting a new session: {e}")
+                self._quit(self.driver)
+                self.driver = None
+        if self.driver is None:
+            self.driver = self._create()
+            self.uses = 0
+        return self.driver
+
+    def release(self, driver):
+        """Quit the session when it is not reused or worn out; the app is reset on the next acquire()"""
+        if not self.reuse or driver is not self.driver:
+            self._quit(driver)
+            return
+        self.uses += 1
+        if self.uses >= self.max_uses:
+            self._quit(driver)
+            self.driver = None
+
+    def reset_app(self, driver):
+        start_time = time.perf_counter()
+        # Undo per-test driver settings, e.g. server-side waits
+        driver.implicitly_wait(0)
+        if self.reset == "clear":
+            # pm clear: wipes app data and stops the app, like the default fastReset of a new session
+            driver.execute_script("mobile: clearApp", {"appId": self.app_id})
+        else:
+            driver.execute_script("mobile: terminateApp", {"appId": self.app_id})
+        if not app_snapshot.restore(driver, self.app_id):
+            driver.execute_script("mobile: activateApp", {"appId": self.app_id})
+        self.reset_times.append(time.perf_counter() - start_time)
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Could not quit Appium session: {e}")
+
+    def shutdown(self):
+        if self.driver is not None:
+            self._quit(self.driver)
+            self.driver = None
+
+    def saved_seconds(self):
+        """Session setup time avoided by reuse, net of the time spent resetting the app"""
+        if not self.session_times or not self.reused:
+            return 0.0
+        average_session = sum(self.session_times) / len(self.session_times)
+        return self.reused * average_session - sum(self.reset_times)
+
+    def report(self):
+        if not self.session_times:
+            return
+        print("\n----- APPIUM SESSIONS -----")
+        print(f"Sessions created: {len(self.session_times)} "
+              f"(avg {sum(self.session_times) / len(self.session_times):.2f} s incl. UiAutomator2 server start)")
+        if self.reset_times:
+            print(f"Reused {self.reused} time(s), app reset ({self.reset}) "
+                  f"avg {sum(self.reset_times) / len(self.reset_times):.2f} s")
+        print(f"Saved: {self.saved_seconds():.2f} seconds of session creation")
+        print("---------------------------")
+
+
+_managers = {}
+
+
+def get_manager(server_url, capabilities):
+    """The manager of this process for a server and capability set"""
+    key = (server_url, json.dumps(capabilities, sort_keys=True))
+    if key not in _managers:
+        _managers[key] = AppiumSessionManager(
+            server_url, capabilities,
+            reuse=os.environ.get("APPIUM_SESSION_REUSE", "1") != "0",
+            reset=os.environ.get("APPIUM_RESET", "clear"),
+            max_uses=int(os.environ.get("APPIUM_SESSION_MAX_USES", "50")),
+        )
+    return _managers[key]
+
+
+def acquire(server_url, capabilities):
+    return get_manager(server_url, capabilities).acquire()
+
+
+def release(server_url, capabilities, driver):
+    get_manager(server_url, capabilities).release(driver)
+
+
+@atexit.register
+def _shutdown():
+    for manager in _managers.values():
+        manager.shutdown()
+        manager.report()
@@ -0,0 +1,650 @@
+"""
+Stand-in Appium/UiAutomator2 server that replays recorded page source.
+
+Speaks enough of the W3C WebDriver protocol for the Amazon flows in
+test*.py: new session, find element(s) by id, accessibility id, class name,
+-android uiautomator and xpath (answered from the saved XML through
+PageSnapshot.find_all), element text/attribute/rect/click/send_keys, page
+source, implicit waits, W3C pointer actions (tap, swipe) and the
+mobile: pressKey / terminateApp / activateApp / clearApp extensions. For
+app_snapshot.py, mobile: shell understands the dumpsys version lookup and the
+snapshot tar commands; a restored snapshot relaunches on the home screen.
+
+A small state machine moves between the screens in fixtures/: language ->
+sign_in -> home -> search_entry -> search_results -> filtered_results ->
+product_page -> cart, with the cart count and an "Added to cart" message
+patched into the tree. Every command can be delayed to model the round
+trip to a device. Screen changes take --transition-ms: inside the command
+for native screens, in the background for WebView screens.
+
+    python stub_server.py --latency-ms 40 --jitter-ms 10 --transition-ms 600
+    python -m unittest testc            # the tests talk to localhost:4723
+
+Needs lxml for the XPath locators.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lxml import etree
+
+import page_source
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+APP_PACKAGE = "in.amazon.mShop.android.shopping"
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+SCREEN_SIZE = {"x": 0, "y": 0, "width": 1080, "height": 2400}
+
+KEYCODE_BACK = 4
+KEYCODE_ENTER = 66
+
+# Screens rendered in the app's WebView load after the command returns;
+# native screens are idle before UiAutomator2 answers the command
+WEB_SCREENS = {"search_results", "filtered_results", "product_page", "cart"}
+
+
+def app_id(name):
+    return f"{APP_PACKAGE}:id/{name}"
+
+
+class WebDriverError(Exception):
+    """A W3C error response: status code, error code and message"""
+
+    def __init__(self, status, error, message):
+        super().__init__(message)
+        self.status = status
+        self.error = error
+
+
+def no_such_element(using, value):
+    return WebDriverError(404, "no such element", f"An element could not be located using {using}={value}")
+
+
+# ----- Screen transitions -----
+# Each rule is (predicate, target). A click is matched against the clicked
+# node first and then its ancestors, so tapping the title inside a result
+# panel opens the product like tapping the panel does. Targets are screen
+# names or one of the actions handled in Session.perform().
+
+def by_id(resource_id):
+    return lambda node: node.get("resource-id") == resource_id
+
+
+def by_desc(desc):
+    return lambda node: node.get("content-desc") == desc
+
+
+def desc_contains(text):
+    return lambda node: text in (node.get("content-desc") or "")
+
+
+def button_text(text):
+    return lambda node: (page_source.node_class(node) == page_source.BUTTON and
+                         text in page_source.node_text(node).lower())
+
+
+def clickable_view(node):
+    return page_source.node_class(node) == page_source.VIEW and node.get("clickable") == "true"
+
+
+GLOBAL_RULES = [
+    (by_id(app_id("chrome_search_hint_view")), "search_entry"),
+    (by_id(app_id("chrome_action_bar_cart")), "cart"),
+]
+
+RESULTS_RULES = [
+    (by_desc("4 Stars and Up Add filter"), "filtered_results"),
+    (by_desc("4 Stars and Up Remove filter"), "search_results"),
+    (by_id("1318476031"), "filtered_results"),
+    (desc_contains("filter"), None),
+    (button_text("add to cart"), "add_to_cart"),
+    (clickable_view, "product_page"),
+]
+
+SCREEN_RULES = {
+    "language": [
+        (by_desc("Select English"), "select_english"),
+        (by_id(app_id("continue_button")), "sign_in"),
+    ],
+    "sign_in": [
+        (by_id(app_id("skip_sign_in_button")), "home"),
+        (by_id(app_id("sign_in_button")), "home"),
+    ],
+    "home": [],
+    "search_entry": [
+        (by_id(app_id("iss_search_dropdown_item_text")), "search_results"),
+    ],
+    "search_results": RESULTS_RULES,
+    "filtered_results": RESULTS_RULES,
+    "product_page": [
+        (by_id("add-to-cart-button"), "add_to_cart"),
+        (button_text("add to cart"), "add_to_cart"),
+    ],
+    "cart": [],
+}
+
+
+class Screens:
+    """The recorded screens, read once and parsed again for every screen change"""
+
+    def __init__(self, directory=FIXTURES):
+        self.directory = directory
+        self._xml = {}
+
+    def load(self, name):
+        if name not in self._xml:
+            with open(os.path.join(self.directory, name + ".xml"), "rb") as f:
+                self._xml[name] = f.read()
+        return etree.fromstring(self._xml[name])
+
+
+class Session:
+
+    def __init__(self, server, capabilities, start_screen):
+        self.server = server
+        self.id = uuid.uuid4().hex
+        self.capabilities = capabilities
+        self.lock = threading.RLock()
+        self.implicit_wait = 0.0
+        self.cart_count = 0
+        self.query = ""
+        self.history = []
+        self.screen = None
+        self.pending = None
+        self.toast = None
+        self.generation = 0
+        self.restored = False
+        self.show(start_screen)
+
+    # ----- Screen state -----
+
+    def show(self, screen):
+        """Switch to a screen now; element references from the old one go stale"""
+        self.screen = screen
+        self.root = self.server.screens.load(screen)
+        self.generation += 1
+        self.elements = {}
+        self.element_ids = {}
+        self.patch()
+
+    def navigate(self, screen, remember=True):
+        """Switch to a screen, taking the configured transition time"""
+        if screen == self.screen:
+            return
+        if remember:
+            self.history.append(self.screen)
+        if not self.server.transition:
+            self.show(screen)
+        elif screen in WEB_SCREENS:
+            self.pending = (screen, time.perf_counter() + self.server.transition)
+        else:
+            time.sleep(self.server.transition)
+            self.show(screen)
+
+    def settle(self):
+        if self.pending and time.perf_counter() >= self.pending[1]:
+            screen, _ = self.pending
+            self.pending = None
+            self.show(screen)
+
+    def patch(self):
+        """Write the session state (cart count, typed query, confirmation) into the tree"""
+        for node in self.root.iter():
+            resource_id = node.get("resource-id")
+            if resource_id == app_id("chrome_action_bar_cart_count"):
+                node.set("text", str(self.cart_count))
+            elif resource_id == app_id("rs_search_src_text") and self.query:
+                node.set("text", self.query)
+            elif resource_id == "sc-subtotal-label-activecart":
+                items = "item" if self.cart_count == 1 else "items"
+                node.set("text", f"Subtotal ({self.cart_count} {items}): ₹{4490 * self.cart_count:,}.00")
+        if self.toast and self.screen in ("search_results", "filtered_results", "product_page"):
+            content = self.root.find(".//*[@resource-id='android:id/content']")
+            if content is not None and content.find("./*[@resource-id='atc_confirmation']") is None:
+                toast = etree.SubElement(content, page_source.TEXT_VIEW)
+                for key, value in (("index", str(len(content) - 1)), ("package", APP_PACKAGE),
+                                   ("class", page_source.TEXT_VIEW), ("text", self.toast),
+                                   ("resource-id", "atc_confirmation"), ("content-desc", ""),
+                                   ("clickable", "false"), ("enabled", "true"),
+                                   ("bounds", "[40,2180][1040,2300]"), ("displayed", "true")):
+                    toast.set(key, value)
+        self.snapshot = page_source.PageSnapshot(self.root)
+
+    def perform(self, target):
+        if target is None:
+            return
+        if target == "select_english":
+            for node in self.root.iter(page_source.TEXT_VIEW, "android.widget.RadioButton"):
+                if page_source.node_text(node) == "English":
+                    node.set("checked", "true")
+            self.patch()
+        elif target == "add_to_cart":
+            self.cart_count += 1
+            self.toast = "Added to cart"
+            self.patch()
+        else:
+            self.toast = None
+            self.navigate(target)
+
+    def click_node(self, node):
+        rules = SCREEN_RULES.get(self.screen, []) + GLOBAL_RULES
+        while node is not None:
+            for predicate, target in rules:
+                if predicate(node):
+                    self.perform(target)
+                    return
+            node = self.snapshot.parent(node)
+
+    def tap(self, x, y):
+        """Click the deepest node whose bounds contain the point"""
+        hit = None
+        for node in self.snapshot.nodes:
+            bounds = page_source.parse_bounds(node.get("bounds"))
+            if bounds and bounds[0] <= x < bounds[2] and bounds[1] <= y < bounds[3]:
+                hit = node
+        if hit is not None:
+            self.click_node(hit)
+
+    def press_key(self, keycode):
+        if keycode == KEYCODE_ENTER and self.screen == "search_entry":
+            self.navigate("search_results")
+        elif keycode == KEYCODE_BACK and self.history:
+            self.toast = None
+            self.navigate(self.history.pop(), remember=False)
+
+    # ----- Elements -----
+
+    def reference(self, node):
+        if node not in self.element_ids:
+            element_id = f"{self.generation}-{len(self.elements) + 1}"
+            self.element_ids[node] = element_id
+            self.elements[element_id] = node
+        return {ELEMENT_KEY: self.element_ids[node], "ELEMENT": self.element_ids[node]}
+
+    def node(self, element_id):
+        node = self.elements.get(element_id)
+        if node is None:
+            raise WebDriverError(404, "stale element reference",
+                                 f"The element '{element_id}' is not attached to the current screen")
+        return node
+
+    def find(self, using, value, scope=None):
+        """find_all with the implicit wait applied, re-checking pending screen changes"""
+        deadline = time.perf_counter() + self.implicit_wait
+        while True:
+            with self.lock:
+                self.settle()
+                node = self.node(scope) if scope else None
+                try:
+                    found = self.snapshot.find_all(using, value, node)
+                except (ValueError, etree.XPathError) as e:
+                    raise WebDriverError(400, "invalid selector", str(e))
+                if found or time.perf_counter() >= deadline:
+                    return [self.reference(n) for n in found]
+            time.sleep(0.05)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    ROUTES = [
+        ("POST", r"/session", "new_session"),
+        ("GET", r"/status", "status"),
+        ("DELETE", r"/session/([^/]+)", "delete_session"),
+        ("POST", r"/session/([^/]+)/timeouts", "timeouts"),
+        ("GET", r"/session/([^/]+)/timeouts", "get_timeouts"),
+        ("GET", r"/session/([^/]+)/source", "source"),
+        ("GET", r"/session/([^/]+)/window/rect", "window_rect"),
+        ("GET", r"/session/([^/]+)/window/(?:current/)?size", "window_size"),
+        ("POST", r"/session/([^/]+)/element", "find_element"),
+        ("POST", r"/session/([^/]+)/elements", "find_elements"),
+        ("POST", r"/session/([^/]+)/element/([^/]+)/element", "find_element"),
+        ("POST", r"/session/([^/]+)/element/([^/]+)/elements", "find_elements"),
+        ("GET", r"/session/([^/]+)/element/([^/]+)/text", "element_text"),
+        ("GET", r"/session/([^/]+)/element/([^/]+)/attribute/([^/]+)", "element_attribute"),
+        ("GET", r"/session/([^/]+)/element/([^/]+)/rect", "element_rect"),
+        ("GET", r"/session/([^/]+)/element/([^/]+)/name", "element_name"),
+        ("GET", r"/session/([^/]+)/element/([^/]+)/(displayed|enabled|selected)", "element_state"),
+        ("POST", r"/session/([^/]+)/element/([^/]+)/click", "element_click"),
+        ("POST", r"/session/([^/]+)/element/([^/]+)/value", "element_value"),
+        ("POST", r"/session/([^/]+)/element/([^/]+)/clear", "element_clear"),
+        ("POST", r"/session/([^/]+)/actions", "actions"),
+        ("DELETE", r"/session/([^/]+)/actions", "release_actions"),
+        ("POST", r"/session/([^/]+)/execute/sync", "execute"),
+        ("POST", r"/session/([^/]+)/appium/device/press_keycode", "press_keycode"),
+        ("POST", r"/session/([^/]+)/back", "back"),
+    ]
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def dispatch(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        path = self.path.split("?")[0].rstrip("/")
+        if path.startswith("/wd/hub"):
+            path = path[len("/wd/hub"):]
+        self.server.delay()
+        try:
+            for route_method, pattern, handler in self.ROUTES:
+                match = re.fullmatch(pattern, path)
+                if route_method == method and match:
+                    args = match.groups()
+                    if handler not in ("new_session", "status"):
+                        args = (self.server.session(args[0]),) + args[1:]
+                    self.reply(200, getattr(self, handler)(body, *args))
+                    return
+            raise WebDriverError(404, "unknown command", f"{method} {path} is not supported by the stub")
+        except WebDriverError as e:
+            self.reply(e.status, {"error": e.error, "message": str(e), "stacktrace": ""})
+
+    def reply(self, status, value):
+        data = json.dumps({"value": value}, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # ----- Sessions -----
+
+    def new_session(self, body):
+        requested = body.get("capabilities", {})
+        capabilities = dict(requested.get("alwaysMatch", {}))
+        for extra in requested.get("firstMatch", [{}])[:1]:
+            capabilities.update(extra)
+        capabilities.setdefault("platformName", "Android")
+        session = self.server.create_session(capabilities)
+        return {"sessionId": session.id, "capabilities": capabilities}
+
+    def status(self, body):
+        return {"ready": True, "message": "Appium stub server ready", "build": {"version": "stub"}}
+
+    def delete_session(self, body, session):
+        self.server.delete_session(session.id)
+        return None
+
+    def timeouts(self, body, session):
+        if body.get("implicit") is not None:
+            session.implicit_wait = body["implicit"] / 1000
+        return None
+
+    def get_timeouts(self, body, session):
+        return {"implicit": int(session.implicit_wait * 1000), "pageLoad": 300000, "script": 30000}
+
+    def source(self, body, session):
+        self.server.delay(self.server.source_latency)
+        with session.lock:
+            session.settle()
+            return etree.tostring(session.root, encoding="unicode")
+
+    def window_rect(self, body, session):
+        return SCREEN_SIZE
+
+    def window_size(self, body, session):
+        return {"width": SCREEN_SIZE["width"], "height": SCREEN_SIZE["height"]}
+
+    # ----- Elements -----
+
+    def find_elements(self, body, session, scope=None):
+        return session.find(body.get("using"), body.get("value"), scope)
+
+    def find_element(self, body, session, scope=None):
+        found = self.find_elements(body, session, scope)
+        if not found:
+            raise no_such_element(body.get("using"), body.get("value"))
+        return found[0]
+
+    def element_text(self, body, session, element_id):
+        with session.lock:
+            return page_source.node_text(session.node(element_id))
+
+    def element_attribute(self, body, session, element_id, name):
+        with session.lock:
+            node = session.node(element_id)
+            if name in ("displayed", "enabled"):
+                return node.get(name, "true")
+            if name in ("className", "class"):
+                return page_source.node_class(node)
+            if name in ("resourceId", "resource-id"):
+                return node.get("resource-id")
+            if name in ("contentDescription", "content-desc"):
+                return node.get("content-desc")
+            return node.get(name)
+
+    def element_rect(self, body, session, element_id):
+        with session.lock:
+            bounds = page_source.parse_bounds(session.node(element_id).get("bounds")) or (0, 0, 0, 0)
+        x1, y1, x2, y2 = bounds
+        return {"x": x1, "y": y1, "width": x2 - x1, "height": y2 - y1}
+
+    def element_name(self, body, session, element_id):
+        with session.lock:
+            return page_source.node_class(session.node(element_id))
+
+    def element_state(self, body, session, element_id, state):
+        with session.lock:
+            node = session.node(element_id)
+            default = "true" if state in ("displayed", "enabled") else "false"
+            return node.get("checked" if state == "selected" else state, default) == "true"
+
+    def element_click(self, body, session, element_id):
+        with session.lock:
+            session.click_node(session.node(element_id))
+        return None
+
+    def element_value(self, body, session, element_id):
+        text = body.get("text") or "".join(body.get("value", []))
+        with session.lock:
+            node = session.node(element_id)
+            node.set("text", text)
+            if node.get("resource-id") == app_id("rs_search_src_text"):
+                session.query = text
+                session.patch()
+        return None
+
+    def element_clear(self, body, session, element_id):
+        with session.lock:
+            session.node(element_id).set("text", "")
+        return None
+
+    # ----- Gestures and device commands -----
+
+    def actions(self, body, session):
+        """Treat each pointer sequence as a tap (down and up at the same spot) or a swipe"""
+        for source in body.get("actions", []):
+            if source.get("type") != "pointer":
+                continue
+            x = y = 0
+            down = None
+            for action in source.get("actions", []):
+                if action.get("type") == "pointerMove":
+                    x, y = action.get("x", x), action.get("y", y)
+                elif action.get("type") == "pointerDown":
+                    down = (x, y)
+                elif action.get("type") == "pointerUp" and down:
+                    if abs(x - down[0]) < 20 and abs(y - down[1]) < 20:
+                        with session.lock:
+                            session.settle()
+                            session.tap(x, y)
+                    # Swipes only scroll; the recorded screens already hold every element
+                    down = None
+        return None
+
+    def release_actions(self, body, session):
+        return None
+
+    def execute(self, body, session):
+        script = body.get("script", "")
+        args = (body.get("args") or [{}])[0] or {}
+        with session.lock:
+            session.settle()
+            if script == "mobile: pressKey":
+                session.press_key(int(args.get("keycode")))
+                return None
+            if script == "mobile: terminateApp":
+                session.history.clear()
+                session.show("language" if session.screen in ("language", "sign_in") else "home")
+                return True
+            if script == "mobile: activateApp":
+                if session.restored:
+                    session.restored = False
+                    session.history.clear()
+                    session.show("home")
+                return None
+            if script == "mobile: shell":
+                return self.shell(session, args)
+            if script == "mobile: clearApp":
+                session.restored = False
+                session.cart_count = 0
+                session.query = ""
+                session.toast = None
+                session.history.clear()
+                session.show("language")
+                return None
+        raise WebDriverError(404, "unknown command", f"Script '{script}' is not supported by the stub")
+
+    def shell(self, session, args):
+        """The few device commands app_snapshot.py runs; the snapshot itself is just a flag"""
+        command = " ".join([args.get("command", "")] + [str(arg) for arg in args.get("args", [])])
+        if command.startswith("dumpsys package"):
+            return "    versionCode=1 minSdk=24 targetSdk=34\n    versionName=stub\n"
+        if "test -s" in command:
+            return "yes\n" if self.server.snapshot else ""
+        if "tar -czf" in command:
+            self.server.snapshot = True
+        elif "tar -xzf" in command:
+            session.restored = True
+        elif "rm -f" in command:
+            self.server.snapshot = False
+        return ""
+
+    def press_keycode(self, body, session):
+        with session.lock:
+            session.settle()
+            session.press_key(int(body.get("keycode")))
+        return None
+
+    def back(self, body, session):
+        """driver.back(): the Android back key"""
+        with session.lock:
+            session.settle()
+            session.press_key(KEYCODE_BACK)
+        return None
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=4723, latency_ms=None, jitter_ms=None, transition_ms=None,
+                 source_ms=None, start_screen="language", seed=None, verbose=False):
+        super().__init__((host, port), StubHandler)
+
+        def setting(value, name):
+            return (float(os.environ.get(name, "0")) if value is None else value) / 1000
+
+        self.latency = setting(latency_ms, "APPIUM_STUB_LATENCY_MS")
+        self.jitter = setting(jitter_ms, "APPIUM_STUB_JITTER_MS")
+        self.transition = setting(transition_ms, "APPIUM_STUB_TRANSITION_MS")
+        self.source_latency = setting(source_ms, "APPIUM_STUB_SOURCE_MS")
+        self.start_screen = start_screen
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.verbose = verbose
+        self.screens = Screens()
+        self.sessions = {}
+        self.snapshot = False
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self, extra=0.0):
+        """Sleep for the per-command latency plus uniform jitter in [-jitter, +jitter]"""
+        if not (self.latency or self.jitter or extra):
+            return
+        with self.random_lock:
+            jitter = self.random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, self.latency + jitter + extra))
+
+    def create_session(self, capabilities):
+        start_screen = "home" if capabilities.get("appium:noReset") else self.start_screen
+        session = Session(self, capabilities, start_screen)
+        self.sessions[session.id] = session
+        return session
+
+    def session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise WebDriverError(404, "invalid session id", f"Session '{session_id}' does not exist")
+        return session
+
+    def delete_session(self, session_id):
+        self.sessions.pop(session_id, None)
+
+    def start(self):
+        """Serve from a daemon thread and return self"""
+        self.thread = threading.Thread(target=self.serve_forever, name="appium-stub", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self.thread:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4723)
+    parser.add_argument("--latency-ms", type=float, default=None, help="per command (APPIUM_STUB_LATENCY_MS)")
+    parser.add_argument("--jitter-ms", type=float, default=None, help="uniform +/- jitter (APPIUM_STUB_JITTER_MS)")
+    parser.add_argument("--transition-ms", type=float, default=None,
+                        help="time for a new screen to appear (APPIUM_STUB_TRANSITION_MS)")
+    parser.add_argument("--source-ms", type=float, default=None,
+                        help="extra time for a page source dump (APPIUM_STUB_SOURCE_MS)")
+    parser.add_argument("--start-screen", default="language", choices=sorted(SCREEN_RULES))
+    parser.add_argument("--seed", type=int, default=None, help="seed the jitter for repeatable runs")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    server = StubServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.transition_ms,
+                        args.source_ms, args.start_screen, args.seed, args.verbose)
+    print(f"Appium stub listening on {server.url} (latency {server.latency * 1000:.0f} ms, "
+          f"jitter +/- {server.jitter * 1000:.0f} ms, transitions {server.transition * 1000:.0f} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
+import os
 import time
 import unittest
-from appium import webdriver
-from appium.options.android import UiAutomator2Options
 from appium.webdriver.common.appiumby import AppiumBy
 
+import locator_registry
+import onboarding
+import page_source
+import session_manager
+
 capabilities = dict(
     platformName='Android',
     automationName='uiautomator2',
@@ -19,106 +23,26 @@ capabilities = dict(
 
 appium_server_url = 'http://localhost:4723'
 
+# Set APPIUM_PAGE_SOURCE_MODE=1 to read product panels and pages from a single page_source dump
+PAGE_SOURCE_MODE = os.environ.get("APPIUM_PAGE_SOURCE_MODE", "0") == "1"
+
 class TestAppium(unittest.TestCase):
     def setUp(self):
-        self.driver = webdriver.Remote(appium_server_url, options=UiAutomator2Options().load_capabilities(capabilities))
+        self.driver = session_manager.acquire(appium_server_url, capabilities)
+        self.locators = locator_registry.default()
         print("Session ID:", self.driver.session_id)
 
     def tearDown(self):
-        # if self.driver:
-        #     self.driver.quit()
+        session_manager.release(appium_server_url, capabilities, self.driver)
+        self.locators.save()
+        self.locators.report()
         print("tear down")
 
     # Utility methods and setup
     def open_app(self):
         """Open the app, select English language, and skip sign in"""
-        # Wait for initial screen to load
-        #time.sleep(3)
-        
-        # Handle language selection first
-        try:
-            # Try using accessibility ID first (most reliable)
-            self.identify_element("English language selection button")
-            english_option = self.driver.find_element(AppiumBy.ACCESSIBILITY_ID, "Select English")
-            english_option.click()
-            print("Selected English using Accessibility ID")
-        except:
-            try:
-                # Try XPath if accessibility ID doesn't work
-                english_option = self.driver.find_element(AppiumBy.XPATH, 
-                    '//android.widget.ImageView[@content-desc="Select English"]')
-                english_option.click()
-                print("Selected English using XPath")
-            except:
-                try:
-                    # Try UiAutomator as last resort
-                    english_option = self.driver.find_element(AppiumBy.ANDROID_UIAUTOMATOR, 
-                        'new UiSelector().description("Select English")')
-                    english_option.click()
-                    print("Selected English using UiAutomator")
-                except:
-                    try:
-                        # Fall back to our original method
-                        english_option = self.driver.find_element(AppiumBy.XPATH, 
-                            '//android.widget.RadioButton[contains(@text, "English")]')
-                        english_option.click()
-                        print("Selected English using text content")
-                    except:
-                        print("Could not select English language, may already be selected")
-        
-        # Try to find and click the continue button
-        try:
-            language_continue = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/continue_button')
-            language_continue.click()
-            #time.sleep(2)
-            print("Clicked continue after selecting language")
-        except:
-            print("Could not find continue button after language selection")
-        
-        # Skip sign in
-        try:
-            # Look for skip sign-in button instead of continue button
-            skip_button = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/skip_sign_in_button')
-            skip_button.click()
-        except:
-            try:
-                # Try by text if ID doesn't work
-                skip_button = self.driver.find_element(AppiumBy.XPATH, '//android.widget.Button[contains(@text, "Skip sign in")]')
-                skip_button.click()
-            except:
-                try:
-                    # Look for "Sign in" button's sibling element that allows skipping
-                    skip_link = self.driver.find_element(AppiumBy.XPATH, '//android.widget.TextView[contains(@text, "Skip")]')
-                    skip_link.click()
-                except:
-                    print("Could not find skip option, trying to continue as guest...")
-                    # If we can't find a skip button, we may need to click continue first
-                    continue_button = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/sso_continue')
-                    continue_button.click()
-                    # Then look for skip options on the next screen
-                    #time.sleep(2)
-                    try:
-                        skip_button = self.driver.find_element(AppiumBy.XPATH, 
-                            '//android.widget.Button[contains(@text, "Continue as guest") or contains(@text, "Skip")]')
-                        skip_button.click()
-                    except:
-                        print("Continuing without explicit skip")
-        
-        # Wait for home page to load after skipping sign-in
-        #time.sleep(3)
-        print("App successfully opened with English language and sign-in skipped")
-        
-        # Verify we're on the home page
-        try:
-            search_hint = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/chrome_search_hint_view')
-            print("Successfully verified we're on the home page")
-            return True
-        except:
-            print("Could not verify home page")
-            return False
+        return onboarding.open_app(self.driver, self.locators)
 
-    
-    
     def print_page_source(self):
         """Print a segment of the current page source for debugging"""
         page_source = self.driver.page_source
@@ -130,6 +54,10 @@ class TestAppium(unittest.TestCase):
 
     def extract_product_details(self):
         """Extract product details from the current product page using specific selectors"""
+        if PAGE_SOURCE_MODE:
+            page_source.print_product_details(page_source.PageSnapshot(self.driver.page_source).product_details())
+            return
+        
         try:
             print("\n----- PRODUCT DETAILS -----")
             
@@ -255,6 +183,17 @@ class TestAppium(unittest.TestCase):
             # Always print this to maintain consistent output format
             print("Product details extraction completed")
 
+    def select_product_from_page_source(self):
+        """Pick a product panel from one page_source dump instead of per-element lookups"""
+        snapshot = page_source.PageSnapshot(self.driver.page_source)
+        panel = snapshot.find_product_panel()
+        if panel is None:
+            print("No product panels found in page source")
+            return None
+        info = snapshot.panel_info(panel)
+        page_source.print_panel_info(info)
+        return info
+
     def extract_product_info_from_panel(self, container):
         """Extract product name and price from a product panel in search results"""
         product_info = {"name": None, "price": None}
@@ -370,7 +309,7 @@ class TestAppium(unittest.TestCase):
         search_bar = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/chrome_search_hint_view')
         search_bar.click()
         second_search_bar = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/rs_search_src_text')
-        second_search_bar.send_keys("Wireless Headphones")
+        second_search_bar.send_keys(onboarding.SEARCH_QUERY)
         self.driver.press_keycode(66, 0, 0)
         print("Search completed without signing in")
         
@@ -446,6 +385,15 @@ class TestAppium(unittest.TestCase):
             self.driver.swipe(width // 2, height * 2 // 3, width // 2, height // 3, 400)  # Smaller, gentler scroll
             #time.sleep(1)
             
+            if PAGE_SOURCE_MODE:
+                # One page_source dump replaces the price lookup, parent climbing and panel reads
+                info = self.select_product_from_page_source()
+                if info:
+                    self.driver.tap([info["center"]], 100)
+                    self.extract_product_details()
+                    self.driver.back()
+                    return
+            
             # Find products by looking for price elements (reliable indicator of products)
             price_elements = self.driver.find_elements(AppiumBy.XPATH, 
                 '//android.widget.TextView[contains(@text, "₹")]')
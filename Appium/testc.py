@@ -1,9 +1,19 @@
+import os
+import sys
 import time
 import unittest
-from appium import webdriver
-from appium.options.android import UiAutomator2Options
 from appium.webdriver.common.appiumby import AppiumBy
 
+import locator_registry
+import onboarding
+import page_source
+import session_manager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from harness.locator_race import race_appium
+from harness.timing import Timer, driver_context
+from harness.waits import AdaptiveWait
+
 capabilities = dict(
     platformName='Android',
     automationName='uiautomator2',
@@ -19,14 +29,25 @@ capabilities = dict(
 
 appium_server_url = 'http://localhost:4723'
 
+# Set APPIUM_PAGE_SOURCE_MODE=1 to read product panels and pages from a single page_source dump
+PAGE_SOURCE_MODE = os.environ.get("APPIUM_PAGE_SOURCE_MODE", "0") == "1"
+# Set APPIUM_SERVER_SIDE_WAIT=1 to let the server poll (implicit wait) instead of the client
+SERVER_SIDE_WAIT = os.environ.get("APPIUM_SERVER_SIDE_WAIT", "0") == "1"
+
 class TestAppium(unittest.TestCase):
     def setUp(self):
-        self.driver = webdriver.Remote(appium_server_url, options=UiAutomator2Options().load_capabilities(capabilities))
+        self.driver = session_manager.acquire(appium_server_url, capabilities)
+        self.locators = locator_registry.default()
         print("Session ID:", self.driver.session_id)
+        self.waits = AdaptiveWait(self.driver, server_side=SERVER_SIDE_WAIT)
+        self.timer = Timer(self.id(), context=driver_context(self.driver))
 
     def tearDown(self):
-        # if self.driver:
-        #     self.driver.quit()
+        session_manager.release(appium_server_url, capabilities, self.driver)
+        self.locators.save()
+        self.locators.report()
+        self.timer.report()
+        self.waits.report()
         print("Test completed")
 
     # Utility methods and setup
@@ -34,91 +55,21 @@ class TestAppium(unittest.TestCase):
         """Open the app, select English language, and skip sign in"""
         # Wait for initial screen to load
         time.sleep(3)
-        
-        # Handle language selection first
-        try:
-            # Try using accessibility ID first (most reliable)
-            self.identify_element("English language selection button")
-            english_option = self.driver.find_element(AppiumBy.ACCESSIBILITY_ID, "Select English")
-            english_option.click()
-            print("Selected English using Accessibility ID")
-        except:
-            try:
-                # Try XPath if accessibility ID doesn't work
-                english_option = self.driver.find_element(AppiumBy.XPATH, 
-                    '//android.widget.ImageView[@content-desc="Select English"]')
-                english_option.click()
-                print("Selected English using XPath")
-            except:
-                try:
-                    # Try UiAutomator as last resort
-                    english_option = self.driver.find_element(AppiumBy.ANDROID_UIAUTOMATOR, 
-                        'new UiSelector().description("Select English")')
-                    english_option.click()
-                    print("Selected English using UiAutomator")
-                except:
-                    try:
-                        # Fall back to our original method
-                        english_option = self.driver.find_element(AppiumBy.XPATH, 
-                            '//android.widget.RadioButton[contains(@text, "English")]')
-                        english_option.click()
-                        print("Selected English using text content")
-                    except:
-                        print("Could not select English language, may already be selected")
-        
-        # Try to find and click the continue button
-        try:
-            language_continue = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/continue_button')
-            language_continue.click()
+        if onboarding.skip_if_onboarded(self.driver):
+            return True
+        onboarding.select_english(self.driver, self.locators)
+        if onboarding.continue_after_language(self.driver):
             time.sleep(2)
-            print("Clicked continue after selecting language")
-        except:
-            print("Could not find continue button after language selection")
-        
-        # Skip sign in
-        try:
-            # Look for skip sign-in button instead of continue button
-            skip_button = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/skip_sign_in_button')
-            skip_button.click()
-        except:
-            try:
-                # Try by text if ID doesn't work
-                skip_button = self.driver.find_element(AppiumBy.XPATH, '//android.widget.Button[contains(@text, "Skip sign in")]')
-                skip_button.click()
-            except:
-                try:
-                    # Look for "Sign in" button's sibling element that allows skipping
-                    skip_link = self.driver.find_element(AppiumBy.XPATH, '//android.widget.TextView[contains(@text, "Skip")]')
-                    skip_link.click()
-                except:
-                    print("Could not find skip option, trying to continue as guest...")
-                    # If we can't find a skip button, we may need to click continue first
-                    continue_button = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/sso_continue')
-                    continue_button.click()
-                    # Then look for skip options on the next screen
-                    time.sleep(2)
-                    try:
-                        skip_button = self.driver.find_element(AppiumBy.XPATH, 
-                            '//android.widget.Button[contains(@text, "Continue as guest") or contains(@text, "Skip")]')
-                        skip_button.click()
-                    except:
-                        print("Continuing without explicit skip")
-        
+        onboarding.skip_sign_in(self.driver, self.locators, pause=2)
+
         # Wait for home page to load after skipping sign-in
         time.sleep(3)
         print("App successfully opened with English language and sign-in skipped")
-        
-        # Verify we're on the home page
-        try:
-            search_hint = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/chrome_search_hint_view')
-            print("Successfully verified we're on the home page")
-            return True
-        except:
-            print("Could not verify home page")
-            return False
+        home_page_loaded = onboarding.on_home_page(self.driver)
+        if home_page_loaded:
+            onboarding.save_onboarded_state(self.driver)
+        return home_page_loaded
 
-   
-    
     def print_page_source(self):
         """Print a segment of the current page source for debugging"""
         page_source = self.driver.page_source
@@ -130,6 +81,10 @@ class TestAppium(unittest.TestCase):
 
     def extract_product_details(self):
         """Extract product details from the current product page using specific selectors"""
+        if PAGE_SOURCE_MODE:
+            page_source.print_product_details(page_source.PageSnapshot(self.driver.page_source).product_details())
+            return
+        
         try:
             print("\n----- PRODUCT DETAILS -----")
             
@@ -222,6 +177,17 @@ class TestAppium(unittest.TestCase):
             # Always print this to maintain consistent output format
             print("Product details extraction completed")
 
+    def select_product_from_page_source(self):
+        """Pick a product panel from one page_source dump instead of per-element lookups"""
+        snapshot = page_source.PageSnapshot(self.driver.page_source)
+        panel = snapshot.find_product_panel()
+        if panel is None:
+            print("No product panels found in page source")
+            return None
+        info = snapshot.panel_info(panel)
+        page_source.print_panel_info(info)
+        return info
+
     def extract_product_info_from_panel(self, container):
         """Extract product name and price from a product panel in search results"""
         product_info = {"name": None, "price": None}
@@ -325,8 +291,7 @@ class TestAppium(unittest.TestCase):
         print("\nMeasuring Add to Cart time...")
         add_to_cart_found = False
         # Start timing for add to cart operation
-        add_cart_start_time = time.time()
-        add_cart_end_time = 0
+        add_cart_span = self.timer.start("add_to_cart_search_results")
         # STRATEGY 1: Direct use of resource-id from the provided button data
         # try:
         #     add_to_cart = container.find_element(AppiumBy.ID, 'a-autoid-21-announce')
@@ -355,7 +320,7 @@ class TestAppium(unittest.TestCase):
                     try:
                         if button.text and "add to cart" in button.text.lower():
                             # Start timing AFTER we find the button but BEFORE clicking
-                            add_cart_start_time = time.time()
+                            add_cart_span = self.timer.start("add_to_cart_search_results")
                             button.click()
                             add_to_cart_found = True
                             break
@@ -381,7 +346,6 @@ class TestAppium(unittest.TestCase):
                                 if button.text and "add to cart" in button.text.lower():
                                     button.click()
                                     add_to_cart_found = True
-                                    add_cart_end_time = time.time()
                                     break
                         except:
                             continue
@@ -393,21 +357,14 @@ class TestAppium(unittest.TestCase):
         # Check for confirmation without sleeping
         success = False
         if add_to_cart_found:
-            try:
-                # Wait for cart count to change or confirmation message to appear
-                for _ in range(10):  # Try for up to 10 cycles (equivalent to ~2 seconds)
-                    if self.check_if_added_to_cart():
-                        success = True
-                        break
-                    # Very short sleep to prevent CPU overload
-                    time.sleep(0.2)
-            except Exception:
-                pass
+            # Wait up to 2 seconds for the cart count to change or a confirmation message to appear
+            confirmation = self.waits.until_any(
+                {"cart confirmation": lambda driver: self.check_if_added_to_cart()[0]},
+                timeout=2, label="Add to cart confirmation")
+            success = bool(confirmation)
         
-        # Calculate time taken for add to cart operation
-        add_cart_end_time = time.time()  # Make sure we have a valid end time
-        add_cart_time = add_cart_end_time - add_cart_start_time
-        print(f"Add to Cart Time: {add_cart_time:.2f} seconds")
+        # Stop timing the add to cart operation
+        add_cart_span.stop(found=add_to_cart_found, confirmed=success)
         if success or add_to_cart_found:
             print("Product added to cart successfully")
         return success or add_to_cart_found
@@ -422,52 +379,35 @@ class TestAppium(unittest.TestCase):
         self.driver.swipe(width // 2, height * 3 // 4, width // 2, height // 4, 600)
         success = False
         add_to_cart_found = False
-        add_cart_start_time = 0
-        add_cart_end_time = 0
-        
-        # STRATEGY 1: Direct use of resource-id from the provided button data
-        try:
-            add_to_cart = self.driver.find_element(AppiumBy.ID, 'add-to-cart-button')
-            # Start timing RIGHT BEFORE clicking
-            add_cart_start_time = time.time()
-            add_to_cart.click()
-            add_to_cart_found = True
-            print("Added to cart using resource-id")
-        except Exception:
-            pass
+        add_cart_span = None
         
-        # STRATEGY 2: Finding button by text attribute (from provided data)
-        if not add_to_cart_found:
+        # Both strategies are sent as concurrent requests; the resource-id wins when both match
+        found = race_appium(self.driver, [
+            (AppiumBy.ID, 'add-to-cart-button'),
+            (AppiumBy.XPATH, '//android.widget.Button[@text="Add to cart"]'),
+        ])
+        if found:
             try:
-                add_to_cart = self.driver.find_element(AppiumBy.XPATH, 
-                    '//android.widget.Button[@text="Add to cart"]')
                 # Start timing RIGHT BEFORE clicking
-                add_cart_start_time = time.time()
-                add_to_cart.click()
+                add_cart_span = self.timer.start("add_to_cart_product_page")
+                found.element.click()
                 add_to_cart_found = True
-                print("Added to cart using XPath with text")
+                print(f"Added to cart using {found.locator[0]}")
             except Exception:
                 pass
         
         # Check for confirmation without sleeping
         success = False
         if add_to_cart_found:
-            try:
-                # Wait for cart count to change or confirmation message to appear
-                for _ in range(20):  # Try for up to 4 seconds (20 * 0.2)
-                    success, end_time = self.check_if_added_to_cart()
-                    if success:
-                        add_cart_end_time = end_time
-                        break
-                    # Very short sleep to prevent CPU overload
-                    time.sleep(0.2)
-            except Exception:
-                pass
+            # Wait up to 4 seconds for the cart count to change or a confirmation message to appear
+            confirmation = self.waits.until_any(
+                {"cart confirmation": lambda driver: self.check_if_added_to_cart()[0]},
+                timeout=4, label="Add to cart confirmation (product page)")
+            success = bool(confirmation)
         
-        # Calculate time taken for add to cart operation
-        add_cart_end_time = time.time()  # Make sure we have a valid end time
-        add_cart_time = add_cart_end_time - add_cart_start_time
-        print(f"Add to Cart Time from product page: {add_cart_time:.2f} seconds")
+        # Stop timing the add to cart operation
+        if add_cart_span:
+            add_cart_span.stop(confirmed=success)
         if success or add_to_cart_found:
             print("Product added to cart successfully")
         return success or add_to_cart_found
@@ -485,33 +425,18 @@ class TestAppium(unittest.TestCase):
         search_bar = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/chrome_search_hint_view')
         search_bar.click()
         second_search_bar = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/rs_search_src_text')
-        second_search_bar.send_keys("Wireless Headphones")
+        second_search_bar.send_keys(onboarding.SEARCH_QUERY)
         # Start timing AFTER we've entered the search term and RIGHT BEFORE pressing Enter
-        search_start_time = time.time()
+        search_span = self.timer.start("search")
         self.driver.press_keycode(66, 0, 0)  # Press Enter
-        search_end_time = time.time()
-        # Wait for search results to appear without using sleep
-        search_complete = False
-        for _ in range(30):  # Increased timeout to 6 seconds max (30 * 0.2)
-            try:
-                results_element = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/rs_results_count')
-                search_complete = True
-                break
-            except:
-                try:
-                    # Alternative: check if any product elements are present
-                    self.driver.find_element(AppiumBy.XPATH, '//android.widget.TextView[contains(@text, "₹")]')
-                    search_complete = True
-                    break
-                except:
-                    pass
-            time.sleep(0.2)  # Short polling interval
-        # Calculate search time - only if we detected search completion
-        if search_complete:
-            search_end_time = time.time()
-            search_time = search_end_time - search_start_time
-            print(f"Search Time: {search_time:.2f} seconds")
-        else:
+        # Wait for search results to appear: results count or any product price, whichever comes first
+        search_wait = self.waits.until_any_element({
+            "results count": (AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/rs_results_count'),
+            "rupee price": (AppiumBy.XPATH, '//android.widget.TextView[contains(@text, "₹")]'),
+        }, timeout=6, label="Search results")
+        search_complete = bool(search_wait)
+        search_span.stop(complete=search_complete, detected_by=search_wait.name, polls=search_wait.polls)
+        if not search_complete:
             print("Could not accurately measure search time - results detection failed")
         
         # Measure filter time
@@ -536,7 +461,7 @@ class TestAppium(unittest.TestCase):
         filter_clicked = False
         if filter_element:
             # Start timing RIGHT BEFORE clicking the filter button
-            filter_start_time = time.time()
+            filter_span = self.timer.start("filter")
             filter_element.click()
             filter_clicked = True
         else:
@@ -544,7 +469,7 @@ class TestAppium(unittest.TestCase):
             try:
                 center_x = (299 + 619) // 2
                 center_y = (371 + 455) // 2
-                filter_start_time = time.time()
+                filter_span = self.timer.start("filter")
                 self.driver.tap([(center_x, center_y)], 100)
                 filter_clicked = True
             except Exception as e:
@@ -553,28 +478,14 @@ class TestAppium(unittest.TestCase):
         # Wait for filtered results to load without blocking sleep
         filter_complete = False
         if filter_clicked:
-            for _ in range(30):  # Increased timeout to 6 seconds max
-                try:
-                    # Check if results count has updated
-                    filtered_results = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/rs_results_count')
-                    filter_complete = True
-                    break
-                except:
-                    try:
-                        # Alternative: check for filter chips or updated product listings
-                        self.driver.find_element(AppiumBy.XPATH, 
-                            '//android.view.View[contains(@content-desc, "4 Stars")]')
-                        filter_complete = True
-                        break
-                    except:
-                        pass
-                time.sleep(0.2)  # Short polling interval
-            # Calculate filter time - only if we detected filter completion
-            if filter_complete:
-                filter_end_time = time.time()
-                filter_time = filter_end_time - filter_start_time
-                print(f"Filter Time: {filter_time:.2f} seconds")
-            else:
+            # Results count or the active filter chip, whichever comes first
+            filter_wait = self.waits.until_any_element({
+                "results count": (AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/rs_results_count'),
+                "filter chip": (AppiumBy.XPATH, '//android.view.View[contains(@content-desc, "4 Stars")]'),
+            }, timeout=6, label="Filtered results")
+            filter_complete = bool(filter_wait)
+            filter_span.stop(complete=filter_complete, detected_by=filter_wait.name, polls=filter_wait.polls)
+            if not filter_complete:
                 print("Could not accurately measure filter time - results detection failed")
         
         # Now extract details of one of the first products
@@ -587,6 +498,23 @@ class TestAppium(unittest.TestCase):
             height = screen_size['height']
             self.driver.swipe(width // 2, height * 2 // 3, width // 2, height // 3, 400)
             
+            if PAGE_SOURCE_MODE:
+                # One page_source dump replaces the price lookup, parent climbing and panel reads
+                info = self.select_product_from_page_source()
+                if info:
+                    # The add to cart strategies still need a live element for the panel
+                    container = self.driver.find_element(AppiumBy.XPATH, info["xpath"])
+                    added_to_cart = self.add_to_cart_from_search_results(container)
+                    self.driver.tap([info["center"]], 100)
+                    self.waits.until_any_element(
+                        {"product title": (AppiumBy.XPATH, '//android.view.View[string-length(@text) > 40]')},
+                        timeout=2, label="Product page")
+                    self.extract_product_details()
+                    if not added_to_cart:
+                        self.add_to_cart_from_product_page()
+                    self.driver.back()
+                    return
+            
             # Find products by looking for price elements (reliable indicator of products)
             price_elements = self.driver.find_elements(AppiumBy.XPATH, 
                 '//android.widget.TextView[contains(@text, "₹")]')
@@ -613,15 +541,9 @@ class TestAppium(unittest.TestCase):
                 # Click on product container to view details
                 container.click()
                 # Wait for product details to load without using sleep
-                for _ in range(10):
-                    try:
-                        # Check for elements that indicate product details page is loaded
-                        self.driver.find_element(AppiumBy.XPATH, 
-                            '//android.view.View[string-length(@text) > 40]')
-                        break
-                    except:
-                        pass
-                    time.sleep(0.2)
+                self.waits.until_any_element(
+                    {"product title": (AppiumBy.XPATH, '//android.view.View[string-length(@text) > 40]')},
+                    timeout=2, label="Product page")
                 
                 # Extract product details
                 self.extract_product_details()
@@ -641,14 +563,9 @@ class TestAppium(unittest.TestCase):
                 self.extract_product_info_from_panel(target_price_element)
                 added_to_cart = self.add_to_cart_from_search_results(target_price_element)
                 target_price_element.click()
-                for _ in range(10):
-                    try:
-                        self.driver.find_element(AppiumBy.XPATH, 
-                            '//android.view.View[string-length(@text) > 40]')
-                        break
-                    except:
-                        pass
-                    time.sleep(0.2)
+                self.waits.until_any_element(
+                    {"product title": (AppiumBy.XPATH, '//android.view.View[string-length(@text) > 40]')},
+                    timeout=2, label="Product page")
                 self.extract_product_details()
                 if not added_to_cart:
                     self.add_to_cart_from_product_page()
@@ -1,8 +1,13 @@
-import time
+import os
+import sys
 import unittest
-from appium import webdriver
-from appium.options.android import UiAutomator2Options
-from appium.webdriver.common.appiumby import AppiumBy
+
+import locator_registry
+import onboarding
+import session_manager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from harness.timing import Timer, driver_context
 
 capabilities = dict(
     platformName='Android',
@@ -21,11 +26,14 @@ appium_server_url = 'http://localhost:4723'
 
 class TestAppium(unittest.TestCase):
     def setUp(self):
-        self.driver = webdriver.Remote(appium_server_url, options=UiAutomator2Options().load_capabilities(capabilities))
+        self.driver = session_manager.acquire(appium_server_url, capabilities)
+        self.locators = locator_registry.default()
+        self.timer = Timer(self.id(), context=driver_context(self.driver))
 
     def tearDown(self):
-        # if self.driver:
-        #     self.driver.quit()
+        session_manager.release(appium_server_url, capabilities, self.driver)
+        self.locators.save()
+        self.locators.report()
         print("tear down")
 
     # Add to the top of your file to help with element identification
@@ -45,90 +53,7 @@ class TestAppium(unittest.TestCase):
     # Rename from test_open to open_app so it won't run as a separate test
     def open_app(self):
         """Open the app, select English language, and skip sign in"""
-        # Wait for initial screen to load
-        #time.sleep(3)
-        
-        # Handle language selection first
-        try:
-            # Try using accessibility ID first (most reliable)
-            self.identify_element("English language selection button")
-            english_option = self.driver.find_element(AppiumBy.ACCESSIBILITY_ID, "Select English")
-            english_option.click()
-            print("Selected English using Accessibility ID")
-        except:
-            try:
-                # Try XPath if accessibility ID doesn't work
-                english_option = self.driver.find_element(AppiumBy.XPATH, 
-                    '//android.widget.ImageView[@content-desc="Select English"]')
-                english_option.click()
-                print("Selected English using XPath")
-            except:
-                try:
-                    # Try UiAutomator as last resort
-                    english_option = self.driver.find_element(AppiumBy.ANDROID_UIAUTOMATOR, 
-                        'new UiSelector().description("Select English")')
-                    english_option.click()
-                    print("Selected English using UiAutomator")
-                except:
-                    try:
-                        # Fall back to our original method
-                        english_option = self.driver.find_element(AppiumBy.XPATH, 
-                            '//android.widget.RadioButton[contains(@text, "English")]')
-                        english_option.click()
-                        print("Selected English using text content")
-                    except:
-                        print("Could not select English language, may already be selected")
-        
-        # Try to find and click the continue button
-        try:
-            language_continue = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/continue_button')
-            language_continue.click()
-            #time.sleep(2)
-            print("Clicked continue after selecting language")
-        except:
-            print("Could not find continue button after language selection")
-        
-        # Skip sign in
-        try:
-            # Look for skip sign-in button instead of continue button
-            skip_button = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/skip_sign_in_button')
-            skip_button.click()
-        except:
-            try:
-                # Try by text if ID doesn't work
-                skip_button = self.driver.find_element(AppiumBy.XPATH, '//android.widget.Button[contains(@text, "Skip sign in")]')
-                skip_button.click()
-            except:
-                try:
-                    # Look for "Sign in" button's sibling element that allows skipping
-                    skip_link = self.driver.find_element(AppiumBy.XPATH, '//android.widget.TextView[contains(@text, "Skip")]')
-                    skip_link.click()
-                except:
-                    print("Could not find skip option, trying to continue as guest...")
-                    # If we can't find a skip button, we may need to click continue first
-                    continue_button = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/sso_continue')
-                    continue_button.click()
-                    # Then look for skip options on the next screen
-                    #time.sleep(2)
-                    try:
-                        skip_button = self.driver.find_element(AppiumBy.XPATH, 
-                            '//android.widget.Button[contains(@text, "Continue as guest") or contains(@text, "Skip")]')
-                        skip_button.click()
-                    except:
-                        print("Continuing without explicit skip")
-        
-        # Wait for home page to load after skipping sign-in
-        #time.sleep(3)
-        print("App successfully opened with English language and sign-in skipped")
-        
-        # Verify we're on the home page
-        try:
-            search_hint = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/chrome_search_hint_view')
-            print("Successfully verified we're on the home page")
-            return True
-        except:
-            print("Could not verify home page")
-            return False
+        return onboarding.open_app(self.driver, self.locators)
     '''
     def test_search(self):
         """Search for wireless headphones after opening the app"""
@@ -140,7 +65,7 @@ class TestAppium(unittest.TestCase):
         search_bar = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/chrome_search_hint_view')
         search_bar.click()
         second_search_bar = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/rs_search_src_text')
-        second_search_bar.send_keys("Wireless Headphones")
+        second_search_bar.send_keys(onboarding.SEARCH_QUERY)
         self.driver.press_keycode(66, 0, 0)
         print("Search completed without signing in")
         
@@ -158,119 +83,44 @@ class TestAppium(unittest.TestCase):
     def test_app_loading_time(self):
         """Measure the time taken to open app, select language, and skip sign in"""
         # Phase 1: App startup time
-        start_time = time.time()
+        total_span = self.timer.start("app_loading")
         print("Starting app loading measurement...")
         
+        phase1_span = self.timer.start("phase1_app_startup", parent=total_span)
         #time.sleep(3)  # Wait for initial screen
-        phase1_end_time = time.time()
-        phase1_duration = phase1_end_time - start_time
-        print(f"Phase 1 - App startup time: {phase1_duration:.2f} seconds")
+        phase1_span.stop()
         
         # Phase 2: Language selection and sign-in skipping process
-        phase2_start_time = time.time()
-        
-        # Handle language selection first
-        try:
-            # Try using accessibility ID first (most reliable)
-            self.identify_element("English language selection button")
-            english_option = self.driver.find_element(AppiumBy.ACCESSIBILITY_ID, "Select English")
-            english_option.click()
-            print("Selected English using Accessibility ID")
-        except:
-            try:
-                # Try XPath if accessibility ID doesn't work
-                english_option = self.driver.find_element(AppiumBy.XPATH, 
-                    '//android.widget.ImageView[@content-desc="Select English"]')
-                english_option.click()
-                print("Selected English using XPath")
-            except:
-                try:
-                    # Try UiAutomator as last resort
-                    english_option = self.driver.find_element(AppiumBy.ANDROID_UIAUTOMATOR, 
-                        'new UiSelector().description("Select English")')
-                    english_option.click()
-                    print("Selected English using UiAutomator")
-                except:
-                    try:
-                        # Fall back to our original method
-                        english_option = self.driver.find_element(AppiumBy.XPATH, 
-                            '//android.widget.RadioButton[contains(@text, "English")]')
-                        english_option.click()
-                        print("Selected English using text content")
-                    except:
-                        print("Could not select English language, may already be selected")
-        
-        # Try to find and click the continue button
-        try:
-            language_continue = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/continue_button')
-            language_continue.click()
-            #time.sleep(2)
-            print("Clicked continue after selecting language")
-        except:
-            print("Could not find continue button after language selection")
-        
-        # Skip sign in instead of signing in
-        try:
-            # Look for skip sign-in button
-            skip_button = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/skip_sign_in_button')
-            skip_button.click()
-            print("Skipped sign-in using skip button")
-        except:
-            try:
-                # Try by text if ID doesn't work
-                skip_button = self.driver.find_element(AppiumBy.XPATH, '//android.widget.Button[contains(@text, "Skip sign in")]')
-                skip_button.click()
-                print("Skipped sign-in using text button")
-            except:
-                try:
-                    # Look for "Sign in" button's sibling element that allows skipping
-                    skip_link = self.driver.find_element(AppiumBy.XPATH, '//android.widget.TextView[contains(@text, "Skip")]')
-                    skip_link.click()
-                    print("Skipped sign-in using Skip text link")
-                except:
-                    print("Could not find skip option, trying to continue as guest...")
-                    # If we can't find a skip button, we may need to click continue first
-                    continue_button = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/sso_continue')
-                    continue_button.click()
-                    # Then look for skip options on the next screen
-                    #time.sleep(2)
-                    try:
-                        skip_button = self.driver.find_element(AppiumBy.XPATH, 
-                            '//android.widget.Button[contains(@text, "Continue as guest") or contains(@text, "Skip")]')
-                        skip_button.click()
-                        print("Continued as guest after clicking continue")
-                    except:
-                        print("Continuing without explicit skip")
-        
-        phase2_end_time = time.time()
-        phase2_duration = phase2_end_time - phase2_start_time
-        print(f"Phase 2 - Language selection and sign-in skipping process: {phase2_duration:.2f} seconds")
+        # (skipped when the session restored the onboarding snapshot; MEASURE_ONBOARDING=1 forces it)
+        # The check waits for the start screen, so it is a phase of its own
+        check_span = self.timer.start("phase2_onboarding_check", parent=total_span)
+        onboarded = onboarding.skip_if_onboarded(self.driver)
+        check_span.stop(onboarded=onboarded)
+        if not onboarded:
+            phase2_span = self.timer.start("phase2_language_and_sign_in", parent=total_span)
+            
+            onboarding.select_english(self.driver, self.locators)
+            onboarding.continue_after_language(self.driver)
+            onboarding.skip_sign_in(self.driver, self.locators)
+            
+            phase2_span.stop()
         
         # Phase 3: Home page loading
-        phase3_start_time = time.time()
+        phase3_span = self.timer.start("phase3_home_page_loading", parent=total_span)
         
         # Wait for home page to load
         #time.sleep(5)
         
         # Verify we're on the home page
-        try:
-            search_hint = self.driver.find_element(AppiumBy.ID, 'in.amazon.mShop.android.shopping:id/chrome_search_hint_view')
-            print("Successfully verified we're on the home page")
-            home_page_loaded = True
-        except:
-            print("Could not verify home page loading")
-            home_page_loaded = False
+        home_page_loaded = onboarding.on_home_page(self.driver)
             
-        phase3_end_time = time.time()
-        phase3_duration = phase3_end_time - phase3_start_time
-        print(f"Phase 3 - Home page loading time: {phase3_duration:.2f} seconds")
+        phase3_span.stop(home_page_loaded=home_page_loaded)
+        total_span.stop(snapshot=onboarded)
+        if home_page_loaded and not onboarded:
+            onboarding.save_onboarded_state(self.driver)
         
-        # Calculate and display total time
-        total_duration = phase3_end_time - start_time
-        print(f"Total app loading time: {total_duration:.2f} seconds")
-        print(f"  - Phase 1 (App startup): {phase1_duration:.2f} seconds ({(phase1_duration/total_duration*100):.1f}%)")
-        print(f"  - Phase 2 (Language & sign-in): {phase2_duration:.2f} seconds ({(phase2_duration/total_duration*100):.1f}%)")
-        print(f"  - Phase 3 (Home page loading): {phase3_duration:.2f} seconds ({(phase3_duration/total_duration*100):.1f}%)")
+        # Display the phase breakdown with each phase's share of the total
+        self.timer.report()
         
         return home_page_loaded
 
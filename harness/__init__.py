@@ -0,0 +1 @@
+"""Helpers shared by the Selenium and Appium suites (waits, timing, results)."""
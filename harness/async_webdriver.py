@@ -0,0 +1,629 @@
+"""
+Thin asyncio W3C WebDriver client.
+
+The Selenium and Appium clients block a thread on every HTTP round trip, so
+driving 50 sessions takes 50 threads. AsyncWebDriver speaks the W3C
+protocol from one event loop instead, over keep-alive HTTP/1.1 connections
+pooled per server (HttpPool, stdlib asyncio streams only). It covers the
+commands the tests use: navigation, find, click, send_keys, execute_script,
+page_source, windows, cookies, CDP and logs for chromedriver, and swipe,
+tap and press_keycode for Appium. Errors raise the same selenium exceptions
+as the synchronous client.
+
+    async def search(server_url, capabilities):
+        driver = await AsyncWebDriver.create(server_url, capabilities)
+        try:
+            await driver.get("https://www.amazon.in")
+            box = await driver.find_element("id", "twotabsearchtextbox")
+            await box.send_keys("wireless headphones\\ue007")
+        finally:
+            await driver.quit()
+
+    await asyncio.gather(*(search(url, caps) for _ in range(50)))
+
+SyncWebDriver adapts a session to the synchronous WebDriver interface
+(WebDriverWait, expected_conditions, AdaptiveWait and locator_race work on
+it), running every command on one shared event-loop thread. With
+WEBDRIVER_CLIENT=async, browser.create_chrome_driver() and the Appium
+session_manager hand those out, so addToCart.py and testc.py run unchanged.
+
+    python -m harness.async_webdriver http://127.0.0.1:4723 --sessions 20 --commands 50 \\
+        --capabilities '{"platformName": "Android", "appium:automationName": "UiAutomator2"}'
+"""
+import argparse
+import asyncio
+import base64
+import json
+import socket
+import threading
+import time
+import weakref
+from collections import deque
+from urllib.parse import quote, urlsplit
+
+from selenium.webdriver.remote.errorhandler import ErrorHandler
+
+from harness.locator_race import ELEMENT_KEY, is_native
+from harness.waits import to_css
+
+# Reference key of pre-W3C servers (old Appium drivers)
+LEGACY_ELEMENT_KEY = "ELEMENT"
+USER_AGENT = "amazon-automated async-webdriver"
+# Seconds a command may take, like the Selenium client's default
+COMMAND_TIMEOUT = 120
+
+
+class HttpPool:
+    """Keep-alive HTTP/1.1 connections to one WebDriver server, shared by all its sessions"""
+
+    def __init__(self, host, port, size=32, timeout=COMMAND_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.idle = deque()
+        self.semaphore = asyncio.Semaphore(size)
+        self.opened = 0
+        self.requests = 0
+
+    async def _connection(self):
+        """An idle connection (reused=True) or a new one"""
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.opened += 1
+        return reader, writer, False
+
+    async def _read_response(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before the response")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            data = b"".join(chunks)
+        else:
+            data = await reader.read()
+            headers["connection"] = "close"
+        return status, headers, data
+
+    async def _exchange(self, reader, writer, request):
+        writer.write(request)
+        await writer.drain()
+        return await self._read_response(reader)
+
+    async def request(self, method, path, payload=None):
+        """Send one request and return (status, body bytes)"""
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Accept: application/json\r\nContent-Type: application/json;charset=UTF-8\r\n"
+                f"User-Agent: {USER_AGENT}\r\nConnection: keep-alive\r\nContent-Length: {len(body)}\r\n\r\n")
+        request = head.encode("latin-1") + body
+        async with self.semaphore:
+            self.requests += 1
+            while True:
+                reader, writer, reused = await self._connection()
+                try:
+                    status, headers, data = await asyncio.wait_for(
+                        self._exchange(reader, writer, request), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    # The server dropped an idle keep-alive connection: retry once on a fresh one
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    # Timed out, cancelled or unparseable: the connection is half-read, never reuse it
+                    writer.close()
+                    raise
+                if headers.get("connection", "").lower() == "close":
+                    writer.close()
+                else:
+                    self.idle.append((reader, writer))
+                return status, data
+
+    async def close(self):
+        """Close the idle connections and drop the pool, so get_pool() starts a new one"""
+        pools = _pools.get(asyncio.get_running_loop(), {})
+        if pools.get((self.host, self.port)) is self:
+            del pools[(self.host, self.port)]
+        while self.idle:
+            _, writer = self.idle.pop()
+            writer.close()
+
+
+# Event loop -> {(host, port): HttpPool}; a pool's semaphore and connections belong to one loop
+_pools = weakref.WeakKeyDictionary()
+
+
+def get_pool(server_url, size=32, timeout=COMMAND_TIMEOUT):
+    """The pool for a server on the running event loop"""
+    parts = urlsplit(server_url)
+    pools = _pools.setdefault(asyncio.get_running_loop(), {})
+    key = (parts.hostname, parts.port or 80)
+    if key not in pools:
+        pools[key] = HttpPool(parts.hostname, parts.port or 80, size, timeout)
+    return pools[key]
+
+
+class AsyncWebElement:
+
+    def __init__(self, driver, element_id):
+        self.driver = driver
+        self.id = element_id
+
+    def __eq__(self, other):
+        return isinstance(other, AsyncWebElement) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"<AsyncWebElement {self.id}>"
+
+    async def _command(self, method, path="", payload=None):
+        return await self.driver.execute(method, f"/element/{self.id}{path}", payload)
+
+    async def click(self):
+        await self._command("POST", "/click", {})
+
+    async def clear(self):
+        await self._command("POST", "/clear", {})
+
+    async def send_keys(self, *value):
+        text = "".join(str(part) for part in value)
+        await self._command("POST", "/value", {"text": text, "value": list(text)})
+
+    async def text(self):
+        return await self._command("GET", "/text")
+
+    async def tag_name(self):
+        return await self._command("GET", "/name")
+
+    async def rect(self):
+        return await self._command("GET", "/rect")
+
+    async def get_property(self, name):
+        return await self._command("GET", f"/property/{quote(name)}")
+
+    async def get_attribute(self, name):
+        """Like selenium's get_attribute: the DOM property if set, else the attribute"""
+        if not self.driver.native:
+            value = await self.get_property(name)
+            if isinstance(value, bool):
+                return "true" if value else None
+            if value is not None and not isinstance(value, (dict, list)):
+                return str(value)
+        return await self._command("GET", f"/attribute/{quote(name)}")
+
+    async def is_displayed(self):
+        return await self._command("GET", "/displayed")
+
+    async def is_enabled(self):
+        return await self._command("GET", "/enabled")
+
+    async def is_selected(self):
+        return await self._command("GET", "/selected")
+
+    async def find_element(self, by, value):
+        return await self.driver.execute("POST", f"/element/{self.id}/element", self.driver._locator(by, value))
+
+    async def find_elements(self, by, value):
+        return await self.driver.execute("POST", f"/element/{self.id}/elements", self.driver._locator(by, value))
+
+
+class AsyncWebDriver:
+
+    def __init__(self, server_url, session_id, capabilities, pool):
+        self.server_url = server_url.rstrip("/")
+        self.session_id = session_id
+        self.capabilities = capabilities
+        self.pool = pool
+        self.native = is_native(self)
+        self._prefix = urlsplit(self.server_url).path.rstrip("/")
+        self._errors = ErrorHandler()
+
+    @classmethod
+    async def create(cls, server_url, capabilities, pool_size=32, timeout=COMMAND_TIMEOUT):
+        """Start a new session with W3C capabilities (vendor ones prefixed, e.g. "appium:")"""
+        pool = get_pool(server_url, pool_size, timeout)
+        payload = {"capabilities": {"firstMatch": [{}], "alwaysMatch": capabilities}}
+        status, data = await pool.request("POST", urlsplit(server_url).path.rstrip("/") + "/session", payload)
+        value = cls._check(ErrorHandler(), status, data)
+        return cls(server_url, value["sessionId"], value.get("capabilities") or capabilities, pool)
+
+    @staticmethod
+    def _check(errors, status, data):
+        text = data.decode("utf-8", "replace")
+        if status >= 400:
+            # Same exception classes as the synchronous client
+            errors.check_response({"status": status, "value": text})
+        return json.loads(text).get("value") if text else None
+
+    def _wrap(self, value):
+        if isinstance(value, list):
+            return [self._wrap(item) for item in value]
+        if isinstance(value, dict):
+            element_id = value.get(ELEMENT_KEY) or (value.get(LEGACY_ELEMENT_KEY) if len(value) == 1 else None)
+            if element_id:
+                return AsyncWebElement(self, element_id)
+            return {key: self._wrap(item) for key, item in value.items()}
+        return value
+
+    def _unwrap(self, value):
+        if isinstance(value, AsyncWebElement):
+            return {ELEMENT_KEY: value.id}
+        if isinstance(value, (list, tuple)):
+            return [self._unwrap(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._unwrap(item) for key, item in value.items()}
+        return value
+
+    def _locator(self, by, value):
+        # Browsers only know CSS, XPath, link text and tag name; id, name and class name become CSS
+        if not self.native and by in ("id", "name", "class name"):
+            by, value = "css selector", to_css(by, value)
+        return {"using": by, "value": value}
+
+    async def execute(self, method, path, payload=None):
+        """Run a session command, e.g. execute("GET", "/url"), and return its value"""
+        status, data = await self.pool.request(method, f"{self._prefix}/session/{self.session_id}{path}", payload)
+        return self._wrap(self._check(self._errors, status, data))
+
+    # ----- Navigation -----
+
+    async def get(self, url):
+        await self.execute("POST", "/url", {"url": url})
+
+    async def current_url(self):
+        return await self.execute("GET", "/url")
+
+    async def title(self):
+        return await self.execute("GET", "/title")
+
+    async def page_source(self):
+        return await self.execute("GET", "/source")
+
+    async def back(self):
+        await self.execute("POST", "/back", {})
+
+    async def refresh(self):
+        await self.execute("POST", "/refresh", {})
+
+    # ----- Elements and scripts -----
+
+    async def find_element(self, by, value):
+        return await self.execute("POST", "/element", self._locator(by, value))
+
+    async def find_elements(self, by, value):
+        return await self.execute("POST", "/elements", self._locator(by, value))
+
+    async def execute_script(self, script, *args):
+        return await self.execute("POST", "/execute/sync", {"script": script, "args": self._unwrap(args)})
+
+    async def execute_async_script(self, script, *args):
+        return await self.execute("POST", "/execute/async", {"script": script, "args": self._unwrap(args)})
+
+    async def implicitly_wait(self, seconds):
+        await self.execute("POST", "/timeouts", {"implicit": int(seconds * 1000)})
+
+    async def set_page_load_timeout(self, seconds):
+        await self.execute("POST", "/timeouts", {"pageLoad": int(seconds * 1000)})
+
+    # ----- Windows, cookies, screenshots -----
+
+    async def window_handles(self):
+        return await self.execute("GET", "/window/handles")
+
+    async def current_window_handle(self):
+        return await self.execute("GET", "/window")
+
+    async def switch_to_window(self, handle):
+        await self.execute("POST", "/window", {"handle": handle})
+
+    async def new_window(self, type_hint="tab"):
+        return (await self.execute("POST", "/window/new", {"type": type_hint}))["handle"]
+
+    async def close(self):
+        return await self.execute("DELETE", "/window")
+
+    async def get_window_size(self):
+        rect = await self.execute("GET", "/window/rect")
+        return {"width": rect["width"], "height": rect["height"]}
+
+    async def get_cookies(self):
+        return await self.execute("GET", "/cookie")
+
+    async def delete_all_cookies(self):
+        await self.execute("DELETE", "/cookie")
+
+    async def get_screenshot_as_png(self):
+        return base64.b64decode(await self.execute("GET", "/screenshot"))
+
+    # ----- Chromedriver extensions -----
+
+    async def execute_cdp_cmd(self, cmd, cmd_args):
+        return await self.execute("POST", "/goog/cdp/execute", {"cmd": cmd, "params": cmd_args})
+
+    async def get_log(self, log_type):
+        return await self.execute("POST", "/se/log", {"type": log_type})
+
+    # ----- Appium gestures and keys -----
+
+    async def _pointer_actions(self, fingers):
+        await self.execute("POST", "/actions", {"actions": [
+            {"type": "pointer", "id": f"finger{i}", "parameters": {"pointerType": "touch"}, "actions": actions}
+            for i, actions in enumerate(fingers)]})
+
+    async def swipe(self, start_x, start_y, end_x, end_y, duration=0):
+        """Touch at the start point and move to the end point over `duration` milliseconds"""
+        await self._pointer_actions([[
+            {"type": "pointerMove", "duration": 0, "x": start_x, "y": start_y},
+            {"type": "pointerDown", "button": 0},
+            {"type": "pointerMove", "duration": duration or 250, "x": end_x, "y": end_y},
+            {"type": "pointerUp", "button": 0},
+        ]])
+
+    async def tap(self, positions, duration=None):
+        """Tap with one finger per (x, y) position, held for `duration` milliseconds"""
+        await self._pointer_actions([[
+            {"type": "pointerMove", "duration": 0, "x": x, "y": y},
+            {"type": "pointerDown", "button": 0},
+            {"type": "pause", "duration": duration or 100},
+            {"type": "pointerUp", "button": 0},
+        ] for x, y in positions])
+
+    async def press_keycode(self, keycode, metastate=None, flags=None):
+        payload = {"keycode": keycode}
+        if metastate is not None:
+            payload["metastate"] = metastate
+        if flags is not None:
+            payload["flags"] = flags
+        await self.execute("POST", "/appium/device/press_keycode", payload)
+
+    async def quit(self):
+        await self.execute("DELETE", "")
+
+
+# ----- Synchronous adapter -----
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def event_loop():
+    """The event loop every SyncWebDriver of this process runs its commands on"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-webdriver", daemon=True).start()
+        return _loop
+
+
+def run(coroutine):
+    """Run a coroutine on the shared loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coroutine, event_loop()).result()
+
+
+def _to_async(value):
+    if isinstance(value, SyncWebElement):
+        return value._element
+    if isinstance(value, (list, tuple)):
+        return [_to_async(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_async(item) for key, item in value.items()}
+    return value
+
+
+def _to_sync(driver, value):
+    if isinstance(value, AsyncWebElement):
+        return SyncWebElement(driver, value)
+    if isinstance(value, list):
+        return [_to_sync(driver, item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_sync(driver, item) for key, item in value.items()}
+    return value
+
+
+def _blocking(name):
+    """Synchronous method that runs the same-named coroutine of the wrapped async object"""
+    def method(self, *args):
+        return _to_sync(self._driver, run(getattr(self._target, name)(*_to_async(args))))
+    method.__name__ = name
+    return method
+
+
+class SyncWebElement:
+
+    def __init__(self, driver, element):
+        self._driver = driver
+        self._element = element
+        self._target = element
+
+    @property
+    def id(self):
+        return self._element.id
+
+    @property
+    def parent(self):
+        return self._driver
+
+    def __eq__(self, other):
+        return isinstance(other, SyncWebElement) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"<SyncWebElement {self.id}>"
+
+    click = _blocking("click")
+    clear = _blocking("clear")
+    send_keys = _blocking("send_keys")
+    get_attribute = _blocking("get_attribute")
+    get_property = _blocking("get_property")
+    is_displayed = _blocking("is_displayed")
+    is_enabled = _blocking("is_enabled")
+    is_selected = _blocking("is_selected")
+    find_element = _blocking("find_element")
+    find_elements = _blocking("find_elements")
+    text = property(_blocking("text"))
+    tag_name = property(_blocking("tag_name"))
+    rect = property(_blocking("rect"))
+
+    @property
+    def location(self):
+        rect = self.rect
+        return {"x": rect["x"], "y": rect["y"]}
+
+    @property
+    def size(self):
+        rect = self.rect
+        return {"width": rect["width"], "height": rect["height"]}
+
+
+class _SwitchTo:
+
+    def __init__(self, driver):
+        self._driver = driver
+
+    def window(self, handle):
+        run(self._driver.async_driver.switch_to_window(handle))
+
+    def new_window(self, type_hint="tab"):
+        self.window(run(self._driver.async_driver.new_window(type_hint)))
+
+
+class _CommandExecutor:
+    """What locator_race reads from driver.command_executor: the server address"""
+
+    def __init__(self, url):
+        self._url = url
+
+
+class SyncWebDriver:
+
+    def __init__(self, async_driver, service=None):
+        self.async_driver = async_driver
+        self._target = async_driver
+        self._driver = self
+        self.service = service
+        self.session_id = async_driver.session_id
+        self.capabilities = async_driver.capabilities
+        self.command_executor = _CommandExecutor(async_driver.server_url)
+        self.switch_to = _SwitchTo(self)
+
+    @classmethod
+    def create(cls, server_url, capabilities, service=None):
+        """New session on the shared loop; `service` (e.g. a chromedriver Service) is stopped on quit"""
+        async def create():
+            return await AsyncWebDriver.create(server_url, capabilities)
+        return cls(run(create()), service)
+
+    def __repr__(self):
+        return f"<SyncWebDriver {self.session_id} on {self.async_driver.server_url}>"
+
+    def create_web_element(self, element_id):
+        return SyncWebElement(self, AsyncWebElement(self.async_driver, element_id))
+
+    get = _blocking("get")
+    back = _blocking("back")
+    refresh = _blocking("refresh")
+    find_element = _blocking("find_element")
+    find_elements = _blocking("find_elements")
+    execute_script = _blocking("execute_script")
+    execute_async_script = _blocking("execute_async_script")
+    implicitly_wait = _blocking("implicitly_wait")
+    set_page_load_timeout = _blocking("set_page_load_timeout")
+    close = _blocking("close")
+    get_window_size = _blocking("get_window_size")
+    get_cookies = _blocking("get_cookies")
+    delete_all_cookies = _blocking("delete_all_cookies")
+    get_screenshot_as_png = _blocking("get_screenshot_as_png")
+    execute_cdp_cmd = _blocking("execute_cdp_cmd")
+    get_log = _blocking("get_log")
+    swipe = _blocking("swipe")
+    tap = _blocking("tap")
+    press_keycode = _blocking("press_keycode")
+    current_url = property(_blocking("current_url"))
+    title = property(_blocking("title"))
+    page_source = property(_blocking("page_source"))
+    window_handles = property(_blocking("window_handles"))
+    current_window_handle = property(_blocking("current_window_handle"))
+
+    def save_screenshot(self, filename):
+        with open(filename, "wb") as f:
+            f.write(self.get_screenshot_as_png())
+        return True
+
+    def quit(self):
+        try:
+            run(self.async_driver.quit())
+        finally:
+            if self.service is not None:
+                self.service.stop()
+
+
+# ----- Fan-out benchmark -----
+
+async def _fan_out(server_url, capabilities, sessions, commands):
+    async def one_session():
+        start_time = time.perf_counter()
+        driver = await AsyncWebDriver.create(server_url, capabilities)
+        created = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        try:
+            for _ in range(commands):
+                await driver.page_source()
+        finally:
+            await driver.quit()
+        return created, time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    timings = await asyncio.gather(*(one_session() for _ in range(sessions)))
+    elapsed = time.perf_counter() - start_time
+    pool = get_pool(server_url)
+    print(f"\n----- ASYNC WEBDRIVER ({sessions} sessions x {commands} commands, one thread) -----")
+    print(f"Total {elapsed:.2f} s, session create avg {sum(t[0] for t in timings) / sessions:.2f} s, "
+          f"commands avg {sum(t[1] for t in timings) / sessions:.2f} s per session")
+    print(f"{pool.requests} requests over {pool.opened} connection(s), "
+          f"{pool.requests / elapsed:.0f} requests/s")
+    print("-" * 40)
+    await pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("server_url", help="WebDriver server, e.g. http://127.0.0.1:4723 or a chromedriver URL")
+    parser.add_argument("--capabilities", default="{}", help="W3C capabilities as JSON")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--commands", type=int, default=20, help="page_source calls per session")
+    args = parser.parse_args()
+    asyncio.run(_fan_out(args.server_url, json.loads(args.capabilities), args.sessions, args.commands))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Repeated-run benchmarks with summary statistics.
+
+A single load-time run says little: network, cache and scheduler noise easily
+move it by a second. run_benchmark() calls a flow after a few discarded
+warmup runs, collects up to `runs` samples and stops early once the
+confidence interval of the mean is within `rel_ci` of the mean.
+
+    result = run_benchmark(lambda: load_homepage(driver), runs=30, warmup=2)
+    result.report()
+
+A flow may return its own measured duration in seconds (so setup inside
+the flow is not counted); if it returns None the whole call is timed.
+Outliers are flagged with Tukey's fences (1.5 x IQR) and reported, but kept
+in the statistics.
+"""
+import math
+import statistics
+import time
+
+
+def percentile(sorted_values, p):
+    """Linear-interpolated percentile (0-100) of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * p / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def _betacf(a, b, x):
+    """Continued fraction for the incomplete beta function (modified Lentz)"""
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 200):
+        m2 = 2 * m
+        for numerator in (m * (b - m) * x / ((a + m2 - 1) * (a + m2)),
+                          -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1.0) < 1e-12:
+            break
+    return h
+
+
+def _incomplete_beta(a, b, x):
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x))
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1 - x) / b
+
+
+def t_cdf(t, df):
+    """Student's t cumulative distribution function"""
+    tail = 0.5 * _incomplete_beta(df / 2, 0.5, df / (df + t * t))
+    return 1 - tail if t >= 0 else tail
+
+
+def t_critical(confidence, df):
+    """Two-sided critical value of Student's t, found by bisection on the CDF"""
+    target = 1 - (1 - confidence) / 2
+    low, high = 0.0, 1.0
+    while t_cdf(high, df) < target:
+        high *= 2
+    for _ in range(100):
+        middle = (low + high) / 2
+        if t_cdf(middle, df) < target:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def outliers(values):
+    """Values outside Tukey's fences (Q1 - 1.5 IQR, Q3 + 1.5 IQR)"""
+    if len(values) < 4:
+        return []
+    ordered = sorted(values)
+    q1, q3 = percentile(ordered, 25), percentile(ordered, 75)
+    iqr = q3 - q1
+    low, high = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    return [value for value in values if value < low or value > high]
+
+
+class BenchmarkResult:
+
+    def __init__(self, name, samples, warmup, confidence, stopped_early, failures):
+        self.name = name
+        self.samples = samples
+        self.warmup = warmup
+        self.confidence = confidence
+        self.stopped_early = stopped_early
+        self.failures = failures
+
+    @property
+    def n(self):
+        return len(self.samples)
+
+    @property
+    def mean(self):
+        return statistics.fmean(self.samples) if self.samples else None
+
+    @property
+    def stddev(self):
+        return statistics.stdev(self.samples) if self.n > 1 else 0.0
+
+    def percentile(self, p):
+        return percentile(sorted(self.samples), p)
+
+    @property
+    def ci_half_width(self):
+        if self.n < 2:
+            return math.inf
+        return t_critical(self.confidence, self.n - 1) * self.stddev / math.sqrt(self.n)
+
+    @property
+    def ci(self):
+        half_width = self.ci_half_width
+        return self.mean - half_width, self.mean + half_width
+
+    @property
+    def rel_ci(self):
+        """CI half-width as a fraction of the mean"""
+        return self.ci_half_width / self.mean if self.mean else math.inf
+
+    @property
+    def outliers(self):
+        return outliers(self.samples)
+
+    def summary(self):
+        """Plain dict of the statistics, e.g. for a results sink"""
+        if not self.samples:
+            return {"name": self.name, "n": 0, "failures": self.failures}
+        low, high = self.ci
+        return {
+            "name": self.name,
+            "n": self.n,
+            "warmup": self.warmup,
+            "failures": self.failures,
+            "mean": self.mean,
+            "stddev": self.stddev,
+            "min": min(self.samples),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": max(self.samples),
+            "confidence": self.confidence,
+            "ci_low": low,
+            "ci_high": high,
+            "rel_ci": self.rel_ci,
+            "outliers": len(self.outliers),
+            "stopped_early": self.stopped_early,
+        }
+
+    def report(self):
+        print(f"\n----- BENCHMARK {self.name} -----")
+        if not self.samples:
+            print(f"No successful runs ({self.failures} failed)")
+            print("-" * 21)
+            return
+        s = self.summary()
+        print(f"Runs: {s['n']} measured, {s['warmup']} warmup, {s['failures']} failed"
+              + (" (stopped early, CI tight enough)" if s["stopped_early"] else ""))
+        print(f"Mean: {s['mean']:.3f} s, stddev {s['stddev']:.3f} s")
+        print(f"{s['confidence'] * 100:.0f}% CI: {s['ci_low']:.3f} - {s['ci_high']:.3f} s (+/- {s['rel_ci'] * 100:.1f}%)")
+        print(f"Min {s['min']:.3f} / p50 {s['p50']:.3f} / p90 {s['p90']:.3f} / "
+              f"p99 {s['p99']:.3f} / max {s['max']:.3f} s")
+        if s["outliers"]:
+            print(f"Outliers (1.5 IQR): {', '.join(f'{value:.3f}' for value in self.outliers)}")
+        print("-" * 21)
+
+
+def run_benchmark(flow, runs=20, warmup=2, min_runs=5, rel_ci=0.05, confidence=0.95,
+                  name=None, setup=None, verbose=True):
+    """
+    Run `flow` `warmup` times unmeasured, then up to `runs` measured times.
+
+    Stops once at least `min_runs` samples exist and the CI half-width is
+    within `rel_ci` of the mean (pass rel_ci=0 to always do all runs).
+    `setup`, if given, is called before every run and not timed. A run that
+    raises is counted as a failure and not sampled.
+    """
+    name = name or getattr(flow, "__name__", "flow")
+    failures = 0
+
+    def measure():
+        if setup:
+            setup()
+        start_ns = time.perf_counter_ns()
+        measured = flow()
+        elapsed = (time.perf_counter_ns() - start_ns) / 1e9
+        return elapsed if measured is None else measured
+
+    for i in range(warmup):
+        try:
+            measure()
+        except Exception as e:
+            print(f"Warmup run {i + 1} failed: {e}")
+
+    samples = []
+    stopped_early = False
+    for i in range(runs):
+        try:
+            samples.append(measure())
+        except Exception as e:
+            failures += 1
+            print(f"Run {i + 1} failed: {e}")
+            continue
+
+        result = BenchmarkResult(name, samples, warmup, confidence, False, failures)
+        if verbose:
+            print(f"Run {i + 1}: {samples[-1]:.3f} s" +
+                  (f" (mean {result.mean:.3f} s +/- {result.rel_ci * 100:.1f}%)" if len(samples) > 1 else ""))
+        if rel_ci and len(samples) >= min_runs and result.rel_ci <= rel_ci:
+            stopped_early = i + 1 < runs
+            break
+
+    return BenchmarkResult(name, samples, warmup, confidence, stopped_early, failures)
@@ -0,0 +1,185 @@
+"""
+Resolve a prioritised list of fallback locators in one round trip.
+
+Trying fallback selectors one after another costs a WebDriver round trip
+(and on Appium often an implicit wait) for every miss before the hit. Here
+all locators are resolved together and the hit with the highest priority
+(lowest index) wins:
+
+    web      one execute_script call evaluates every CSS/XPath locator
+    Appium   one find-elements request per locator, sent concurrently over
+             a pooled keep-alive HTTP connection to the Appium server
+
+    result = race(driver, [(By.CSS_SELECTOR, "button[name='submit.addToCart']"),
+                           (By.XPATH, "//input[@name='submit.add-to-cart']")], scope=card)
+    if result:
+        result.element.click()
+
+Appium requests for lower-priority locators still run when a higher one
+hits; they are read-only, so the answer is just discarded.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import urllib3
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+from harness.waits import to_css
+
+# W3C element reference key in find element(s) responses
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+RACE_SCRIPT = """
+const [locators, scope, visibleOnly] = arguments;
+const root = scope || document;
+const started = performance.now();
+
+function visible(el) {
+    if (!el.getClientRects().length) return false;
+    const style = window.getComputedStyle(el);
+    return style.visibility !== 'hidden' && style.display !== 'none';
+}
+
+function find(kind, value) {
+    if (kind === 'css') return Array.from(root.querySelectorAll(value));
+    const found = [];
+    const snapshot = document.evaluate(value, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    for (let i = 0; i < snapshot.snapshotLength; i++) found.push(snapshot.snapshotItem(i));
+    return found;
+}
+
+const hits = [];
+for (let i = 0; i < locators.length; i++) {
+    let elements;
+    try {
+        elements = find(locators[i][0], locators[i][1]);
+    } catch (e) {
+        hits.push(0);
+        continue;
+    }
+    const usable = visibleOnly ? elements.filter(visible) : elements;
+    hits.push(usable.length);
+    if (usable.length) {
+        return {element: usable[0], index: i, hits: hits, script_ms: performance.now() - started};
+    }
+}
+return {element: null, index: -1, hits: hits, script_ms: performance.now() - started};
+"""
+
+
+class RaceResult:
+
+    def __init__(self, locators, element, index, elapsed, hits=None):
+        self.locators = locators
+        self.element = element
+        self.index = index
+        self.elapsed = elapsed
+        self.hits = hits
+
+    @property
+    def locator(self):
+        return self.locators[self.index] if self.index >= 0 else None
+
+    def __bool__(self):
+        return self.element is not None
+
+    def __repr__(self):
+        outcome = f"#{self.index} {self.locator}" if self else "no match"
+        return f"<RaceResult {outcome} in {self.elapsed * 1000:.1f} ms>"
+
+
+def _script_locator(by, value):
+    if by == "xpath":
+        return ["xpath", value]
+    css = to_css(by, value)
+    if css is None:
+        raise ValueError(f"Locator strategy '{by}' can't be raced in the page, use CSS or XPath")
+    return ["css", css]
+
+
+def race_web(driver, locators, scope=None, visible=True):
+    """
+    Evaluate every (by, value) locator in one script call.
+
+    `scope` limits the search to an element's subtree. With visible=True
+    only rendered elements count, like is_displayed(). XPath locators are
+    evaluated relative to the scope, so use ".//" to stay inside it.
+    """
+    script_locators = [_script_locator(by, value) for by, value in locators]
+    start_time = time.perf_counter()
+    result = driver.execute_script(RACE_SCRIPT, script_locators, scope, visible)
+    elapsed = time.perf_counter() - start_time
+    return RaceResult(locators, result["element"], result["index"], elapsed, hits=result["hits"])
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="locator-race")
+
+
+def _server_url(driver):
+    executor = driver.command_executor
+    config = getattr(executor, "client_config", None)
+    url = getattr(config, "remote_server_addr", None) or getattr(executor, "_url", None)
+    return url.rstrip("/")
+
+
+def _pool(url, size):
+    """Keep-alive connection pool for the server, shared by every race in this process"""
+    with _pools_lock:
+        pool = _pools.get(url)
+        if pool is None or pool.connection_pool_kw.get("maxsize", 1) < size:
+            pool = urllib3.PoolManager(num_pools=2, maxsize=max(size, 8), block=False)
+            _pools[url] = pool
+        return pool
+
+
+def _find_elements(pool, endpoint, headers, by, value):
+    response = pool.request("POST", endpoint, body=json.dumps({"using": by, "value": value}), headers=headers)
+    if response.status != 200:
+        return []
+    return json.loads(response.data).get("value") or []
+
+
+def race_appium(driver, locators, scope=None):
+    """
+    Send one find-elements request per locator concurrently and return the
+    highest-priority hit. Waits only as long as the answers for locators
+    ranked above the eventual winner take.
+    """
+    url = _server_url(driver)
+    headers = RemoteConnection.get_remote_connection_headers(urlparse(url), keep_alive=True)
+    endpoint = f"{url}/session/{driver.session_id}"
+    endpoint += f"/element/{scope.id}/elements" if scope is not None else "/elements"
+    pool = _pool(url, len(locators))
+
+    start_time = time.perf_counter()
+    futures = [_executor.submit(_find_elements, pool, endpoint, headers, by, value) for by, value in locators]
+    hits = []
+    for index, future in enumerate(futures):
+        try:
+            found = future.result()
+        except Exception:
+            found = []
+        hits.append(len(found))
+        if found:
+            reference = found[0]
+            element = driver.create_web_element(reference.get(ELEMENT_KEY) or reference.get("ELEMENT"))
+            return RaceResult(locators, element, index, time.perf_counter() - start_time, hits=hits)
+    return RaceResult(locators, None, -1, time.perf_counter() - start_time, hits=hits)
+
+
+def is_native(driver):
+    capabilities = getattr(driver, "capabilities", None) or {}
+    return str(capabilities.get("platformName", "")).lower() in ("android", "ios") and \
+        not capabilities.get("browserName")
+
+
+def race(driver, locators, scope=None, visible=True):
+    """race_appium for native app sessions, race_web for browser sessions"""
+    if is_native(driver):
+        return race_appium(driver, locators, scope=scope)
+    return race_web(driver, locators, scope=scope, visible=visible)
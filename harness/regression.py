@@ -0,0 +1,240 @@
+"""
+Regression check of stored timings against a baseline.
+
+A baseline is a labelled set of runs in the results database (see
+results_store.py). For every span (test + path) the latest --samples
+durations outside the baseline are compared with the baseline's durations
+using a one-sided Mann-Whitney U test, which needs no normality assumption
+and is robust to the occasional slow outlier. A span counts as a regression
+when all of these hold:
+
+    p < --alpha                                 the slowdown is significant
+    median ratio >= 1 + --min-slowdown          and large enough to matter
+    Cliff's delta >= --min-effect               and consistent, not a few outliers
+
+Both suites write through harness.timing, so Selenium and Appium spans are
+checked the same way. The command exits with status 1 when any span
+regressed, so it can fail a CI job.
+
+    python -m harness.regression results.db baseline set --latest 5
+    python -m harness.regression results.db baseline show
+    python -m harness.regression results.db check --samples 10 --min-slowdown 0.2
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+from datetime import datetime, timezone
+
+from harness.results_store import ResultsStore
+
+BASELINE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS baselines (
+    label TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (label, run_id)
+)
+"""
+
+
+def _normal_sf(z):
+    """P(Z > z) for a standard normal variable"""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def mann_whitney_u(baseline, candidate):
+    """
+    One-sided Mann-Whitney U test that `candidate` tends to be larger.
+
+    Returns (U of the candidate, p-value). Uses the normal approximation with
+    tie and continuity corrections, which is adequate from about 5 samples
+    per side.
+    """
+    n1, n2 = len(candidate), len(baseline)
+    combined = sorted([(value, 0) for value in candidate] + [(value, 1) for value in baseline])
+    ranks = [0.0] * len(combined)
+    tie_term = 0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        # Tied values share the average of the ranks they span
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return u, _normal_sf(z)
+
+
+def cliffs_delta(u, n1, n2):
+    """Cliff's delta from the candidate's U: +1 means every candidate sample is slower"""
+    return 2 * u / (n1 * n2) - 1
+
+
+def effect_label(delta):
+    """Conventional magnitude thresholds (Romano et al.)"""
+    size = abs(delta)
+    if size < 0.147:
+        return "negligible"
+    if size < 0.33:
+        return "small"
+    if size < 0.474:
+        return "medium"
+    return "large"
+
+
+class RegressionChecker:
+
+    def __init__(self, store, label="default"):
+        self.store = store
+        self.label = label
+        self.store.execute(BASELINE_SCHEMA)
+
+    def set_baseline(self, run_ids):
+        """Replace the baseline with these runs in one transaction and return it as read back"""
+        created_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self.store.transaction() as connection:
+            connection.execute("DELETE FROM baselines WHERE label = ?", (self.label,))
+            connection.executemany("INSERT INTO baselines (label, run_id, created_at) VALUES (?, ?, ?)",
+                                   [(self.label, run_id, created_at) for run_id in run_ids])
+            known = {row["run_id"] for row in connection.execute(
+                "SELECT run_id FROM baselines JOIN runs USING (run_id) WHERE label = ?", (self.label,))}
+            missing = sorted(set(run_ids) - known)
+            if missing:
+                # Raising rolls the transaction back, so the previous baseline stays
+                raise ValueError(f"Unknown run id(s) {', '.join(missing)}, baseline '{self.label}' not changed")
+        stored = self.baseline_runs()
+        if sorted(stored) != sorted(set(run_ids)):
+            raise RuntimeError(f"Baseline '{self.label}' reads back as {stored}, expected {sorted(set(run_ids))}")
+        return stored
+
+    def baseline_runs(self):
+        return [row["run_id"] for row in self.store.query(
+            "SELECT baselines.run_id FROM baselines JOIN runs USING (run_id) WHERE label = ?"
+            " ORDER BY runs.started_at", (self.label,))]
+
+    def _durations(self, where, params):
+        """{(test, path): [seconds, newest first]} for the span rows matching `where`"""
+        rows = self.store.query(
+            "SELECT spans.test, spans.path, spans.duration_ns FROM spans JOIN runs USING (run_id)"
+            f" WHERE {where} ORDER BY runs.started_at DESC, spans.id DESC", params)
+        durations = {}
+        for row in rows:
+            durations.setdefault((row["test"], row["path"]), []).append(row["duration_ns"] / 1e9)
+        return durations
+
+    def check(self, samples=10, alpha=0.01, min_slowdown=0.1, min_effect=0.33, min_samples=5, run_id=None):
+        """Compare every span with the baseline and return one result dict per span, worst first"""
+        baseline_runs = self.baseline_runs()
+        if not baseline_runs:
+            raise ValueError(f"No baseline '{self.label}' stored, set one with 'baseline set'")
+        marks = ",".join("?" * len(baseline_runs))
+        baseline = self._durations(f"spans.run_id IN ({marks})", baseline_runs)
+        if run_id:
+            candidate = self._durations("spans.run_id = ?", [run_id])
+        else:
+            candidate = self._durations(f"spans.run_id NOT IN ({marks})", baseline_runs)
+
+        results = []
+        for key in sorted(candidate):
+            test, path = key
+            current = candidate[key][:samples]
+            reference = baseline.get(key, [])
+            result = {"test": test, "path": path, "n": len(current), "baseline_n": len(reference),
+                      "median": statistics.median(current), "status": "ok"}
+            if len(current) < min_samples or len(reference) < min_samples:
+                result["status"] = "too few samples"
+                results.append(result)
+                continue
+            u, p = mann_whitney_u(reference, current)
+            delta = cliffs_delta(u, len(current), len(reference))
+            baseline_median = statistics.median(reference)
+            ratio = result["median"] / baseline_median if baseline_median > 0 else math.inf
+            result.update(baseline_median=baseline_median, ratio=ratio, p=p, delta=delta,
+                          effect=effect_label(delta))
+            if p < alpha and ratio >= 1 + min_slowdown and delta >= min_effect:
+                result["status"] = "REGRESSION"
+            elif p < alpha and delta <= -min_effect and ratio <= 1 - min_slowdown:
+                result["status"] = "faster"
+            results.append(result)
+        order = {"REGRESSION": 0, "faster": 1, "ok": 2, "too few samples": 3}
+        return sorted(results, key=lambda r: (order[r["status"]], -r.get("ratio", 0)))
+
+
+def print_results(results, alpha):
+    print("\n----- REGRESSION CHECK -----")
+    print(f"{'status':16} {'ratio':>6} {'median':>10} {'baseline':>10} {'p':>8} {'delta':>6} {'n':>7}  span")
+    for result in results:
+        if "p" in result:
+            numbers = (f"{result['ratio']:6.2f} {result['median'] * 1000:8.1f}ms "
+                       f"{result['baseline_median'] * 1000:8.1f}ms {result['p']:8.4f} {result['delta']:+6.2f}")
+        else:
+            numbers = f"{'':6} {result['median'] * 1000:8.1f}ms {'':10} {'':8} {'':6}"
+        print(f"{result['status']:16} {numbers} {result['n']:>3}/{result['baseline_n']:<3}  "
+              f"{result['test']} {result['path']}")
+    regressions = [r for r in results if r["status"] == "REGRESSION"]
+    print(f"{len(regressions)} regression(s) at alpha={alpha} across {len(results)} spans")
+    print("-" * 28)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db", help="SQLite file written with RESULTS_DB")
+    parser.add_argument("--label", default="default", help="baseline name")
+    commands = parser.add_subparsers(dest="command", required=True)
+    baseline = commands.add_parser("baseline", help="set or show the baseline runs")
+    baseline.add_argument("action", choices=["set", "show"])
+    baseline.add_argument("run_ids", nargs="*", help="runs to use as the baseline")
+    baseline.add_argument("--latest", type=int, help="use the latest N runs instead of listing them")
+    check = commands.add_parser("check", help="compare recent runs with the baseline")
+    check.add_argument("--run", help="only check this run (default: the latest samples outside the baseline)")
+    check.add_argument("--samples", type=int, default=10, help="latest samples per span to compare")
+    check.add_argument("--alpha", type=float, default=0.01, help="significance level")
+    check.add_argument("--min-slowdown", type=float, default=0.1, help="minimum relative median slowdown")
+    check.add_argument("--min-effect", type=float, default=0.33, help="minimum Cliff's delta (0.33 = medium)")
+    check.add_argument("--min-samples", type=int, default=5, help="skip spans with fewer samples on either side")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} does not exist")
+    checker = RegressionChecker(ResultsStore(args.db, run_id="-"), label=args.label)
+
+    if args.command == "baseline":
+        if args.action == "set":
+            run_ids = args.run_ids
+            if args.latest:
+                run_ids = [run["run_id"] for run in checker.store.runs(args.latest)]
+            if not run_ids:
+                parser.error("give run ids or --latest N")
+            try:
+                checker.set_baseline(run_ids)
+            except ValueError as e:
+                parser.error(str(e))
+        runs = checker.baseline_runs()
+        print(f"Baseline '{args.label}': {', '.join(runs) if runs else '(none)'}")
+        return
+
+    try:
+        results = checker.check(samples=args.samples, alpha=args.alpha, min_slowdown=args.min_slowdown,
+                                min_effect=args.min_effect, min_samples=args.min_samples, run_id=args.run)
+    except ValueError as e:
+        parser.error(str(e))
+    if print_results(results, args.alpha):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
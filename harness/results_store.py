@@ -0,0 +1,390 @@
+"""
+SQLite results store for timing spans.
+
+Every span the Timer finishes is stored with the run it belongs to: run id,
+git commit, host, Python and the relevant environment variables go in the
+runs table once, and each span row carries its test, path, duration, attrs
+and the browser/device context of the Timer. Writes are queued and
+committed in batches by a background thread, so a test only pays for a
+queue.put().
+
+    RESULTS_DB=results.db python -m unittest load_time_test
+    RESULTS_RUN_ID=nightly-42           name the run (default: timestamp + random suffix)
+
+Worker processes inherit RESULTS_RUN_ID, so a parallel run is stored as one
+run. Query it from Python or the command line:
+
+    store = ResultsStore("results.db")
+    store.trend("homepage_load", limit=20)
+    python -m harness.results_store results.db runs
+    python -m harness.results_store results.db trend homepage_load --test load_time_test
+    python -m harness.results_store results.db show <run_id>
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import queue
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import uuid
+from contextlib import closing, contextmanager
+from datetime import datetime, timezone
+
+from harness.benchmark import percentile
+from harness.timing import add_sink, remove_sink
+
+ENV_PREFIXES = ("AMAZON_", "CHROME_", "APPIUM_", "FIXTURE_", "RESOURCE_BLOCKING", "NETWORK_CAPTURE", "BROWSER_",
+                "MEASURE_", "CI")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    git_sha TEXT,
+    git_dirty INTEGER,
+    host TEXT,
+    platform TEXT,
+    python TEXT,
+    command TEXT,
+    env TEXT
+);
+CREATE TABLE IF NOT EXISTS spans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    recorded_at TEXT NOT NULL,
+    pid INTEGER,
+    test TEXT,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    depth INTEGER,
+    start_ns INTEGER,
+    duration_ns INTEGER NOT NULL,
+    attrs TEXT,
+    context TEXT
+);
+CREATE INDEX IF NOT EXISTS spans_name ON spans(name, test);
+CREATE INDEX IF NOT EXISTS spans_run ON spans(run_id);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def current_run_id():
+    """The run id shared by this process and the workers it starts"""
+    if not os.environ.get("RESULTS_RUN_ID"):
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        os.environ["RESULTS_RUN_ID"] = f"{stamp}-{uuid.uuid4().hex[:6]}"
+    return os.environ["RESULTS_RUN_ID"]
+
+
+def git_revision(path=None):
+    """(commit sha, has uncommitted changes) of the checkout, or (None, None) outside git"""
+    path = path or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=path, capture_output=True, text=True,
+                             timeout=5).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=path,
+                                capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None, None
+    return (sha or None), (bool(status.strip()) if sha else None)
+
+
+def run_environment():
+    """Environment variables that change what a run measures"""
+    return {key: value for key, value in sorted(os.environ.items()) if key.startswith(ENV_PREFIXES)}
+
+
+class ResultsStore:
+
+    def __init__(self, path, run_id=None, batch_size=200, flush_seconds=0.5):
+        self.path = path
+        self.run_id = run_id or current_run_id()
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue()
+        self._thread = None
+        self._run_registered = False
+        self._closed = False
+        self.written = 0
+        self.failed = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        # WAL lets readers and the writers of parallel workers use the file at the same time
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    # Writing
+
+    def start(self):
+        """Start the background writer (called automatically on the first record)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer, name="results-store", daemon=True)
+            self._thread.start()
+        return self
+
+    def record(self, record):
+        """Timing sink: queue a finished span record"""
+        if self._closed:
+            return
+        self._queue.put((os.getpid(), _now(), record))
+        if self._thread is None:
+            self.start()
+
+    __call__ = record
+
+    def _register_run(self, connection):
+        git_sha, git_dirty = git_revision()
+        connection.execute(
+            "INSERT OR IGNORE INTO runs (run_id, started_at, git_sha, git_dirty, host, platform, python, command, env)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.run_id, _now(), git_sha, git_dirty, socket.gethostname(), platform.platform(),
+             platform.python_version(), " ".join(sys.argv), json.dumps(run_environment())))
+        self._run_registered = True
+
+    def _writer(self):
+        connection = self._connect()
+        done = False
+        while not done:
+            try:
+                batch = [self._queue.get(timeout=self.flush_seconds)]
+            except queue.Empty:
+                continue
+            # Collect whatever else is already queued so one commit covers many spans
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                done = True
+            rows = [item for item in batch if item is not None]
+            try:
+                if rows:
+                    self._write(connection, rows)
+            except sqlite3.Error as e:
+                self.failed += len(rows)
+                print(f"Could not store {len(rows)} timing records in {self.path}: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        connection.close()
+
+    def _write(self, connection, rows):
+        with connection:
+            if not self._run_registered:
+                self._register_run(connection)
+            connection.executemany(
+                "INSERT INTO spans (run_id, recorded_at, pid, test, name, path, depth, start_ns, duration_ns,"
+                " attrs, context) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(self.run_id, recorded_at, pid, record.get("test"), record["name"], record["path"],
+                  record.get("depth"), record.get("start_ns"), record["duration_ns"],
+                  json.dumps(record.get("attrs") or {}, default=str),
+                  json.dumps(record.get("context") or {}, default=str))
+                 for pid, recorded_at, record in rows])
+        self.written += len(rows)
+
+    def flush(self):
+        """Block until every queued record is committed"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Write the remaining records and stop the writer"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+
+    # Queries
+
+    def query(self, sql, params=()):
+        """Rows of a read-only statement; writes go through execute() or transaction()"""
+        # sqlite3's own context manager only commits; closing() also releases the file and WAL handles
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA query_only=ON")
+            return [dict(row) for row in connection.execute(sql, params)]
+
+    @contextmanager
+    def transaction(self):
+        """A connection whose statements are committed together on exit (rolled back on error)"""
+        with closing(self._connect()) as connection, connection:
+            yield connection
+
+    def execute(self, sql, params=()):
+        """Run and commit one write statement (DDL or DML); returns the changed row count"""
+        with self.transaction() as connection:
+            return connection.execute(sql, params).rowcount
+
+    def executemany(self, sql, rows):
+        """Run and commit a DML statement once per row, in one transaction"""
+        with self.transaction() as connection:
+            return connection.executemany(sql, rows).rowcount
+
+    def runs(self, limit=20):
+        """Most recent runs with their span counts"""
+        return self.query(
+            "SELECT runs.*, COUNT(spans.id) AS spans, COUNT(DISTINCT spans.test) AS tests FROM runs"
+            " LEFT JOIN spans USING (run_id) GROUP BY runs.run_id ORDER BY runs.started_at DESC LIMIT ?",
+            (limit,))
+
+    def spans(self, run_id, name=None, test=None):
+        """Span rows of one run (duration in ms), optionally filtered by span name/path and test"""
+        sql = ("SELECT test, name, path, depth, duration_ns / 1e6 AS ms, attrs, context FROM spans"
+               " WHERE run_id = ?")
+        params = [run_id]
+        if name:
+            sql += " AND (name = ? OR path = ?)"
+            params += [name, name]
+        if test:
+            sql += " AND test LIKE ?"
+            params.append(f"%{test}%")
+        rows = self.query(sql + " ORDER BY pid, start_ns", params)
+        for row in rows:
+            row["attrs"] = json.loads(row["attrs"] or "{}")
+            row["context"] = json.loads(row["context"] or "{}")
+        return rows
+
+    def samples(self, name, test=None, run_id=None, limit=None):
+        """Durations in seconds of a span across runs, newest runs first"""
+        sql = ("SELECT spans.run_id, runs.started_at, runs.git_sha, spans.duration_ns FROM spans"
+               " JOIN runs USING (run_id) WHERE (spans.name = ? OR spans.path = ?)")
+        params = [name, name]
+        if test:
+            sql += " AND spans.test LIKE ?"
+            params.append(f"%{test}%")
+        if run_id:
+            sql += " AND spans.run_id = ?"
+            params.append(run_id)
+        rows = self.query(sql + " ORDER BY runs.started_at DESC, spans.id", params)
+        if limit:
+            keep = []
+            for row in rows:
+                if row["run_id"] not in keep:
+                    keep.append(row["run_id"])
+            keep = set(keep[:limit])
+            rows = [row for row in rows if row["run_id"] in keep]
+        return [dict(row, seconds=row.pop("duration_ns") / 1e9) for row in rows]
+
+    def trend(self, name, test=None, limit=20):
+        """Per-run statistics of a span (ms), oldest run first"""
+        by_run = {}
+        for row in self.samples(name, test=test, limit=limit):
+            entry = by_run.setdefault(row["run_id"], {"run_id": row["run_id"], "started_at": row["started_at"],
+                                                      "git_sha": row["git_sha"], "values": []})
+            entry["values"].append(row["seconds"] * 1000)
+        trend = []
+        for entry in sorted(by_run.values(), key=lambda e: e["started_at"]):
+            values = sorted(entry.pop("values"))
+            entry.update(n=len(values), mean_ms=sum(values) / len(values), median_ms=percentile(values, 50),
+                         p90_ms=percentile(values, 90), min_ms=values[0], max_ms=values[-1])
+            trend.append(entry)
+        return trend
+
+    def names(self, run_id=None):
+        """Span paths recorded (in one run or overall) with how often they occur"""
+        sql = "SELECT test, path, COUNT(*) AS n FROM spans"
+        params = ()
+        if run_id:
+            sql += " WHERE run_id = ?"
+            params = (run_id,)
+        return self.query(sql + " GROUP BY test, path ORDER BY test, path", params)
+
+
+_installed = None
+
+
+def install(path, run_id=None):
+    """Store every finished span of this process in `path` until exit"""
+    global _installed
+    if _installed is None:
+        _installed = ResultsStore(path, run_id=run_id)
+        add_sink(_installed)
+        atexit.register(uninstall)
+    return _installed
+
+
+def uninstall():
+    global _installed
+    if _installed is not None:
+        remove_sink(_installed)
+        _installed.close()
+        _installed = None
+
+
+def _print_table(rows, columns):
+    if not rows:
+        print("(no rows)")
+        return
+    widths = {column: max(len(column), *(len(_cell(row.get(column))) for row in rows)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(_cell(row.get(column)).ljust(widths[column]) for column in columns))
+
+
+def _cell(value):
+    if isinstance(value, float):
+        return f"{value:.1f}"
+    if value is None:
+        return "-"
+    return str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db", help="SQLite file written with RESULTS_DB")
+    commands = parser.add_subparsers(dest="command", required=True)
+    runs = commands.add_parser("runs", help="list recent runs")
+    runs.add_argument("--limit", type=int, default=20)
+    trend = commands.add_parser("trend", help="per-run statistics of one span")
+    trend.add_argument("name", help="span name or path, e.g. homepage_load or app_loading/phase1_app_startup")
+    trend.add_argument("--test", help="only tests whose id contains this text")
+    trend.add_argument("--limit", type=int, default=20, help="number of most recent runs")
+    show = commands.add_parser("show", help="all spans of one run")
+    show.add_argument("run_id")
+    show.add_argument("--test", help="only tests whose id contains this text")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} does not exist")
+    store = ResultsStore(args.db, run_id="-")
+    if args.command == "runs":
+        rows = store.runs(args.limit)
+        for row in rows:
+            row["git_sha"] = (row["git_sha"] or "")[:10] + ("*" if row["git_dirty"] else "")
+        _print_table(rows, ["run_id", "started_at", "git_sha", "host", "tests", "spans"])
+    elif args.command == "trend":
+        rows = store.trend(args.name, test=args.test, limit=args.limit)
+        for row in rows:
+            row["git_sha"] = (row["git_sha"] or "")[:10]
+        print(f"----- TREND {args.name} -----")
+        _print_table(rows, ["run_id", "git_sha", "n", "mean_ms", "median_ms", "p90_ms", "min_ms", "max_ms"])
+    else:
+        rows = store.spans(args.run_id, test=args.test)
+        test = None
+        for row in rows:
+            if row["test"] != test:
+                test = row["test"]
+                print(f"\n{test}")
+            attrs = ", ".join(f"{key}={value}" for key, value in row["attrs"].items())
+            print(f"  {'  ' * (row['depth'] or 0)}{row['name']}: {row['ms']:.3f} ms {attrs}".rstrip())
+
+
+if __name__ == "__main__":
+    main()
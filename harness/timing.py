@@ -0,0 +1,176 @@
+"""
+High-resolution timing spans.
+
+Spans are measured with time.perf_counter_ns(), which is monotonic and
+unaffected by wall-clock adjustments. They nest: a span opened inside
+another one records its parent path, e.g. "app_loading/phase2". Every
+finished span is emitted as a plain dict to the registered sinks, so
+results can go to a file or a database instead of being printed.
+
+    timer = Timer("testf.TestAppium.test_app_loading_time")
+    with timer.span("app_loading"):
+        with timer.span("phase1"):
+            ...
+    search = timer.start("search")       # for spans that don't fit a with-block
+    ...
+    search.stop(winner="results count")
+    timer.report()
+
+Set TIMING_JSONL=path to append every record to a JSON-lines file, and
+RESULTS_DB=path to store them in SQLite (see results_store.py).
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_sinks = []
+_sinks_lock = threading.Lock()
+
+
+def add_sink(sink):
+    """Register a callable that receives every finished span record"""
+    with _sinks_lock:
+        if sink not in _sinks:
+            _sinks.append(sink)
+
+
+def remove_sink(sink):
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+def jsonl_sink(path):
+    """Sink that appends one JSON object per line to `path`"""
+    lock = threading.Lock()
+
+    def sink(record):
+        line = json.dumps(record, ensure_ascii=False)
+        with lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    return sink
+
+
+if os.environ.get("TIMING_JSONL"):
+    add_sink(jsonl_sink(os.environ["TIMING_JSONL"]))
+
+
+class Span:
+    __slots__ = ("timer", "name", "path", "depth", "attrs", "start_ns", "end_ns")
+
+    def __init__(self, timer, name, parent, attrs):
+        self.timer = timer
+        self.name = name
+        self.path = f"{parent.path}/{name}" if parent else name
+        self.depth = parent.depth + 1 if parent else 0
+        self.attrs = attrs
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+
+    @property
+    def duration_ns(self):
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return end_ns - self.start_ns
+
+    @property
+    def seconds(self):
+        return self.duration_ns / 1e9
+
+    def stop(self, **attrs):
+        """Finish the span (only the first call counts) and emit its record"""
+        if self.end_ns is None:
+            self.end_ns = time.perf_counter_ns()
+            self.attrs.update(attrs)
+            self.timer._finish(self)
+        return self
+
+
+def driver_context(driver):
+    """Browser or device details from a WebDriver/Appium session, for Timer(context=...)"""
+    capabilities = getattr(driver, "capabilities", None) or {}
+    keys = ("browserName", "browserVersion", "platformName", "platformVersion", "deviceName", "udid",
+            "automationName", "appPackage")
+    context = {}
+    for key in keys:
+        value = capabilities.get(key, capabilities.get(f"appium:{key}"))
+        if value:
+            context[key] = value
+    chrome = capabilities.get("chrome") or {}
+    if chrome.get("chromedriverVersion"):
+        context["chromedriverVersion"] = chrome["chromedriverVersion"].split(" ")[0]
+    return context
+
+
+class Timer:
+
+    def __init__(self, test_name=None, sinks=None, context=None):
+        self.test_name = test_name
+        self.sinks = sinks
+        self.context = context or {}
+        self.records = []
+        self._stack = []
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time a block; spans opened inside it become its children"""
+        span = Span(self, name, self._stack[-1] if self._stack else None, attrs)
+        self._stack.append(span)
+        try:
+            yield span
+        finally:
+            self._stack.pop()
+            span.stop()
+
+    def start(self, name, parent=None, **attrs):
+        """Start a span that is stopped explicitly with span.stop()"""
+        if parent is None and self._stack:
+            parent = self._stack[-1]
+        return Span(self, name, parent, attrs)
+
+    def _finish(self, span):
+        record = {
+            "test": self.test_name,
+            "name": span.name,
+            "path": span.path,
+            "depth": span.depth,
+            "start_ns": span.start_ns,
+            "duration_ns": span.duration_ns,
+            "attrs": span.attrs,
+            "context": self.context,
+        }
+        self.records.append(record)
+        for sink in (self.sinks if self.sinks is not None else list(_sinks)):
+            try:
+                sink(record)
+            except Exception as e:
+                print(f"Timing sink failed: {e}")
+
+    def get(self, path):
+        """Duration in seconds of the last finished span with this path (or name)"""
+        for record in reversed(self.records):
+            if record["path"] == path or record["name"] == path:
+                return record["duration_ns"] / 1e9
+        return None
+
+    def report(self):
+        """Print the finished spans as an indented tree with each child's share of its parent"""
+        if not self.records:
+            return
+        durations = {record["path"]: record["duration_ns"] for record in self.records}
+        print(f"\n----- TIMINGS {self.test_name or ''} -----".rstrip())
+        for record in sorted(self.records, key=lambda r: r["start_ns"]):
+            line = f"{'  ' * record['depth']}{record['name']}: {record['duration_ns'] / 1e6:.3f} ms"
+            parent_path = record["path"].rpartition("/")[0]
+            if durations.get(parent_path):
+                line += f" ({record['duration_ns'] / durations[parent_path] * 100:.1f}%)"
+            if record["attrs"]:
+                line += " " + ", ".join(f"{key}={value}" for key, value in record["attrs"].items())
+            print(line)
+        print("-" * 21)
+
+
+if os.environ.get("RESULTS_DB"):
+    from harness import results_store
+    results_store.install(os.environ["RESULTS_DB"])
@@ -0,0 +1,179 @@
+"""
+Adaptive polling waits.
+
+The tests used to poll with `for _ in range(30): ... time.sleep(0.2)`, which
+adds up to 200 ms to every measured latency. AdaptiveWait polls again almost
+immediately, backs off exponentially to a small ceiling and then keeps
+polling at that tight cadence. Several conditions can race in one wait and
+each result records which condition won and how many polls it took.
+
+Conditions are callables taking the driver. Exceptions raised by a
+condition count as "not yet", like WebDriverWait's ignored exceptions.
+"""
+import time
+
+
+class WaitResult:
+
+    def __init__(self, label, name, value, polls, elapsed, server_side=False):
+        self.label = label
+        self.name = name
+        self.value = value
+        self.polls = polls
+        self.elapsed = elapsed
+        self.server_side = server_side
+
+    @property
+    def timed_out(self):
+        return self.name is None
+
+    def __bool__(self):
+        return not self.timed_out
+
+    def __repr__(self):
+        outcome = "timed out" if self.timed_out else f"'{self.name}'"
+        mode = "server-side" if self.server_side else f"{self.polls} polls"
+        return f"<WaitResult {self.label}: {outcome} after {self.elapsed:.3f}s, {mode}>"
+
+
+def element_present(by, value):
+    """Condition that is met once find_elements returns anything (no exception per miss)"""
+    return lambda driver: driver.find_elements(by, value) or None
+
+
+def to_xpath(by, value):
+    """Express an Appium locator as XPath so several can be raced in one server-side lookup"""
+    if by == "xpath":
+        return value
+    if by == "id":
+        return f'//*[@resource-id="{value}"]'
+    if by == "accessibility id":
+        return f'//*[@content-desc="{value}"]'
+    if by == "class name":
+        return f"//{value}"
+    return None
+
+
+def to_css(by, value):
+    """Express a web locator as CSS so several can be raced in one server-side lookup"""
+    if by == "css selector":
+        return value
+    if by == "id":
+        return f"#{value}"
+    if by == "class name":
+        return f".{value}"
+    if by == "name":
+        return f"[name='{value}']"
+    return None
+
+
+class AdaptiveWait:
+
+    def __init__(self, driver, timeout=6.0, initial=0.005, ceiling=0.05, factor=2.0, server_side=False):
+        self.driver = driver
+        self.timeout = timeout
+        self.initial = initial
+        self.ceiling = ceiling
+        self.factor = factor
+        self.server_side = server_side
+        self.history = []
+
+    def intervals(self):
+        """Sleep schedule: exponential growth from `initial`, then steady at `ceiling`"""
+        interval = self.initial
+        while True:
+            yield interval
+            interval = min(interval * self.factor, self.ceiling)
+
+    def until_any(self, conditions, timeout=None, label=None):
+        """
+        Poll all conditions until one returns a truthy value.
+
+        `conditions` maps a name to a callable taking the driver. Returns a
+        WaitResult that is falsy when the wait timed out.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        label = label or " or ".join(conditions)
+        start_time = time.perf_counter()
+        deadline = start_time + timeout
+        polls = 0
+        schedule = self.intervals()
+
+        while True:
+            polls += 1
+            for name, condition in conditions.items():
+                try:
+                    value = condition(self.driver)
+                except Exception:
+                    value = None
+                if value:
+                    return self._record(WaitResult(label, name, value, polls, time.perf_counter() - start_time))
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return self._record(WaitResult(label, None, None, polls, time.perf_counter() - start_time))
+            time.sleep(min(next(schedule), remaining))
+
+    def until_any_element(self, locators, timeout=None, label=None, server_side=None):
+        """
+        Wait for any of several (by, value) locators, given as a name -> locator dict.
+
+        With server_side=True the locators are merged into one XPath union
+        (Appium) or CSS selector list (web) and the driver's implicit wait
+        polls on the server, so the whole wait is a single HTTP request.
+        Falls back to client-side polling when the locators can't be merged.
+        """
+        server_side = self.server_side if server_side is None else server_side
+        if server_side and hasattr(self.driver, "implicitly_wait"):
+            merged = self._merge(locators.values())
+            if merged:
+                return self._server_side_wait(locators, merged, timeout, label)
+
+        conditions = {name: element_present(by, value) for name, (by, value) in locators.items()}
+        return self.until_any(conditions, timeout=timeout, label=label)
+
+    def _merge(self, locators):
+        locators = list(locators)
+        capabilities = getattr(self.driver, "capabilities", None) or {}
+        if str(capabilities.get("platformName", "")).lower() == "android":
+            xpaths = [to_xpath(by, value) for by, value in locators]
+            return ("xpath", " | ".join(xpaths)) if all(xpaths) else None
+        selectors = [to_css(by, value) for by, value in locators]
+        return ("css selector", ", ".join(selectors)) if all(selectors) else None
+
+    def _server_side_wait(self, locators, merged, timeout, label):
+        timeout = self.timeout if timeout is None else timeout
+        label = label or " or ".join(locators)
+        previous = self._implicit_wait()
+        start_time = time.perf_counter()
+        self.driver.implicitly_wait(timeout)
+        try:
+            elements = self.driver.find_elements(*merged)
+        except Exception:
+            elements = []
+        finally:
+            self.driver.implicitly_wait(previous)
+        elapsed = time.perf_counter() - start_time
+        # The union does not say which branch matched, so report the whole race as the winner
+        name = label if elements else None
+        return self._record(WaitResult(label, name, elements or None, 1, elapsed, server_side=True))
+
+    def _implicit_wait(self):
+        """The driver's current implicit wait in seconds, or 0 when the driver can't report it"""
+        try:
+            return self.driver.timeouts.implicit_wait
+        except Exception:
+            return 0
+
+    def _record(self, result):
+        self.history.append(result)
+        return result
+
+    def report(self):
+        """Print one line per wait with its outcome, duration and poll count"""
+        print("\n----- WAIT REPORT -----")
+        for result in self.history:
+            outcome = f"'{result.name}'" if result else "TIMED OUT"
+            mode = "server-side" if result.server_side else f"{result.polls} polls"
+            print(f"{result.label}: {outcome} in {result.elapsed:.3f} seconds ({mode})")
+        print("-----------------------")
@@ -1,56 +1,64 @@
+import os
+import sys
 import unittest
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-try:
-    from webdriver_manager.chrome import ChromeDriverManager
-except ImportError:
-    print("WebDriver Manager not installed. Please run: pip install webdriver-manager")
+import browser
+import network_recorder
+import session_pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from harness.timing import Timer, driver_context
+
+SEARCH_QUERY = browser.search_query()
+
+
+def open_search_box(driver, base_url=None, timeout=10):
+    """Open the homepage and return the search box once it is present"""
+    driver.get(base_url or browser.base_url())
+    return WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.ID, "twotabsearchtextbox")))
+
+
+def search(driver, search_box, query=SEARCH_QUERY, timeout=10):
+    """Submit a query and wait for the results page to show result cards"""
+    wait = WebDriverWait(driver, timeout)
+    search_box.clear()
+    search_box.send_keys(query)
+    search_box.send_keys(Keys.RETURN)
+    wait.until(EC.title_contains(query))
+    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-component-type='s-search-result']")))
 
 
 class SearchLoadTime(unittest.TestCase):
     
     def setUp(self):
-        options = ChromeOptions()
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--start-maximized")
-        
-        service = ChromeService(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
+        self.driver = session_pool.acquire()
+        self.timer = Timer(self.id(), context=driver_context(self.driver))
+        self.network = network_recorder.record(self.driver, self.id())
         self.wait = WebDriverWait(self.driver, 10)
     
     def test_amazon_search_load_time(self):
         driver = self.driver
         
         print("Opening Amazon website...")
-        driver.get("https://www.amazon.in")
-        
-        search_box = self.wait.until(EC.presence_of_element_located((By.ID, "twotabsearchtextbox")))
-        start_time = time.time()
-        
-        print("Searching for wireless headphones...")
-        search_box.clear()
-        search_box.send_keys("wireless headphones")
-        search_box.send_keys(Keys.RETURN)
-        
-        self.wait.until(EC.title_contains("wireless headphones"))
-        self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-component-type='s-search-result']")))
+        search_box = open_search_box(driver)
+        search_span = self.timer.start("search")
         
-        end_time = time.time()
-        total_load_time = end_time - start_time
+        print(f"Searching for {SEARCH_QUERY}...")
+        search(driver, search_box)
         
-        print(f"\nSearch completed in {total_load_time:.2f} seconds")
+        search_span.stop()
         
-        self.assertIn("wireless headphones", driver.title.lower())
+        self.assertIn(SEARCH_QUERY.lower(), driver.title.lower())
     
     def tearDown(self):
-        self.driver.quit()
+        self.timer.report()
+        if self.network:
+            self.network.stop()
+        session_pool.release(self.driver)
         print("Browser closed")
 
 
@@ -1,8 +1,5 @@
+import sys
 import unittest
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
@@ -10,71 +7,40 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import ElementClickInterceptedException, TimeoutException
 import os
 
+import browser
+import network_recorder
+import product_extractor
+import resource_blocking
+import search_url
+import session_pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from harness.locator_race import race_web
+from harness.timing import Timer, driver_context
+
+SEARCH_QUERY = browser.search_query()
+
+
 class AmazonAddToCartTest(unittest.TestCase):
     
     def setUp(self):
-        options = ChromeOptions()
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--start-maximized")
-        
-        try:
-            from webdriver_manager.chrome import ChromeDriverManager
-            service = ChromeService(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=options)
-        except ImportError:
-            print("WebDriver Manager not installed! Install it with pip install webdriver-manager")
-            exit(1)
-        
+        self.driver = session_pool.acquire()
+        self.timer = Timer(self.id(), context=driver_context(self.driver))
+        self.network = network_recorder.record(self.driver, self.id())
+        # Only DOM results matter here, so skip images, fonts, media, ads and trackers
+        self.blocked_patterns = resource_blocking.apply(self.driver)
         self.wait = WebDriverWait(self.driver, 10)
     
     def get_product_details(self, first_product):
-        product_name = "Name not found"
-        product_price = "Price not found"
-        
-        name_selectors = [
-            "h2 a span",
-            ".a-size-medium.a-color-base.a-text-normal",
-            ".a-size-base-plus.a-color-base.a-text-normal",
-            "h2 .a-link-normal span",
-            "h2 a",
-            "h2"
-        ]
-        
-        for selector in name_selectors:
-            try:
-                elements = first_product.find_elements(By.CSS_SELECTOR, selector)
-                if elements:
-                    product_name = elements[0].text.strip()
-                    if product_name:
-                        print(f"Found product name: {product_name}")
-                        break
-            except Exception:
-                continue
-        
-        price_selectors = [
-            ".a-price .a-offscreen",
-            "span.a-price span.a-offscreen",
-            ".a-price-whole",
-            ".a-color-price",
-            ".a-price"
-        ]
+        # One script call walks the whole name/price selector cascade inside the page
+        record = product_extractor.extract_product(self.driver, first_product)
+        product_name = record["name"] or "Name not found"
+        product_price = record["price"] or "Price not found"
         
-        for selector in price_selectors:
-            try:
-                elements = first_product.find_elements(By.CSS_SELECTOR, selector)
-                if elements:
-                    price_element = elements[0]
-                    if "a-offscreen" in selector:
-                        product_price = price_element.get_attribute("innerHTML").strip()
-                    else:
-                        product_price = price_element.text.strip()
-                        if selector == ".a-price-whole":
-                            product_price = "₹" + product_price
-                    if product_price:
-                        print(f"Found price: {product_price}")
-                        break
-            except Exception:
-                continue
+        if record["name"]:
+            print(f"Found product name: {product_name} (via '{record['name_selector']}')")
+        if record["price"]:
+            print(f"Found price: {product_price} (via '{record['price_selector']}')")
         
         return product_name, product_price
     
@@ -85,15 +51,15 @@ class AmazonAddToCartTest(unittest.TestCase):
         print("Starting Amazon shopping test...")
         
         print("Opening Amazon website...")
-        driver.get("https://www.amazon.in")
+        driver.get(browser.base_url())
         
-        print("Searching for wireless headphones...")
+        print(f"Searching for {SEARCH_QUERY}...")
         search_box = wait.until(EC.presence_of_element_located((By.ID, "twotabsearchtextbox")))
         search_box.clear()
-        search_box.send_keys("wireless headphones")
+        search_box.send_keys(SEARCH_QUERY)
         search_box.send_keys(Keys.RETURN)
         
-        wait.until(EC.title_contains("wireless headphones"))
+        wait.until(EC.title_contains(SEARCH_QUERY))
         
         print("Sorting by highest customer rating...")
         
@@ -111,9 +77,7 @@ class AmazonAddToCartTest(unittest.TestCase):
         
         except Exception as e:
             print("Couldn't use dropdown, using direct sort URL instead")
-            current_url = driver.current_url
-            sorted_url = current_url + ("&" if "?" in current_url else "?") + "s=review-rank"
-            driver.get(sorted_url)
+            driver.get(search_url.with_params(driver.current_url, s="review-rank"))
             #time.sleep(5)
         
         wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-component-type='s-search-result']")))
@@ -126,7 +90,7 @@ class AmazonAddToCartTest(unittest.TestCase):
         print(f"Price: {product_price}")
         
         print("Attempting to add product to cart...")
-        start_time = time.time()
+        add_to_cart_span = self.timer.start("add_to_cart")
         
         add_to_cart_selectors = [
             "button[name='submit.addToCart']",
@@ -137,33 +101,14 @@ class AmazonAddToCartTest(unittest.TestCase):
             ".a-button-input[value*='Add to Cart']"
         ]
         
-        add_to_cart_button = None
-        for selector in add_to_cart_selectors:
-            try:
-                elements = first_product.find_elements(By.CSS_SELECTOR, selector)
-                for element in elements:
-                    if element.is_displayed():
-                        add_to_cart_button = element
-                        print(f"Found Add to Cart button")
-                        break
-                if add_to_cart_button:
-                    break
-            except Exception:
-                continue
-        
-        if not add_to_cart_button:
+        add_to_cart_locators = [(By.CSS_SELECTOR, selector) for selector in add_to_cart_selectors]
+        # All selectors are checked in one script call; the earliest one in the list wins
+        add_to_cart_button = race_web(driver, add_to_cart_locators, scope=first_product).element
+        if add_to_cart_button:
+            print(f"Found Add to Cart button")
+        else:
             print("Looking for Add to Cart button on page...")
-            for selector in add_to_cart_selectors:
-                try:
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        if element.is_displayed():
-                            add_to_cart_button = element
-                            break
-                    if add_to_cart_button:
-                        break
-                except Exception:
-                    continue
+            add_to_cart_button = race_web(driver, add_to_cart_locators).element
         
         success = False
         if add_to_cart_button:
@@ -205,22 +150,20 @@ class AmazonAddToCartTest(unittest.TestCase):
                         "#attachDisplayAddBaseAlert"
                     ]
                     
-                    for conf_selector in confirmation_selectors:
-                        try:
-                            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, conf_selector)))
-                            success = True
-                            print("Product added to cart successfully")
-                            break
-                        except:
-                            continue
+                    # One wait for any of them instead of a full timeout per missing selector
+                    try:
+                        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ", ".join(confirmation_selectors))))
+                        success = True
+                        print("Product added to cart successfully")
+                    except:
+                        pass
                 
             except Exception as e:
                 print(f"Error checking cart status: {e}")
         
-        end_time = time.time()
-        add_cart_time = end_time - start_time
+        add_to_cart_span.stop(success=success)
+        add_cart_time = add_to_cart_span.seconds
         
-        print(f"\nAdd to cart operation took {add_cart_time:.2f} seconds")
         if success:
             print("Product successfully added to cart!")
         else:
@@ -229,7 +172,11 @@ class AmazonAddToCartTest(unittest.TestCase):
         self.assertLess(add_cart_time, 30, "Add to cart took too long")
     
     def tearDown(self):
-        self.driver.quit()
+        self.timer.report()
+        if self.network:
+            self.network.stop()
+        resource_blocking.clear(self.driver)
+        session_pool.release(self.driver)
 
 
 if __name__ == "__main__":    
@@ -0,0 +1,242 @@
+"""
+Run a file of search queries through one warm Chrome session.
+
+Every query is searched in the same browser, so only the first one pays for
+the browser start, the connection setup and the cold cache. Two modes:
+
+    url        driver.get(<base>/s?k=<query>), no home page or typing
+    searchbox  type into the twotabsearchtextbox of the current page and
+               press Enter, like a user searching again from the results
+
+Each query is written as one JSON line to --out as soon as it finishes
+(latency, card count, the first --top cards, or the error). The output file
+is also the checkpoint: started again with the same --out, the run skips the
+queries already recorded as ok and appends the rest, failed ones included
+(the last line for a query wins). A line torn by a crash is dropped.
+
+The queries file has one query per line; blank lines and lines starting
+with # are skipped. If the browser dies, a new session is started and the
+run goes on. With RESULTS_DB set every query is also stored as a span.
+
+    python batch_queries.py queries.txt --out results.jsonl
+    python batch_queries.py queries.txt --out results.jsonl --mode searchbox --top 5
+    AMAZON_BASE_URL=fixture python batch_queries.py queries.txt --out results.jsonl --fresh
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from selenium.common.exceptions import InvalidSessionIdException, TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import browser
+import product_extractor
+import search_url
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from harness.benchmark import percentile
+from harness.timing import Timer, driver_context
+
+MODES = ("url", "searchbox")
+SEARCH_BOX = (By.ID, "twotabsearchtextbox")
+RESULT_CARD = (By.CSS_SELECTOR, product_extractor.RESULT_CARD_SELECTOR)
+# Shown instead of result cards when a query has no results
+NO_RESULTS = (By.CSS_SELECTOR, ".s-no-results-result, .s-no-outline")
+# Fsync the output every this many queries; a crash loses at most these
+SYNC_EVERY = 20
+
+
+def read_queries(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def load_checkpoint(path):
+    """
+    (index, query) pairs whose last record in the output file succeeded; a
+    torn last line is cut off. Failed queries are run again on resume and
+    their new record, appended later, is the one that counts.
+    """
+    ok = {}
+    if not os.path.exists(path):
+        return set()
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    for line in data.decode("utf-8").splitlines():
+        try:
+            record = json.loads(line)
+            ok[(record["index"], record["query"])] = bool(record.get("ok"))
+        except (ValueError, KeyError, TypeError):
+            continue
+    return {key for key, succeeded in ok.items() if succeeded}
+
+
+class BatchRunner:
+
+    def __init__(self, mode="url", base_url=None, timeout=15, top=3):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', choose from {', '.join(MODES)}")
+        self.mode = mode
+        self.base_url = base_url or browser.base_url()
+        self.timeout = timeout
+        self.top = top
+        self.driver = None
+        self.timer = None
+        self.sessions = 0
+        self.elapsed = 0.0
+
+    def start(self):
+        self.driver = browser.create_chrome_driver()
+        self.timer = Timer("batch_queries", context=driver_context(self.driver))
+        self.sessions += 1
+        # Warm up: first navigation, cookies and connection to the site
+        self.driver.get(self.base_url)
+        return self
+
+    def stop(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except WebDriverException:
+                pass
+            self.driver = None
+
+    def _wait_for_results(self):
+        WebDriverWait(self.driver, self.timeout, poll_frequency=0.05).until(
+            EC.any_of(EC.presence_of_element_located(RESULT_CARD), EC.presence_of_element_located(NO_RESULTS)))
+
+    def _search(self, query):
+        driver = self.driver
+        if self.mode == "url":
+            driver.get(search_url.build(query, base_url=self.base_url))
+        else:
+            try:
+                search_box = driver.find_element(*SEARCH_BOX)
+            except WebDriverException:
+                driver.get(self.base_url)
+                search_box = WebDriverWait(driver, self.timeout).until(EC.presence_of_element_located(SEARCH_BOX))
+            search_box.clear()
+            search_box.send_keys(query + Keys.RETURN)
+            # The old page, search box included, goes away when the results page loads
+            WebDriverWait(driver, self.timeout, poll_frequency=0.05).until(EC.staleness_of(search_box))
+        self._wait_for_results()
+
+    def run_query(self, index, query):
+        """Search one query and return its record"""
+        record = {"index": index, "query": query, "mode": self.mode,
+                  "at": datetime.now(timezone.utc).isoformat(timespec="seconds"), "session": self.sessions}
+        span = self.timer.start("query", mode=self.mode, query=query)
+        start_time = time.perf_counter()
+        try:
+            self._search(query)
+            record["latency_ms"] = (time.perf_counter() - start_time) * 1000
+            result = product_extractor.extract_columns(self.driver)
+            columns = result["columns"]
+            record["cards"] = result["card_count"]
+            record["extract_ms"] = result["round_trip_ms"]
+            record["top"] = [{name: columns[name][i] for name in ("asin", "name", "price", "rating", "sponsored")}
+                             for i in range(min(self.top, result["card_count"]))]
+            record["ok"] = True
+        except TimeoutException:
+            record["latency_ms"] = (time.perf_counter() - start_time) * 1000
+            record["ok"] = False
+            record["error"] = f"no results page within {self.timeout} seconds"
+        finally:
+            span.stop(ok=record.get("ok", False), cards=record.get("cards"))
+        return record
+
+    def run(self, queries, out_path, fresh=False, limit=None):
+        """Run the queries not yet in out_path, appending one line per query"""
+        if fresh and os.path.exists(out_path):
+            os.remove(out_path)
+        done = load_checkpoint(out_path)
+        pending = [(index, query) for index, query in enumerate(queries) if (index, query) not in done]
+        if limit is not None:
+            pending = pending[:limit]
+        if done:
+            print(f"Resuming: {len(done)} of {len(queries)} queries already done in {out_path}")
+        records = []
+        start_time = time.perf_counter()
+        with open(out_path, "a", encoding="utf-8") as out:
+            for count, (index, query) in enumerate(pending, start=1):
+                # A dead browser gets one new session and one retry of the query
+                for _ in range(2):
+                    if self.driver is None:
+                        self.start()
+                    try:
+                        record = self.run_query(index, query)
+                        break
+                    except WebDriverException as e:
+                        record = {"index": index, "query": query, "mode": self.mode, "ok": False,
+                                  "error": str(e).splitlines()[0][:200], "session": self.sessions}
+                        if not isinstance(e, InvalidSessionIdException) and self._alive():
+                            break
+                        print(f"Browser session lost at query {index}, starting a new one")
+                        self.stop()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                if count % SYNC_EVERY == 0:
+                    os.fsync(out.fileno())
+                records.append(record)
+                status = f"{record['cards']} cards" if record["ok"] else record["error"]
+                print(f"[{count}/{len(pending)}] {query!r}: {record.get('latency_ms', 0):.0f} ms, {status}")
+        self.elapsed = time.perf_counter() - start_time
+        return records
+
+    def _alive(self):
+        try:
+            self.driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+
+def report(records, elapsed, mode):
+    print(f"\n----- BATCH QUERIES ({mode}) -----")
+    if not records:
+        print("Nothing to do, every query is already recorded")
+        print("-" * 33)
+        return
+    ok = [record for record in records if record["ok"]]
+    latencies = sorted(record["latency_ms"] for record in ok)
+    print(f"Queries: {len(records)} run, {len(ok)} ok, {len(records) - len(ok)} failed "
+          f"in {elapsed:.1f} seconds ({len(records) / elapsed * 60:.0f} queries/min)")
+    if latencies:
+        print(f"Latency: p50 {percentile(latencies, 50):.0f} / p90 {percentile(latencies, 90):.0f} / "
+              f"p99 {percentile(latencies, 99):.0f} / max {latencies[-1]:.0f} ms")
+        print(f"Empty result pages: {sum(1 for record in ok if not record['cards'])}")
+    print("-" * 33)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("queries", help="file with one search query per line")
+    parser.add_argument("--out", default="batch_results.jsonl", help="JSON-lines output, also the checkpoint")
+    parser.add_argument("--mode", choices=MODES, default="url")
+    parser.add_argument("--top", type=int, default=3, help="cards recorded per query")
+    parser.add_argument("--timeout", type=float, default=15, help="seconds to wait for a results page")
+    parser.add_argument("--limit", type=int, default=None, help="run at most this many pending queries")
+    parser.add_argument("--fresh", action="store_true", help="ignore and overwrite an existing --out")
+    parser.add_argument("--base-url", default=None, help="site to search, e.g. a local fixture server")
+    args = parser.parse_args()
+
+    queries = read_queries(args.queries)
+    runner = BatchRunner(args.mode, args.base_url, timeout=args.timeout, top=args.top)
+    try:
+        records = runner.run(queries, args.out, fresh=args.fresh, limit=args.limit)
+    finally:
+        runner.stop()
+    report(records, runner.elapsed, args.mode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Compare ways of scraping every product card of a saved search results page.
+
+    per-element   find_elements/get_attribute from Python, one round trip per lookup
+    columns       extract_columns(): one execute_script call, parallel arrays
+    page-source   driver.page_source parsed with lxml (parse_page_source)
+
+The page is a saved HTML file opened over file://, so the numbers measure
+extraction only, not the network. Without --page the 60-card fixture search
+page is rendered and saved first. Every mode must agree with the columns
+result; differences are counted per field.
+
+    python bench_extractor.py
+    python bench_extractor.py --page saved_search.html --runs 30
+    python bench_extractor.py --offline        # lxml only, no browser
+"""
+import argparse
+import math
+import os
+import pathlib
+import sys
+import tempfile
+
+from selenium.webdriver.common.by import By
+
+import browser
+import fixture_server
+import product_extractor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from harness.benchmark import run_benchmark
+
+
+def save_fixture_page(path):
+    page_html = fixture_server.FixtureSite().render_search("bench", "wireless headphones", "relevanceblender")
+    pathlib.Path(path).write_text(page_html, encoding="utf-8")
+    return path
+
+
+def _cascade(card, selectors):
+    for selector in selectors:
+        for element in card.find_elements(By.CSS_SELECTOR, selector):
+            value = " ".join((element.get_attribute("textContent") or "").split())
+            if value:
+                return value, selector
+    return None, None
+
+
+def per_element(driver):
+    """The cascade walked from Python, as the scripts used to do it"""
+    columns = {name: [] for name in product_extractor.COLUMNS}
+    for card in driver.find_elements(By.CSS_SELECTOR, product_extractor.RESULT_CARD_SELECTOR):
+        columns["asin"].append(card.get_attribute("data-asin") or None)
+        columns["name"].append(_cascade(card, product_extractor.NAME_SELECTORS)[0])
+        price, price_selector = _cascade(card, product_extractor.PRICE_SELECTORS)
+        if price and price_selector == ".a-price-whole":
+            price = "₹" + price
+        columns["price_text"].append(price)
+        columns["price"].append(product_extractor._number(price))
+        columns["rating"].append(product_extractor._number(_cascade(card, product_extractor.RATING_SELECTORS)[0]))
+        columns["reviews"].append(product_extractor._count(_cascade(card, product_extractor.REVIEW_SELECTORS)[0]))
+        columns["sponsored"].append(any(card.find_elements(By.CSS_SELECTOR, selector)
+                                        for selector in product_extractor.SPONSORED_SELECTORS))
+    return {"columns": columns, "card_count": len(columns["asin"])}
+
+
+def page_source(driver):
+    return product_extractor.parse_page_source(driver.page_source)
+
+
+MODES = {
+    "per-element": per_element,
+    "columns": product_extractor.extract_columns,
+    "page-source": page_source,
+}
+
+
+def discard(extract, argument):
+    """Flow for run_benchmark, which would take a returned value for the measured duration"""
+    def flow():
+        extract(argument)
+    return flow
+
+
+def differences(expected, actual):
+    """Number of differing values per column"""
+    diff = {}
+    for name in product_extractor.COLUMNS:
+        left, right = expected["columns"][name], actual["columns"][name]
+        count = abs(len(left) - len(right))
+        for a, b in zip(left, right):
+            if a != b and not (isinstance(a, float) and isinstance(b, float) and math.isclose(a, b)):
+                count += 1
+        if count:
+            diff[name] = count
+    return diff
+
+
+def print_summary(result):
+    columns = result["columns"]
+    prices = [value for value in columns["price"] if value is not None]
+    ratings = [value for value in columns["rating"] if value is not None]
+    print(f"{result['card_count']} cards, {sum(columns['sponsored'])} sponsored, "
+          f"{len(prices)} priced (min {min(prices, default=0):.0f}, max {max(prices, default=0):.0f}), "
+          f"{len(ratings)} rated, {sum(1 for value in columns['reviews'] if value is not None)} with reviews")
+    if product_extractor.np is not None:
+        records = product_extractor.to_record_array(columns)
+        print(f"Record array: {records.shape[0]} x {records.dtype}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modes", nargs="*", metavar="mode", help=f"one of {', '.join(MODES)} (default: all)")
+    parser.add_argument("--page", help="saved search results HTML (default: rendered fixture page)")
+    parser.add_argument("--runs", type=int, default=20, help="maximum measured runs per mode")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--rel-ci", type=float, default=0.05,
+                        help="stop once the CI half-width is this fraction of the mean (0 = never)")
+    parser.add_argument("--offline", action="store_true", help="only parse the saved page with lxml, no browser")
+    args = parser.parse_args()
+    for name in args.modes:
+        if name not in MODES:
+            parser.error(f"unknown mode '{name}', choose from {', '.join(MODES)}")
+
+    with tempfile.TemporaryDirectory() as page_dir:
+        page = args.page or save_fixture_page(os.path.join(page_dir, "search.html"))
+        if args.offline:
+            page_html = pathlib.Path(page).read_text(encoding="utf-8")
+            print_summary(product_extractor.parse_page_source(page_html))
+            result = run_benchmark(discard(product_extractor.parse_page_source, page_html), runs=args.runs,
+                                   warmup=args.warmup, rel_ci=args.rel_ci, name="page-source (offline)",
+                                   verbose=False)
+            result.report()
+            return
+
+        driver = browser.create_chrome_driver()
+        results = []
+        try:
+            driver.get(pathlib.Path(page).resolve().as_uri())
+            reference = product_extractor.extract_columns(driver)
+            print_summary(reference)
+            for name in args.modes or MODES:
+                mode = MODES[name]
+                diff = differences(reference, mode(driver))
+                print(f"\n=== Benchmarking {name} ===" +
+                      (f" (differs from columns: {diff})" if diff else ""))
+                results.append(run_benchmark(discard(mode, driver), runs=args.runs, warmup=args.warmup,
+                                             rel_ci=args.rel_ci, name=name))
+        finally:
+            driver.quit()
+
+    for result in results:
+        result.report()
+    print(f"\n----- EXTRACTION ({reference['card_count']} cards) -----")
+    for result in results:
+        if result.samples:
+            print(f"{result.name:12} {result.mean * 1000:9.1f} ms  "
+                  f"{result.mean * 1000 / max(1, reference['card_count']):7.2f} ms/card")
+    print("-" * 40)
+
+
+if __name__ == "__main__":
+    main()
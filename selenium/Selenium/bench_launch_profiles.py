@@ -0,0 +1,155 @@
+"""
+Compare Chrome startup time and memory between launch profiles.
+
+For each profile, starts Chrome --launches times and measures the time until
+the session is ready plus the first page load. It then sums the resident
+memory of chromedriver and every process it started. psutil is used when it
+is installed, otherwise /proc on Linux.
+
+    python bench_launch_profiles.py
+    python bench_launch_profiles.py windowed ci --launches 5 --url about:blank
+    AMAZON_BASE_URL=fixture python bench_launch_profiles.py
+
+RSS counts shared pages once per process, so treat the totals as a
+comparison between profiles rather than the exact memory cost.
+"""
+import argparse
+import os
+import statistics
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+import browser
+import launch_profiles
+
+
+def _proc_children(pid):
+    """All descendants of pid, read from /proc (Linux without psutil)"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces, so split after its closing parenthesis
+                fields = f.read().rsplit(")", 1)[1].split()
+            parents.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError):
+            continue
+    found, stack = [], [pid]
+    while stack:
+        for child in parents.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def _proc_rss(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def process_tree_rss(pid):
+    """(process count, total RSS in bytes) for pid and all its descendants, or (0, None)"""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return 0, None
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return len(processes), total
+    if os.path.isdir("/proc"):
+        pids = [pid] + _proc_children(pid)
+        return len(pids), sum(_proc_rss(p) for p in pids)
+    return 0, None
+
+
+def launch_once(profile, url, settle):
+    options = browser.chrome_options(profile)
+    start_time = time.perf_counter()
+    driver = browser.create_chrome_driver(options)
+    ready = time.perf_counter() - start_time
+    try:
+        page_start = time.perf_counter()
+        driver.get(url)
+        first_load = time.perf_counter() - page_start
+        # Let startup work (component loaders, extensions) finish before sampling memory
+        time.sleep(settle)
+        service = getattr(driver, "service", None)
+        pid = service.process.pid if service and service.process else None
+        processes, rss = process_tree_rss(pid) if pid else (0, None)
+    finally:
+        quit_start = time.perf_counter()
+        driver.quit()
+        quit_time = time.perf_counter() - quit_start
+    return {"ready": ready, "first_load": first_load, "quit": quit_time, "processes": processes, "rss": rss}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("profiles", nargs="*", default=list(launch_profiles.PROFILES),
+                        help="profile names or comma-separated feature lists")
+    parser.add_argument("--launches", type=int, default=3, help="launches per profile")
+    parser.add_argument("--url", default=None, help="first page to load (default: the site under test)")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to wait before sampling memory")
+    args = parser.parse_args()
+
+    for profile in args.profiles:
+        launch_profiles.features(profile)
+    url = args.url or browser.base_url()
+    if psutil is None:
+        print("psutil not installed, reading memory from /proc" if os.path.isdir("/proc")
+              else "psutil not installed, memory will not be reported")
+
+    rows = []
+    for profile in args.profiles:
+        samples = []
+        for i in range(args.launches):
+            sample = launch_once(profile, url, args.settle)
+            samples.append(sample)
+            rss = f"{sample['rss'] / 2 ** 20:.0f} MiB" if sample["rss"] is not None else "n/a"
+            print(f"{profile} #{i + 1}: ready {sample['ready']:.2f} s, first load {sample['first_load']:.2f} s, "
+                  f"{sample['processes']} processes, {rss}")
+        rss_values = [s["rss"] for s in samples if s["rss"] is not None]
+        rows.append({
+            "profile": profile,
+            "ready": statistics.median(s["ready"] for s in samples),
+            "first_load": statistics.median(s["first_load"] for s in samples),
+            "quit": statistics.median(s["quit"] for s in samples),
+            "processes": statistics.median(s["processes"] for s in samples),
+            "rss": statistics.median(rss_values) if rss_values else None,
+        })
+
+    print(f"\n----- LAUNCH PROFILE BENCHMARK (median of {args.launches}) -----")
+    print(f"{'profile':24} {'ready (s)':>10} {'first load':>11} {'quit (s)':>9} {'procs':>6} {'RSS (MiB)':>10}")
+    for row in rows:
+        rss = f"{row['rss'] / 2 ** 20:10.0f}" if row["rss"] is not None else f"{'n/a':>10}"
+        print(f"{row['profile'][:24]:24} {row['ready']:10.2f} {row['first_load']:11.2f} {row['quit']:9.2f} "
+              f"{row['processes']:6.0f} {rss}")
+    baseline = rows[0]
+    for row in rows[1:]:
+        line = f"{row['profile']} vs {baseline['profile']}: startup {baseline['ready'] - row['ready']:+.2f} s saved"
+        if row["rss"] is not None and baseline["rss"] is not None:
+            line += f", {(baseline['rss'] - row['rss']) / 2 ** 20:+.0f} MiB RSS saved"
+        print(line)
+    print("-" * 40)
+
+
+if __name__ == "__main__":
+    main()
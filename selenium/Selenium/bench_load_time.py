@@ -0,0 +1,83 @@
+"""
+Repeat the homepage and search load-time flows and report their statistics.
+
+Each flow runs a few warmup times and then up to --runs measured times in one
+Chrome session, stopping early once the confidence interval of the mean is
+within --rel-ci. Point --base-url at a local fixture server for runs that do
+not depend on the live site.
+
+    python bench_load_time.py
+    python bench_load_time.py homepage --runs 50 --warmup 3 --rel-ci 0.02
+    python bench_load_time.py --base-url http://127.0.0.1:8000
+    AMAZON_BASE_URL=fixture python bench_load_time.py
+"""
+import argparse
+import os
+import sys
+
+import browser
+import load_time_test
+import WirelessheadphoneSearch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from harness.benchmark import run_benchmark
+
+
+def homepage_flow(driver, base_url):
+    def flow():
+        load_time_test.load_homepage(driver, base_url)
+    flow.__name__ = "homepage_load"
+    return flow, None
+
+
+def search_flow(driver, base_url):
+    """Only the search is timed; opening the homepage is the untimed setup"""
+    state = {}
+
+    def setup():
+        state["search_box"] = WirelessheadphoneSearch.open_search_box(driver, base_url)
+
+    def flow():
+        WirelessheadphoneSearch.search(driver, state["search_box"])
+    flow.__name__ = "search"
+    return flow, setup
+
+
+FLOWS = {
+    "homepage": homepage_flow,
+    "search": search_flow,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("flows", nargs="*", metavar="flow", help=f"one of {', '.join(FLOWS)} (default: all)")
+    parser.add_argument("--runs", type=int, default=20, help="maximum measured runs per flow")
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured runs before sampling")
+    parser.add_argument("--min-runs", type=int, default=5)
+    parser.add_argument("--rel-ci", type=float, default=0.05,
+                        help="stop once the CI half-width is this fraction of the mean (0 = never)")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--base-url", default=None, help="site to test, e.g. a local fixture server")
+    args = parser.parse_args()
+    for name in args.flows:
+        if name not in FLOWS:
+            parser.error(f"unknown flow '{name}', choose from {', '.join(FLOWS)}")
+
+    driver = browser.create_chrome_driver()
+    try:
+        results = []
+        for name in args.flows or FLOWS:
+            flow, setup = FLOWS[name](driver, args.base_url)
+            print(f"\n=== Benchmarking {flow.__name__} ===")
+            results.append(run_benchmark(flow, runs=args.runs, warmup=args.warmup, min_runs=args.min_runs,
+                                         rel_ci=args.rel_ci, confidence=args.confidence, setup=setup))
+    finally:
+        driver.quit()
+
+    for result in results:
+        result.report()
+
+
+if __name__ == "__main__":
+    main()
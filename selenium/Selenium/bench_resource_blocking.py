@@ -0,0 +1,91 @@
+"""
+Measure the bytes and time resource blocking saves on a page load.
+
+Loads the search results page (or the homepage) with and without the
+functional blocking patterns, alternating the two modes so drift in the
+network affects both equally. The browser cache is disabled, so every run
+downloads the page from scratch. Bytes and request counts come from the
+DevTools performance log through network_recorder.
+
+    python bench_resource_blocking.py
+    python bench_resource_blocking.py --runs 10 --page home
+    AMAZON_BASE_URL=fixture python bench_resource_blocking.py
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import browser
+import network_recorder
+import resource_blocking
+
+PAGES = {
+    "search": ("/s?k=wireless+headphones", (By.CSS_SELECTOR, "div[data-component-type='s-search-result']")),
+    "home": ("/", (By.ID, "twotabsearchtextbox")),
+}
+
+
+def load_once(driver, url, locator, purpose, har_path):
+    resource_blocking.apply(driver, purpose=purpose)
+    recorder = network_recorder.NetworkRecorder(driver, har_path).start()
+    start_time = time.perf_counter()
+    driver.get(url)
+    WebDriverWait(driver, 30).until(EC.presence_of_element_located(locator))
+    elapsed = time.perf_counter() - start_time
+    summary = recorder.stop(verbose=False)
+    return {"seconds": elapsed, "bytes": summary["transfer_bytes"], "requests": summary["requests"],
+            "failed": summary["failed"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="runs per mode")
+    parser.add_argument("--page", choices=sorted(PAGES), default="search")
+    args = parser.parse_args()
+
+    path, locator = PAGES[args.page]
+    url = browser.base_url() + path
+    driver = browser.create_chrome_driver(network_recorder.enable_logging(browser.chrome_options()))
+    samples = {"measurement": [], "functional": []}
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+        with tempfile.TemporaryDirectory() as har_dir:
+            for i in range(args.runs):
+                # Alternate which mode goes first so neither always runs on a warmer connection
+                modes = ("measurement", "functional") if i % 2 == 0 else ("functional", "measurement")
+                for purpose in modes:
+                    result = load_once(driver, url, locator, purpose, os.path.join(har_dir, f"{purpose}-{i}.har"))
+                    samples[purpose].append(result)
+                full, blocked = samples["measurement"][-1], samples["functional"][-1]
+                print(f"Run {i + 1}: full {full['seconds']:.2f} s / {full['bytes'] / 1024:.0f} KiB / "
+                      f"{full['requests']} requests, blocked {blocked['seconds']:.2f} s / "
+                      f"{blocked['bytes'] / 1024:.0f} KiB / {blocked['requests']} requests "
+                      f"-> saved {(full['bytes'] - blocked['bytes']) / 1024:.0f} KiB, "
+                      f"{full['seconds'] - blocked['seconds']:.2f} s")
+    finally:
+        driver.quit()
+
+    def mean(purpose, key):
+        return statistics.fmean(sample[key] for sample in samples[purpose])
+
+    print(f"\n----- RESOURCE BLOCKING BENCHMARK ({args.page}, {args.runs} runs per mode) -----")
+    for purpose, label in (("measurement", "Full fidelity"), ("functional", "Blocking")):
+        print(f"{label:14} {mean(purpose, 'seconds'):6.2f} s  {mean(purpose, 'bytes') / 1024:8.0f} KiB  "
+              f"{mean(purpose, 'requests'):6.1f} requests ({mean(purpose, 'failed'):.1f} blocked or failed)")
+    saved_bytes = mean("measurement", "bytes") - mean("functional", "bytes")
+    saved_time = mean("measurement", "seconds") - mean("functional", "seconds")
+    print(f"Saved per run: {saved_bytes / 1024:.0f} KiB "
+          f"({saved_bytes / max(1, mean('measurement', 'bytes')) * 100:.0f}%), "
+          f"{saved_time:.2f} s ({saved_time / mean('measurement', 'seconds') * 100:.0f}%)")
+    print("-" * 40)
+
+
+if __name__ == "__main__":
+    main()
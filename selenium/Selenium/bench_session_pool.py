@@ -0,0 +1,56 @@
+"""
+Compare Selenium suite wall-clock time with and without the Chrome session pool.
+
+    python bench_session_pool.py
+    python bench_session_pool.py --pool-size 2 --repeat 3 load_time_test WirelessheadphoneSearch
+"""
+import argparse
+import time
+import unittest
+
+import session_pool
+from suite_modules import DEFAULT_MODULES
+
+
+def run_suite(module_names, pool_size, max_uses):
+    """Run the given test modules once and return (wall time, result, pool stats)"""
+    pool = session_pool.configure(size=pool_size, max_uses=max_uses)
+    suite = unittest.defaultTestLoader.loadTestsFromNames(module_names)
+
+    start_time = time.perf_counter()
+    result = unittest.TextTestRunner(verbosity=0).run(suite)
+    elapsed = time.perf_counter() - start_time
+
+    stats = pool.stats()
+    pool.shutdown()
+    return elapsed, result, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--pool-size", type=int, default=1)
+    parser.add_argument("--max-uses", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=1, help="run the suite this many times per mode")
+    args = parser.parse_args()
+
+    timings = {"no pool": [], "pool": []}
+    for _ in range(args.repeat):
+        for mode, size in (("no pool", 0), ("pool", args.pool_size)):
+            print(f"\n=== Running suite ({mode}) ===")
+            elapsed, result, stats = run_suite(args.modules, size, args.max_uses)
+            timings[mode].append(elapsed)
+            print(f"{mode}: {result.testsRun} tests in {elapsed:.2f} seconds "
+                  f"({stats['created']} browsers started, warm-up {stats['warmup_time']:.2f} seconds)")
+
+    without_pool = min(timings["no pool"])
+    with_pool = min(timings["pool"])
+    print("\n----- SESSION POOL BENCHMARK -----")
+    print(f"Without pool: {without_pool:.2f} seconds (best of {args.repeat})")
+    print(f"With pool of {args.pool_size}: {with_pool:.2f} seconds (best of {args.repeat})")
+    print(f"Saved: {without_pool - with_pool:.2f} seconds ({without_pool / with_pool:.2f}x)")
+    print("----------------------------------")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import os
+import sys
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.common.driver_finder import DriverFinder
+
+import driver_resolver
+import launch_profiles
+import network_recorder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+BASE_URL = "https://www.amazon.in"
+DEFAULT_SEARCH_QUERY = "wireless headphones"
+# "async": sessions run on harness/async_webdriver.py instead of the Selenium client
+WEBDRIVER_CLIENT = os.environ.get("WEBDRIVER_CLIENT", "selenium")
+
+_fixture_server = None
+
+
+def base_url():
+    """
+    Site the tests run against: AMAZON_BASE_URL, or the live site when unset.
+
+    AMAZON_BASE_URL=fixture starts the local fixture server in this process
+    (once) and uses its address.
+    """
+    global _fixture_server
+    configured = os.environ.get("AMAZON_BASE_URL", "").strip()
+    if configured.lower() != "fixture":
+        return (configured or BASE_URL).rstrip("/")
+    if _fixture_server is None:
+        import fixture_server
+        _fixture_server = fixture_server.FixtureServer().start()
+        print(f"Started fixture server on {_fixture_server.url}")
+    return _fixture_server.url
+
+
+def search_query():
+    """Query the search tests use: SEARCH_QUERY, or wireless headphones when unset"""
+    return os.environ.get("SEARCH_QUERY", "").strip() or DEFAULT_SEARCH_QUERY
+
+
+def chrome_options(profile=None):
+    """Build the Chrome options shared by every Selenium test (profile: see launch_profiles.py)"""
+    options = ChromeOptions()
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    for argument in launch_profiles.arguments(profile):
+        options.add_argument(argument)
+    # Set per worker by parallel_runner.py: a private profile and a cap on renderer processes
+    if os.environ.get("CHROME_USER_DATA_DIR"):
+        options.add_argument(f"--user-data-dir={os.environ['CHROME_USER_DATA_DIR']}")
+    if os.environ.get("CHROME_RENDERER_PROCESS_LIMIT"):
+        options.add_argument(f"--renderer-process-limit={os.environ['CHROME_RENDERER_PROCESS_LIMIT']}")
+    if network_recorder.ENABLED:
+        network_recorder.enable_logging(options)
+    return options
+
+
+def create_chrome_driver(options=None):
+    """Start a fresh Chrome session"""
+    if options is None:
+        options = chrome_options()
+
+    try:
+        service = ChromeService(driver_resolver.resolve_chromedriver())
+    except driver_resolver.DriverResolutionError as e:
+        if driver_resolver.OFFLINE:
+            raise
+        # Fall back to Selenium Manager, which ships with selenium >= 4.6
+        print(f"{e}; falling back to Selenium Manager")
+        if WEBDRIVER_CLIENT != "async":
+            return webdriver.Chrome(options=options)
+        # What webdriver.Chrome does with Selenium Manager, for a session it does not own
+        service = ChromeService()
+        finder = DriverFinder(service, options)
+        if finder.get_browser_path():
+            options.binary_location = finder.get_browser_path()
+            options.browser_version = None
+        service.path = service.env_path() or finder.get_driver_path()
+
+    if WEBDRIVER_CLIENT == "async":
+        from harness.async_webdriver import SyncWebDriver
+        service.start()
+        try:
+            return SyncWebDriver.create(service.service_url, options.to_capabilities(), service=service)
+        except Exception:
+            service.stop()
+            raise
+    return webdriver.Chrome(service=service, options=options)
@@ -0,0 +1,210 @@
+"""
+Resolve the chromedriver binary once and reuse it across processes.
+
+ChromeDriverManager().install() probes the Chrome version and the network
+on every call. The resolver remembers the answer in an on-disk cache keyed
+by the local Chrome version; the installed Chrome binary is fingerprinted by
+path, size and mtime so later lookups are a file read plus one stat() and
+never spawn Chrome or touch the network. A file lock makes sure only one
+process does the slow install when the cache is cold.
+
+    CHROMEDRIVER_CACHE_DIR=...  where the cache lives (default ~/.cache/amazon-automated)
+    CHROMEDRIVER_OFFLINE=1      never download; fail immediately on a cache miss
+    CHROME_BINARY=...           Chrome executable to fingerprint
+
+Run `python driver_resolver.py` once to warm the cache, e.g. in a CI image.
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    from webdriver_manager.chrome import ChromeDriverManager
+except ImportError:
+    ChromeDriverManager = None
+
+CACHE_DIR = os.environ.get(
+    "CHROMEDRIVER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "amazon-automated"))
+OFFLINE = os.environ.get("CHROMEDRIVER_OFFLINE", "0") == "1"
+
+VERSION_PATTERN = re.compile(r"\d+\.\d+\.\d+\.\d+")
+
+_resolved = {}
+
+
+class DriverResolutionError(RuntimeError):
+    pass
+
+
+def _chrome_candidates():
+    if os.environ.get("CHROME_BINARY"):
+        return [os.environ["CHROME_BINARY"]]
+    if sys.platform == "win32":
+        roots = [os.environ.get(name) for name in ("PROGRAMFILES", "PROGRAMFILES(X86)", "LOCALAPPDATA")]
+        return [os.path.join(root, "Google", "Chrome", "Application", "chrome.exe") for root in roots if root]
+    if sys.platform == "darwin":
+        return ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"]
+    names = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"]
+    return [path for path in (shutil.which(name) for name in names) if path]
+
+
+def find_chrome_binary():
+    for path in _chrome_candidates():
+        if os.path.exists(path):
+            return os.path.realpath(path)
+    return None
+
+
+def chrome_version(binary):
+    """Read the installed Chrome version without starting a browser window"""
+    if sys.platform == "win32":
+        # chrome.exe --version prints nothing on Windows, but the install
+        # directory contains a folder named after the version
+        folder = os.path.dirname(binary)
+        versions = [name for name in os.listdir(folder) if VERSION_PATTERN.fullmatch(name)]
+        return max(versions, key=lambda v: [int(part) for part in v.split(".")]) if versions else None
+    try:
+        output = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = VERSION_PATTERN.search(output)
+    return match.group(0) if match else None
+
+
+def _fingerprint(binary):
+    stat = os.stat(binary)
+    return {"path": binary, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _cache_path():
+    return os.path.join(CACHE_DIR, "chromedriver.json")
+
+
+def _read_cache():
+    try:
+        with open(_cache_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"chrome": None, "drivers": {}}
+
+
+def _write_cache(cache):
+    # Write to a temp file and rename so readers never see a half-written cache
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=".chromedriver.", suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, _cache_path())
+
+
+@contextmanager
+def _file_lock(path, timeout=300):
+    with open(path, "a+") as lock_file:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if sys.platform == "win32":
+                    import msvcrt
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise DriverResolutionError(f"Timed out waiting for chromedriver cache lock {path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if sys.platform == "win32":
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _lookup(cache):
+    """Return the cached driver for the cached Chrome fingerprint, if it is still valid"""
+    chrome = cache.get("chrome")
+    if not chrome:
+        return None
+    if chrome.get("path"):
+        try:
+            if _fingerprint(chrome["path"]) != {key: chrome[key] for key in ("path", "size", "mtime_ns")}:
+                return None
+        except (OSError, KeyError):
+            return None
+    driver_path = cache.get("drivers", {}).get(chrome.get("version") or "unknown")
+    if driver_path and os.path.exists(driver_path):
+        return driver_path
+    return None
+
+
+def resolve_chromedriver(offline=None):
+    """Return the path of a chromedriver matching the local Chrome"""
+    offline = OFFLINE if offline is None else offline
+
+    if "path" in _resolved and os.path.exists(_resolved["path"]):
+        return _resolved["path"]
+
+    driver_path = _lookup(_read_cache())
+    if driver_path:
+        _resolved["path"] = driver_path
+        return driver_path
+
+    if offline:
+        # Fail fast: no version probing, no lock waiting, no network
+        raise DriverResolutionError(
+            f"No cached chromedriver in {CACHE_DIR} for the installed Chrome and offline mode is on. "
+            "Run `python driver_resolver.py` with network access first.")
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with _file_lock(os.path.join(CACHE_DIR, "chromedriver.lock")):
+        # Another process may have installed the driver while we waited for the lock
+        cache = _read_cache()
+        driver_path = _lookup(cache)
+        if driver_path:
+            _resolved["path"] = driver_path
+            return driver_path
+
+        binary = find_chrome_binary()
+        version = chrome_version(binary) if binary else None
+        if binary is None:
+            print("Could not find Chrome; chromedriver cache will not notice Chrome updates")
+
+        driver_path = cache.get("drivers", {}).get(version or "unknown")
+        if not driver_path or not os.path.exists(driver_path):
+            if ChromeDriverManager is None:
+                raise DriverResolutionError(
+                    "WebDriver Manager not installed. Please run: pip install webdriver-manager")
+            driver_path = ChromeDriverManager().install()
+
+        cache["chrome"] = dict(_fingerprint(binary), version=version) if binary else {"path": None, "version": None}
+        cache.setdefault("drivers", {})[version or "unknown"] = driver_path
+        _write_cache(cache)
+
+    _resolved["path"] = driver_path
+    return driver_path
+
+
+if __name__ == "__main__":
+    start_time = time.perf_counter()
+    path = resolve_chromedriver()
+    first = time.perf_counter() - start_time
+
+    _resolved.clear()
+    start_time = time.perf_counter()
+    resolve_chromedriver(offline=True)
+    cached = time.perf_counter() - start_time
+
+    print(f"chromedriver: {path}")
+    print(f"First resolution: {first * 1000:.2f} ms, cached resolution: {cached * 1000:.3f} ms")
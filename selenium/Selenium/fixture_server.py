@@ -0,0 +1,295 @@
+"""
+Local Amazon-like fixture server for network-free runs.
+
+Serves recorded versions of the pages the Selenium tests touch: the home
+page (nav-logo-sprites, twotabsearchtextbox), /s search results with 60
+s-search-result cards, the "Sort by:" dropdown whose s-result-sort-select
+anchors re-sort the results through the `s=` parameter, the p_36 price and
+p_72 rating refinements of `rh=` (see search_url.py), PAGE_COUNT result
+pages behind the s-pagination "Next" link (`page=`), and a cart whose
+nav-cart-count updates after "Add to cart". Every response can be delayed
+by a fixed latency plus uniform jitter.
+
+    python fixture_server.py --port 8000 --latency-ms 80 --jitter-ms 20
+    AMAZON_BASE_URL=http://127.0.0.1:8000 python -m unittest addToCart
+
+AMAZON_BASE_URL=fixture starts a server in-process instead (see browser.py).
+"""
+import argparse
+import html
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SORT_ORDERS = [
+    ("relevanceblender", "Featured"),
+    ("price-asc-rank", "Price: Low to High"),
+    ("price-desc-rank", "Price: High to Low"),
+    ("review-rank", "Avg. Customer Review"),
+    ("date-desc-rank", "Newest Arrivals"),
+]
+
+SORT_KEYS = {
+    "price-asc-rank": (lambda p: p["price"], False),
+    "price-desc-rank": (lambda p: p["price"], True),
+    "review-rank": (lambda p: (p["rating"], p["reviews"]), True),
+    "date-desc-rank": (lambda p: p["date_rank"], False),
+}
+
+PAGE_COUNT = 7
+
+SPONSORED_LABEL = '<span class="puis-label-popover s-sponsored-label-text">Sponsored</span>'
+
+
+def load_template(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return Template(f.read())
+
+
+def format_price(value):
+    """Indian digit grouping is the same as Western below one lakh, which covers the fixtures"""
+    return f"{value:,}"
+
+
+class FixtureSite:
+    """Renders the fixture pages and keeps one cart per session-id cookie"""
+
+    def __init__(self):
+        self.header = load_template("header.html")
+        self.home = load_template("home.html")
+        self.search = load_template("search.html")
+        self.card = load_template("card.html")
+        with open(os.path.join(FIXTURES, "script.html"), encoding="utf-8") as f:
+            self.script = f.read()
+        with open(os.path.join(FIXTURES, "products.json"), encoding="utf-8") as f:
+            self.products = json.load(f)
+        self.carts = {}
+        self.lock = threading.Lock()
+
+    def cart_count(self, session):
+        with self.lock:
+            return len(self.carts.get(session, []))
+
+    def add_to_cart(self, session, asin):
+        with self.lock:
+            self.carts.setdefault(session, []).append(asin)
+            return len(self.carts[session])
+
+    def render_header(self, session, query=""):
+        return self.header.substitute(query=html.escape(query), cart_count=self.cart_count(session))
+
+    def render_home(self, session):
+        return self.home.substitute(header=self.render_header(session), script=self.script)
+
+    def sorted_products(self, sort):
+        if sort not in SORT_KEYS:
+            return list(self.products)
+        key, reverse = SORT_KEYS[sort]
+        return sorted(self.products, key=key, reverse=reverse)
+
+    def refined_products(self, sort, rh=""):
+        if not rh:
+            return self.sorted_products(sort)
+        from search_url import parse_refinements
+        refinements = parse_refinements(rh)
+        low, high, stars = refinements["min_price"], refinements["max_price"], refinements["min_rating"]
+        return [product for product in self.sorted_products(sort)
+                if (low is None or product["price"] >= low) and (high is None or product["price"] <= high)
+                and (stars is None or product["rating"] >= stars)]
+
+    def page_products(self, sort, page, rh=""):
+        """The products of a result page; later pages reuse the catalog under page-specific ASINs"""
+        products = self.refined_products(sort, rh)
+        if page == 1:
+            return products
+        return [dict(product, asin=f"{product['asin'][:-2]}{page:02d}") for product in products]
+
+    def render_pagination(self, query_param, sort, page, rh=""):
+        refinement = f"&amp;rh={html.escape(rh)}" if rh else ""
+
+        def link(number, label, css=""):
+            href = f"/s?k={html.escape(query_param)}&amp;s={sort}{refinement}&amp;page={number}"
+            return f'<a class="s-pagination-item{css} s-pagination-button" href="{href}">{label}</a>'
+        items = [link(page - 1, "Previous", " s-pagination-previous")] if page > 1 else []
+        for number in range(1, PAGE_COUNT + 1):
+            if number == page:
+                items.append(f'<span class="s-pagination-item s-pagination-selected" '
+                             f'aria-current="page">{number}</span>')
+            else:
+                items.append(link(number, number))
+        if page < PAGE_COUNT:
+            items.append(link(page + 1, "Next", " s-pagination-next"))
+        else:
+            items.append('<span class="s-pagination-item s-pagination-next s-pagination-disabled">Next</span>')
+        return "\n".join(f"  {item}" for item in items)
+
+    def render_search(self, session, query, sort, page=1, rh=""):
+        page = min(max(page, 1), PAGE_COUNT)
+        query_param = query.replace(" ", "+")
+        refinement = f"&amp;rh={html.escape(rh)}" if rh else ""
+        sort_label = dict(SORT_ORDERS).get(sort, "Featured")
+        options = "\n".join(
+            f'    <li><a id="s-result-sort-select_{i}" class="a-dropdown-link" '
+            f'href="/s?k={html.escape(query_param)}&amp;s={value}{refinement}">{label}</a></li>'
+            for i, (value, label) in enumerate(SORT_ORDERS))
+        products = self.page_products(sort, page, rh)
+        first = (page - 1) * len(products) + 1
+        cards = "\n".join(self.render_card(index, product) for index, product in enumerate(products, start=first))
+        return self.search.substitute(
+            header=self.render_header(session, query), query=html.escape(query), sort_label=sort_label,
+            sort_options=options, cards=cards, first_result=first, last_result=first + len(products) - 1,
+            pagination=self.render_pagination(query_param, sort, page, rh), script=self.script)
+
+    def render_card(self, index, product):
+        return self.card.substitute(
+            asin=product["asin"], index=index, name=html.escape(product["name"]),
+            price=format_price(product["price"]), mrp=format_price(product["mrp"]),
+            rating=product["rating"], reviews=format_price(product["reviews"]),
+            sponsored=SPONSORED_LABEL if product["sponsored"] else "")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def session(self):
+        """Return (session id, is new); the session pool's cookie reset starts a fresh cart"""
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "session-id" and value:
+                return value, False
+        return uuid.uuid4().hex, True
+
+    def send(self, status, body, content_type="text/html; charset=utf-8", session=None):
+        self.server.delay()
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        if session:
+            self.send_header("Set-Cookie", f"session-id={session}; Path=/")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        session, new = self.session()
+        set_cookie = session if new else None
+        site = self.server.site
+
+        if url.path in ("/", "/index.html"):
+            self.send(200, site.render_home(session), session=set_cookie)
+        elif url.path == "/s":
+            query = params.get("k", [""])[0]
+            sort = params.get("s", ["relevanceblender"])[0]
+            try:
+                page = int(params.get("page", ["1"])[0])
+            except ValueError:
+                page = 1
+            rh = params.get("rh", [""])[0]
+            self.send(200, site.render_search(session, query, sort, page, rh), session=set_cookie)
+        elif url.path == "/cart/count":
+            self.send(200, json.dumps({"count": site.cart_count(session)}), "application/json", set_cookie)
+        elif url.path == "/favicon.ico":
+            self.send(204, "")
+        else:
+            self.send(404, "<!doctype html><title>Page Not Found</title><h1>Page not found</h1>")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        session, new = self.session()
+        if url.path == "/cart/add":
+            count = self.server.site.add_to_cart(session, body.strip())
+            self.send(200, json.dumps({"count": count}), "application/json", session if new else None)
+        else:
+            self.send(404, json.dumps({"error": "not found"}), "application/json")
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=None, jitter_ms=None, seed=None, verbose=False):
+        super().__init__((host, port), FixtureHandler)
+        if latency_ms is None:
+            latency_ms = float(os.environ.get("FIXTURE_LATENCY_MS", "0"))
+        if jitter_ms is None:
+            jitter_ms = float(os.environ.get("FIXTURE_JITTER_MS", "0"))
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.verbose = verbose
+        self.site = FixtureSite()
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self):
+        """Sleep for the configured latency plus uniform jitter in [-jitter, +jitter]"""
+        if not self.latency and not self.jitter:
+            return
+        with self.random_lock:
+            jitter = self.random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, self.latency + jitter))
+
+    def start(self):
+        """Serve from a daemon thread and return self"""
+        self.thread = threading.Thread(target=self.serve_forever, name="fixture-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self.thread:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=None, help="added to every response (FIXTURE_LATENCY_MS)")
+    parser.add_argument("--jitter-ms", type=float, default=None, help="uniform +/- jitter (FIXTURE_JITTER_MS)")
+    parser.add_argument("--seed", type=int, default=None, help="seed the jitter for repeatable runs")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    server = FixtureServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.seed, args.verbose)
+    print(f"Serving fixtures on {server.url} "
+          f"(latency {server.latency * 1000:.0f} ms, jitter +/- {server.jitter * 1000:.0f} ms)")
+    print(f"Point the tests at it with AMAZON_BASE_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,5 @@
+import sys
 import unittest
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
@@ -10,94 +7,56 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import ElementClickInterceptedException, TimeoutException
 import os
 
+import browser
+import network_recorder
+import product_extractor
+import resource_blocking
+import search_url
+import session_pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from harness.timing import Timer, driver_context
+
+SEARCH_QUERY = browser.search_query()
+
+
 class AmazonAddToCartTest(unittest.TestCase):
     
     def setUp(self):
-        options = ChromeOptions()
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--start-maximized")
-        
-        try:
-            from webdriver_manager.chrome import ChromeDriverManager
-            service = ChromeService(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=options)
-        except ImportError:
-            print("WebDriver Manager not installed! Install it with pip install webdriver-manager")
-            exit(1)
-        
+        self.driver = session_pool.acquire()
+        self.timer = Timer(self.id(), context=driver_context(self.driver))
+        self.network = network_recorder.record(self.driver, self.id())
+        # Only DOM results matter here, so skip images, fonts, media, ads and trackers
+        self.blocked_patterns = resource_blocking.apply(self.driver)
         self.wait = WebDriverWait(self.driver, 10)
     
     def get_product_details(self, first_product):
-        product_name = "Name not found"
-        product_price = "Price not found"
-        
-        name_selectors = [
-            "h2 a span",
-            ".a-size-medium.a-color-base.a-text-normal",
-            ".a-size-base-plus.a-color-base.a-text-normal",
-            "h2 .a-link-normal span",
-            "h2 a",
-            "h2"
-        ]
-        
-        for selector in name_selectors:
-            try:
-                elements = first_product.find_elements(By.CSS_SELECTOR, selector)
-                if elements:
-                    product_name = elements[0].text.strip()
-                    if product_name:
-                        #print(f"Found product name: {product_name}")
-                        break
-            except Exception:
-                continue
-        
-        price_selectors = [
-            ".a-price .a-offscreen",
-            "span.a-price span.a-offscreen",
-            ".a-price-whole",
-            ".a-color-price",
-            ".a-price"
-        ]
-        
-        for selector in price_selectors:
-            try:
-                elements = first_product.find_elements(By.CSS_SELECTOR, selector)
-                if elements:
-                    price_element = elements[0]
-                    if "a-offscreen" in selector:
-                        product_price = price_element.get_attribute("innerHTML").strip()
-                    else:
-                        product_price = price_element.text.strip()
-                        if selector == ".a-price-whole":
-                            product_price = "₹" + product_price
-                    if product_price:
-                        #print(f"Found price: {product_price}")
-                        break
-            except Exception:
-                continue
+        # One script call walks the whole name/price selector cascade inside the page
+        record = product_extractor.extract_product(self.driver, first_product)
+        product_name = record["name"] or "Name not found"
+        product_price = record["price"] or "Price not found"
         
         return product_name, product_price
     
-    def test_add_to_cart_time(self):
+    def search_and_sort(self):
+        """Search from the home page and sort with the "Sort by:" dropdown; returns the running span"""
         driver = self.driver
         wait = self.wait
         
-        print("Starting Amazon highest rated product test...")
-        
         print("Opening Amazon website...")
-        driver.get("https://www.amazon.in")
+        driver.get(browser.base_url())
         
-        print("Searching for wireless headphones...")
+        print(f"Searching for {SEARCH_QUERY}...")
         search_box = wait.until(EC.presence_of_element_located((By.ID, "twotabsearchtextbox")))
         search_box.clear()
-        search_box.send_keys("wireless headphones")
+        search_box.send_keys(SEARCH_QUERY)
         search_box.send_keys(Keys.RETURN)
         
-        wait.until(EC.title_contains("wireless headphones"))
+        wait.until(EC.title_contains(SEARCH_QUERY))
         
         print("Sorting by highest customer ratings...")
         
-        start_time = time.time()
+        filter_to_details_span = self.timer.start("filter_to_details")
         
         try:
             sort_dropdown = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "[aria-label='Sort by:']")))
@@ -113,7 +72,21 @@ class AmazonAddToCartTest(unittest.TestCase):
         
         except Exception as e:
             print("Couldn't use dropdown")
-            
+        
+        return filter_to_details_span
+    
+    def test_add_to_cart_time(self):
+        driver = self.driver
+        wait = self.wait
+        
+        print("Starting Amazon highest rated product test...")
+        
+        if search_url.SORT_PATH == "url":
+            print("Opening the results sorted by customer rating...")
+            filter_to_details_span = self.timer.start("filter_to_details", path="url")
+            search_url.open_results(driver, search_url.build(SEARCH_QUERY, sort="review-rank"))
+        else:
+            filter_to_details_span = self.search_and_sort()
         
         wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-component-type='s-search-result']")))
         #time.sleep(2)
@@ -121,15 +94,17 @@ class AmazonAddToCartTest(unittest.TestCase):
         
         product_name, product_price = self.get_product_details(first_product)
         
-        end_time = time.time()
-        filter_to_details_time = end_time - start_time
+        filter_to_details_span.stop()
         
         print(f"\nProduct: {product_name}")
         print(f"Price: {product_price}")
-        print(f"Time from applying filter to getting product details: {filter_to_details_time:.2f} seconds")
     
     def tearDown(self):
-        self.driver.quit()
+        self.timer.report()
+        if self.network:
+            self.network.stop()
+        resource_blocking.clear(self.driver)
+        session_pool.release(self.driver)
 
 if __name__ == "__main__":    
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Named Chrome launch profiles.
+
+browser.chrome_options() builds every test's Chrome from the profile in
+CHROME_PROFILE. A profile is a list of features, each a group of Chrome
+switches; CHROME_PROFILE also accepts a comma-separated feature list.
+
+    CHROME_PROFILE=windowed    full windowed Chrome, maximized (default)
+    CHROME_PROFILE=headless    new headless mode, fixed 1366x768 viewport
+    CHROME_PROFILE=ci          headless plus every low-footprint feature
+    CHROME_PROFILE=headless-new,small-viewport,shared-cache
+
+shared-cache points the HTTP disk cache at CHROME_SHARED_CACHE_DIR so runs
+start warm. It is opt-in only: no profile includes it. GPU shader caches
+live inside the profile directory and can't be moved separately. Don't use
+shared-cache for cold-load measurements, with parallel_runner.py (Chrome
+can't share a cache directory between running browsers) or without
+CHROME_POOL_CLEAR_CACHE=0 (the pool wipes the cache after every test).
+"""
+import os
+
+SHARED_CACHE_DIR = os.environ.get(
+    "CHROME_SHARED_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "amazon-automated", "chrome-cache"))
+
+FEATURES = {
+    "maximized": ["--start-maximized"],
+    "headless-new": ["--headless=new"],
+    "small-viewport": ["--window-size=1366,768"],
+    "minimal-extensions": [
+        "--disable-extensions",
+        "--disable-component-extensions-with-background-pages",
+        "--disable-default-apps",
+    ],
+    "no-background-networking": [
+        "--disable-background-networking",
+        "--disable-component-update",
+        "--disable-domain-reliability",
+        "--disable-sync",
+        "--metrics-recording-only",
+        "--no-default-browser-check",
+        "--no-first-run",
+    ],
+    "low-memory": [
+        "--disable-dev-shm-usage",
+        "--disable-features=Translate,OptimizationHints,MediaRouter",
+        "--mute-audio",
+    ],
+    "shared-cache": lambda: [f"--disk-cache-dir={SHARED_CACHE_DIR}"],
+}
+
+PROFILES = {
+    "windowed": ["maximized"],
+    "headless": ["headless-new", "small-viewport"],
+    "ci": ["headless-new", "small-viewport", "minimal-extensions", "no-background-networking", "low-memory"],
+}
+
+DEFAULT_PROFILE = "windowed"
+
+
+def features(profile=None):
+    """Feature names for a profile name or a comma-separated feature list"""
+    profile = (profile or os.environ.get("CHROME_PROFILE") or DEFAULT_PROFILE).strip()
+    if profile in PROFILES:
+        return PROFILES[profile]
+    names = [name.strip() for name in profile.split(",") if name.strip()]
+    unknown = [name for name in names if name not in FEATURES]
+    if unknown:
+        raise ValueError(f"Unknown Chrome profile or feature '{', '.join(unknown)}'. "
+                         f"Profiles: {', '.join(PROFILES)}; features: {', '.join(FEATURES)}")
+    return names
+
+
+def arguments(profile=None):
+    """Chrome switches for the profile, in feature order"""
+    args = []
+    for name in features(profile):
+        feature = FEATURES[name]
+        args.extend(feature() if callable(feature) else feature)
+    return args
@@ -1,47 +1,55 @@
+import os
+import sys
 import unittest
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+import browser
+import network_recorder
+import page_metrics
+import session_pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from harness.timing import Timer, driver_context
+
+
+def load_homepage(driver, base_url=None, timeout=30):
+    """Open the homepage and wait until the logo and the search box are ready"""
+    wait = WebDriverWait(driver, timeout)
+    driver.get(base_url or browser.base_url())
+    wait.until(EC.presence_of_element_located((By.ID, "nav-logo-sprites")))
+    wait.until(EC.element_to_be_clickable((By.ID, "twotabsearchtextbox")))
+
+
 class AmazonLoadTimeTest(unittest.TestCase):
 
     def setUp(self):
-        options = ChromeOptions()
-        options.add_argument("--start-maximized")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        
-        try:
-            from webdriver_manager.chrome import ChromeDriverManager
-            service = ChromeService(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=options)
-        except ImportError:
-            print("WebDriver Manager not installed.")
+        self.driver = session_pool.acquire()
+        self.timer = Timer(self.id(), context=driver_context(self.driver))
+        self.network = network_recorder.record(self.driver, self.id())
 
     def test_amazon_homepage_load_time(self):
-        driver = self.driver
-        wait = WebDriverWait(driver, 30)
-        
         print("Starting Amazon homepage test")
         
-        start_time = time.time()
+        load_span = self.timer.start("homepage_load")
         
         print("Opening Amazon website...")
-        driver.get("https://www.amazon.in")
-        
-        wait.until(EC.presence_of_element_located((By.ID, "nav-logo-sprites")))
-        wait.until(EC.element_to_be_clickable((By.ID, "twotabsearchtextbox")))
+        load_homepage(self.driver)
         
-        end_time = time.time()
-        load_time = end_time - start_time
+        load_span.stop()
         
-        print(f"Amazon.in loaded in {load_time:.2f} seconds")
+        # The browser's own view of the same load, recorded beside the harness time
+        metrics_span = self.timer.start("page_metrics")
+        summary = page_metrics.compare(page_metrics.collect(self.driver), load_span.seconds)
+        metrics_span.stop(**summary)
+        page_metrics.print_comparison(summary)
 
     def tearDown(self):
-        self.driver.quit()
+        self.timer.report()
+        if self.network:
+            self.network.stop()
+        session_pool.release(self.driver)
         print("Test finished")
 
 if __name__ == "__main__":
@@ -1,116 +1,79 @@
+import os
+import sys
 import unittest
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import ElementClickInterceptedException, TimeoutException
 
-try:
-    from webdriver_manager.chrome import ChromeDriverManager
-except ImportError:
-    print("WebDriver Manager not installed!")
+import browser
+import network_recorder
+import product_extractor
+import search_url
+import session_pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from harness.timing import Timer, driver_context
+
+SEARCH_QUERY = browser.search_query()
 
 
 class AmazonLowestPriceSearch(unittest.TestCase):
     
     def setUp(self):
-        options = ChromeOptions()
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--start-maximized")
-        
-        service = ChromeService(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
+        self.driver = session_pool.acquire()
+        self.timer = Timer(self.id(), context=driver_context(self.driver))
+        self.network = network_recorder.record(self.driver, self.id())
         self.wait = WebDriverWait(self.driver, 10)
-        self.filter_start_time = None
+        self.filter_to_name_span = None
     
     def get_first_product_details(self):
         try:
             print("Finding product information...")
-            start_time = time.time()
+            retrieval_span = self.timer.start("data_retrieval")
             
             self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-component-type='s-search-result']")))
             
-            first_product = self.driver.find_element(By.CSS_SELECTOR, "div[data-component-type='s-search-result']")
+            # One script call reads the first card and every other result card on the page
+            results = product_extractor.extract_search_results(self.driver)
+            first_product = results["first"] or {}
             
-            product_name = "Name not found"
-            name_selectors = [
-                "h2 a span",
-                ".a-size-medium.a-color-base.a-text-normal",
-                ".a-size-base-plus.a-color-base.a-text-normal",
-                "h2 .a-link-normal span",
-                "h2 a",
-                "h2"
-            ]
-            
-            for selector in name_selectors:
-                try:
-                    elements = first_product.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        product_name = elements[0].text.strip()
-                        if product_name:
-                            print(f"Found product name: {product_name}")
-                            
-                            if hasattr(self, 'filter_start_time') and self.filter_start_time:
-                                filter_to_name_time = time.time() - self.filter_start_time
-                            
-                            break
-                except Exception:
-                    continue
+            product_name = first_product.get("name") or "Name not found"
+            if first_product.get("name"):
+                print(f"Found product name: {product_name}")
+                
+                if self.filter_to_name_span:
+                    self.filter_to_name_span.stop()
             
-            product_price = "Price not found"
-            price_selectors = [
-                ".a-price .a-offscreen",
-                "span.a-price span.a-offscreen",
-                ".a-price-whole",
-                ".a-color-price",
-                ".a-price"
-            ]
+            product_price = first_product.get("price") or "Price not found"
+            if first_product.get("price"):
+                print(f"Found price: {product_price}")
             
-            end_time = time.time()
-            data_retrieval_time = end_time - start_time
-
-            for selector in price_selectors:
-                try:
-                    elements = first_product.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        price_element = elements[0]
-                        if "a-offscreen" in selector:
-                            product_price = price_element.get_attribute("innerHTML").strip()
-                        else:
-                            product_price = price_element.text.strip()
-                            if selector == ".a-price-whole":
-                                product_price = "₹" + product_price
-                        if product_price:
-                            print(f"Found price: {product_price}")
-                            break
-                except Exception:
-                    continue
+            retrieval_span.stop(cards=results["card_count"], script_ms=round(results["script_ms"], 1),
+                                round_trip_ms=round(results["round_trip_ms"], 1))
             
             print(f"\nProduct: {product_name}")
             print(f"Price: {product_price}")
-            print(f"Data retrieved in {data_retrieval_time:.2f} seconds")
             
         except Exception as e:
             print(f"Error finding product information: {e}")
             self.driver.save_screenshot("error_state.png")
     
-    def test_lowest_priced_wireless_headphone(self):
+    def search_and_sort(self):
+        """Search from the home page and sort with the "Sort by:" dropdown"""
         driver = self.driver
         
         print("Opening Amazon website...")
-        driver.get("https://www.amazon.in")
+        driver.get(browser.base_url())
         
-        print("Searching for wireless headphones...")
+        print(f"Searching for {SEARCH_QUERY}...")
         search_box = self.wait.until(EC.presence_of_element_located((By.ID, "twotabsearchtextbox")))
         search_box.clear()
-        search_box.send_keys("wireless headphones")
+        search_box.send_keys(SEARCH_QUERY)
         search_box.send_keys(Keys.RETURN)
         
-        self.wait.until(EC.title_contains("wireless headphones"))
+        self.wait.until(EC.title_contains(SEARCH_QUERY))
         
         print("Sorting by lowest price...")
         
@@ -123,8 +86,8 @@ class AmazonLowestPriceSearch(unittest.TestCase):
                 
                 #time.sleep(1)
                 
-                start_time = time.time()
-                self.filter_start_time = time.time()
+                filter_span = self.timer.start("filter")
+                self.filter_to_name_span = self.timer.start("filter_to_name")
                 
                 price_option = self.wait.until(EC.presence_of_element_located(
                     (By.XPATH, "//a[contains(@id, 's-result-sort-select') and contains(text(), 'Price: Low to High')]")))
@@ -132,20 +95,37 @@ class AmazonLowestPriceSearch(unittest.TestCase):
                 
                 self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-component-type='s-search-result']")))
                 
-                end_time = time.time()
-                load_time = end_time - start_time
-                print(f"Filter applied in {load_time:.2f} seconds")
+                filter_span.stop()
                 
                 #time.sleep(2)
                 
         except Exception as e:
             print(f"Error during sorting: {e}")
+    
+    def open_sorted_results(self):
+        """SORT_PATH=url: navigate straight to the price-sorted results, no home page or dropdown"""
+        print("Opening the results sorted by lowest price...")
+        filter_span = self.timer.start("filter", path="url")
+        self.filter_to_name_span = self.timer.start("filter_to_name", path="url")
+        search_url.open_results(self.driver, search_url.build(SEARCH_QUERY, sort="price-asc-rank"))
+        filter_span.stop()
+    
+    def test_lowest_priced_wireless_headphone(self):
+        driver = self.driver
+        
+        if search_url.SORT_PATH == "url":
+            self.open_sorted_results()
+        else:
+            self.search_and_sort()
         
         self.get_first_product_details()
-        self.assertIn("wireless headphones", driver.title.lower())
+        self.assertIn(SEARCH_QUERY.lower(), driver.title.lower())
     
     def tearDown(self):
-        self.driver.quit()
+        self.timer.report()
+        if self.network:
+            self.network.stop()
+        session_pool.release(self.driver)
 
 
 if __name__ == "__main__":
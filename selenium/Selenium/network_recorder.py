@@ -0,0 +1,272 @@
+"""
+Opt-in network capture per test, written as HAR.
+
+With NETWORK_CAPTURE=1, browser.chrome_options() turns on Chrome's
+performance log, which carries the DevTools Network.* events of the
+existing webdriver.Chrome session. NetworkRecorder drains that log, builds
+one HAR entry per request (timings, sizes, cache status) and appends it to
+the HAR file once the request has finished. Only requests still in flight
+and the top-N heaps are kept in memory.
+
+The log is drained at test boundaries (start() and stop()) and whenever a
+test calls poll() between its timed steps. chromedriver runs one command
+per session at a time, so a background drain would land inside whatever
+span is running and inflate it; NETWORK_CAPTURE_POLL_SECONDS turns it on
+for long runs where memory matters more than exact timings.
+
+    NETWORK_CAPTURE=1                  record every test
+    NETWORK_CAPTURE_DIR=captures       where the .har and .summary.json files go
+    NETWORK_CAPTURE_TOP=10             slowest/largest resources in the summary
+    NETWORK_CAPTURE_POLL_SECONDS=2     also drain in the background (opt-in, skews the timings)
+"""
+import heapq
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+ENABLED = os.environ.get("NETWORK_CAPTURE", "0") == "1"
+CAPTURE_DIR = os.environ.get("NETWORK_CAPTURE_DIR", "network_captures")
+TOP_N = int(os.environ.get("NETWORK_CAPTURE_TOP", "10"))
+POLL_SECONDS = float(os.environ.get("NETWORK_CAPTURE_POLL_SECONDS", "0"))
+
+
+def enable_logging(options):
+    """Ask chromedriver for the performance log, which includes Network.* events"""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def _headers(headers):
+    return [{"name": name, "value": str(value)} for name, value in (headers or {}).items()]
+
+
+def _iso(wall_time):
+    return datetime.fromtimestamp(wall_time, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _span(timing, start, end):
+    """A HAR timing phase from CDP ResourceTiming offsets, or -1 when it did not happen"""
+    if timing.get(start, -1) < 0 or timing.get(end, -1) < 0:
+        return -1
+    return round(timing[end] - timing[start], 3)
+
+
+class NetworkRecorder:
+
+    def __init__(self, driver, har_path, top_n=TOP_N, poll_seconds=POLL_SECONDS):
+        self.driver = driver
+        self.har_path = har_path
+        self.top_n = top_n
+        self.poll_seconds = poll_seconds
+        self.in_flight = {}
+        self.slowest = []
+        self.largest = []
+        self.count = 0
+        self.failed = 0
+        self.bytes = 0
+        self.cache_hits = 0
+        self.events = 0
+        self._file = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Drop events from before this test, open the HAR file and start draining"""
+        self._drain()
+        self.in_flight.clear()
+        os.makedirs(os.path.dirname(self.har_path) or ".", exist_ok=True)
+        self._file = open(self.har_path, "w", encoding="utf-8")
+        self._file.write('{"log": {"version": "1.2", "creator": {"name": "network_recorder", "version": "1.0"}, '
+                         '"pages": [], "entries": [\n')
+        if self.poll_seconds > 0:
+            self._thread = threading.Thread(target=self._poll_loop, name="network-recorder", daemon=True)
+            self._thread.start()
+        return self
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.poll()
+
+    def _drain(self):
+        try:
+            return self.driver.get_log("performance")
+        except Exception as e:
+            print(f"Could not read the performance log: {e}")
+            return []
+
+    def poll(self):
+        """Read the buffered DevTools events and write out every finished request"""
+        entries = self._drain()
+        with self._lock:
+            for entry in entries:
+                message = json.loads(entry["message"])["message"]
+                self.events += 1
+                self._handle(message.get("method", ""), message.get("params", {}))
+
+    def _handle(self, method, params):
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            if params.get("redirectResponse") and request_id in self.in_flight:
+                # A redirect reuses the request id: finish the hop that was redirected
+                record = self.in_flight.pop(request_id)
+                self._response(record, params["redirectResponse"])
+                self._finish(record, params["timestamp"], record["response"].get("encodedDataLength", 0))
+            request = params["request"]
+            self.in_flight[request_id] = {
+                "url": request["url"],
+                "method": request["method"],
+                "headers": request.get("headers", {}),
+                "post_data": request.get("postData"),
+                "type": params.get("type"),
+                "start": params["timestamp"],
+                "wall_time": params.get("wallTime", time.time()),
+                "response": {},
+                "cache": "network",
+                "data_length": 0,
+            }
+        elif request_id not in self.in_flight:
+            return
+        elif method == "Network.responseReceived":
+            self._response(self.in_flight[request_id], params["response"])
+        elif method == "Network.requestServedFromCache":
+            self.in_flight[request_id]["cache"] = "memory"
+        elif method == "Network.dataReceived":
+            self.in_flight[request_id]["data_length"] += params.get("dataLength", 0)
+        elif method == "Network.loadingFinished":
+            record = self.in_flight.pop(request_id)
+            self._finish(record, params["timestamp"], params.get("encodedDataLength", 0))
+        elif method == "Network.loadingFailed":
+            record = self.in_flight.pop(request_id)
+            record["error"] = params.get("errorText") or ("blocked" if params.get("blockedReason") else "failed")
+            self._finish(record, params["timestamp"], 0)
+
+    def _response(self, record, response):
+        record["response"] = response
+        if response.get("fromDiskCache"):
+            record["cache"] = "disk"
+        elif response.get("fromServiceWorker"):
+            record["cache"] = "service-worker"
+        elif response.get("fromPrefetchCache"):
+            record["cache"] = "prefetch"
+
+    def _finish(self, record, end_timestamp, encoded_length):
+        response = record["response"]
+        timing = response.get("timing") or {}
+        total_ms = round((end_timestamp - record["start"]) * 1000, 3)
+        headers_end = timing.get("receiveHeadersEnd", -1)
+        receive_ms = -1
+        if timing.get("requestTime") and headers_end >= 0:
+            receive_ms = round((end_timestamp - timing["requestTime"]) * 1000 - headers_end, 3)
+
+        entry = {
+            "startedDateTime": _iso(record["wall_time"]),
+            "time": total_ms,
+            "request": {
+                "method": record["method"],
+                "url": record["url"],
+                "httpVersion": response.get("protocol", ""),
+                "headers": _headers(record["headers"]),
+                "queryString": [],
+                "cookies": [],
+                "headersSize": -1,
+                "bodySize": len(record["post_data"] or ""),
+            },
+            "response": {
+                "status": response.get("status", 0),
+                "statusText": response.get("statusText", record.get("error", "")),
+                "httpVersion": response.get("protocol", ""),
+                "headers": _headers(response.get("headers")),
+                "cookies": [],
+                "content": {"size": record["data_length"], "mimeType": response.get("mimeType", "")},
+                "redirectURL": (response.get("headers") or {}).get("location", ""),
+                "headersSize": -1,
+                "bodySize": encoded_length,
+                "_transferSize": encoded_length,
+            },
+            "cache": {},
+            "timings": {
+                "blocked": round(timing["dnsStart"], 3) if timing.get("dnsStart", -1) >= 0 else -1,
+                "dns": _span(timing, "dnsStart", "dnsEnd"),
+                "connect": _span(timing, "connectStart", "connectEnd"),
+                "ssl": _span(timing, "sslStart", "sslEnd"),
+                "send": _span(timing, "sendStart", "sendEnd"),
+                "wait": _span(timing, "sendEnd", "receiveHeadersEnd"),
+                "receive": receive_ms,
+            },
+            "serverIPAddress": response.get("remoteIPAddress", ""),
+            "_resourceType": record["type"],
+            "_cacheStatus": record["cache"],
+        }
+        if "error" in record:
+            entry["_error"] = record["error"]
+
+        self._file.write(("" if self.count == 0 else ",\n") + json.dumps(entry, ensure_ascii=False))
+        self.count += 1
+        self.bytes += encoded_length
+        self.failed += "error" in record
+        self.cache_hits += record["cache"] != "network"
+        self._keep_top(self.slowest, total_ms, record, total_ms, encoded_length)
+        self._keep_top(self.largest, encoded_length, record, total_ms, encoded_length)
+
+    def _keep_top(self, heap, key, record, total_ms, size):
+        """Bounded min-heap: holds only the N biggest keys seen so far"""
+        item = (key, self.count, {"url": record["url"], "type": record["type"], "ms": total_ms,
+                                  "bytes": size, "cache": record["cache"]})
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, item)
+        elif key > heap[0][0]:
+            heapq.heapreplace(heap, item)
+
+    def stop(self, verbose=True):
+        """Drain the remaining events, close the HAR file and write the summary"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.poll()
+        with self._lock:
+            self._file.write("\n]}}\n")
+            self._file.close()
+        summary = self.summary()
+        summary_path = os.path.splitext(self.har_path)[0] + ".summary.json"
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        if verbose:
+            self.print_summary(summary)
+        return summary
+
+    def summary(self):
+        return {
+            "har": self.har_path,
+            "requests": self.count,
+            "failed": self.failed,
+            "unfinished": len(self.in_flight),
+            "cache_hits": self.cache_hits,
+            "transfer_bytes": self.bytes,
+            "events": self.events,
+            "slowest": [item for _, _, item in sorted(self.slowest, reverse=True)],
+            "largest": [item for _, _, item in sorted(self.largest, reverse=True)],
+        }
+
+    def print_summary(self, summary):
+        print("\n----- NETWORK SUMMARY -----")
+        print(f"{summary['requests']} requests, {summary['transfer_bytes'] / 1024:.1f} KiB transferred, "
+              f"{summary['cache_hits']} from cache, {summary['failed']} failed")
+        print(f"Top {len(summary['slowest'])} slowest:")
+        for item in summary["slowest"]:
+            print(f"  {item['ms']:8.1f} ms  {item['type'] or '':10} {item['url'][:100]}")
+        print(f"Top {len(summary['largest'])} largest:")
+        for item in summary["largest"]:
+            print(f"  {item['bytes'] / 1024:8.1f} KiB {item['type'] or '':10} {item['url'][:100]}")
+        print(f"HAR written to {summary['har']}")
+        print("---------------------------")
+
+
+def record(driver, test_id):
+    """Start a recorder for one test, or return None when NETWORK_CAPTURE is off"""
+    if not ENABLED:
+        return None
+    har_path = os.path.join(CAPTURE_DIR, test_id.replace("/", "_") + ".har")
+    return NetworkRecorder(driver, har_path).start()
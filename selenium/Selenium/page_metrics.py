@@ -0,0 +1,136 @@
+"""
+Browser-side load metrics, read in a single WebDriver call.
+
+The tests call a page "loaded" once WebDriver sees certain elements, so the
+number they report includes command round trips and polling. collect()
+reads what the browser itself measured - Navigation Timing, first and
+largest contentful paint and long tasks - and compare() lines those up with
+the harness-measured time to show how much of it the harness added.
+
+LCP and long task entries are only exposed through PerformanceObserver, so
+the script registers buffered observers and returns on the next task.
+All times are milliseconds from the navigation start.
+"""
+import time
+
+COLLECT_SCRIPT = """
+const done = arguments[arguments.length - 1];
+const started = performance.now();
+const result = {navigation: null, fcp: null, lcp: null, long_tasks: []};
+
+const nav = performance.getEntriesByType('navigation')[0];
+if (nav) {
+    result.navigation = {
+        type: nav.type,
+        redirect_ms: nav.redirectEnd - nav.redirectStart,
+        dns_ms: nav.domainLookupEnd - nav.domainLookupStart,
+        connect_ms: nav.connectEnd - nav.connectStart,
+        ttfb_ms: nav.responseStart,
+        response_end_ms: nav.responseEnd,
+        dom_interactive_ms: nav.domInteractive,
+        dom_content_loaded_ms: nav.domContentLoadedEventEnd,
+        load_event_end_ms: nav.loadEventEnd,
+        transfer_size: nav.transferSize,
+        decoded_body_size: nav.decodedBodySize,
+    };
+}
+for (const entry of performance.getEntriesByType('paint')) {
+    if (entry.name === 'first-contentful-paint') result.fcp = entry.startTime;
+}
+
+const observers = [];
+function observe(type, callback) {
+    try {
+        const observer = new PerformanceObserver(list => list.getEntries().forEach(callback));
+        observer.observe({type: type, buffered: true});
+        observers.push(observer);
+    } catch (e) {
+        // Entry type not supported by this browser
+    }
+}
+observe('largest-contentful-paint', entry => {
+    result.lcp = entry.renderTime || entry.loadTime || entry.startTime;
+});
+observe('longtask', entry => {
+    result.long_tasks.push({start_ms: entry.startTime, duration_ms: entry.duration});
+});
+
+// Buffered entries are delivered asynchronously, on the next task
+setTimeout(() => {
+    observers.forEach(observer => observer.disconnect());
+    result.now_ms = performance.now();
+    result.script_ms = result.now_ms - started;
+    done(result);
+}, 0);
+"""
+
+
+def collect(driver):
+    """Read navigation, paint and long task metrics from the current page"""
+    start_time = time.perf_counter()
+    try:
+        metrics = driver.execute_async_script(COLLECT_SCRIPT)
+    except Exception as e:
+        print(f"Could not collect page metrics: {e}")
+        return None
+    metrics["round_trip_ms"] = (time.perf_counter() - start_time) * 1000
+
+    long_tasks = metrics["long_tasks"]
+    metrics["long_task_count"] = len(long_tasks)
+    metrics["long_task_ms"] = sum(task["duration_ms"] for task in long_tasks)
+    # Total blocking time: the part of each long task beyond 50 ms, after first contentful paint
+    fcp = metrics["fcp"] or 0
+    metrics["total_blocking_ms"] = sum(max(0.0, task["duration_ms"] - 50) for task in long_tasks
+                                       if task["start_ms"] >= fcp)
+    return metrics
+
+
+def compare(metrics, harness_seconds):
+    """
+    Flat summary of the browser metrics next to the harness-measured time.
+
+    `harness_overhead_ms` is the harness time minus the browser's load event
+    end: WebDriver dispatch, the wait conditions and their polling.
+    """
+    harness_ms = harness_seconds * 1000
+    summary = {"harness_ms": round(harness_ms, 1)}
+    if not metrics:
+        return summary
+
+    navigation = metrics["navigation"] or {}
+    for key in ("ttfb_ms", "dom_content_loaded_ms", "load_event_end_ms"):
+        if navigation.get(key) is not None:
+            summary[key] = round(navigation[key], 1)
+    if metrics["fcp"] is not None:
+        summary["fcp_ms"] = round(metrics["fcp"], 1)
+    if metrics["lcp"] is not None:
+        summary["lcp_ms"] = round(metrics["lcp"], 1)
+    summary["long_tasks"] = metrics["long_task_count"]
+    summary["total_blocking_ms"] = round(metrics["total_blocking_ms"], 1)
+
+    load_event_end = navigation.get("load_event_end_ms")
+    if load_event_end:
+        summary["harness_overhead_ms"] = round(harness_ms - load_event_end, 1)
+        summary["harness_overhead_pct"] = round((harness_ms - load_event_end) / harness_ms * 100, 1)
+    return summary
+
+
+def print_comparison(summary):
+    print("\n----- PAGE METRICS -----")
+    labels = [
+        ("ttfb_ms", "Time to first byte"),
+        ("fcp_ms", "First contentful paint"),
+        ("lcp_ms", "Largest contentful paint"),
+        ("dom_content_loaded_ms", "DOMContentLoaded"),
+        ("load_event_end_ms", "Load event end"),
+        ("harness_ms", "Harness-measured load"),
+    ]
+    for key, label in labels:
+        if key in summary:
+            print(f"{label}: {summary[key]:.1f} ms")
+    if "long_tasks" in summary:
+        print(f"Long tasks: {summary['long_tasks']} (total blocking time {summary['total_blocking_ms']:.1f} ms)")
+    if "harness_overhead_ms" in summary:
+        print(f"Harness overhead: {summary['harness_overhead_ms']:.1f} ms "
+              f"({summary['harness_overhead_pct']:.1f}% of the reported time)")
+    print("------------------------")
@@ -0,0 +1,264 @@
+"""
+Crawl the result pages of a search, following the "Next" link.
+
+WirelessheadphoneSearch stops at the first results page. PaginationCrawler
+walks up to max_pages pages and streams the cards out as a generator,
+overlapping the fetch of page k+1 with the extraction of page k:
+
+    tab    page k+1 loads in a second browser tab while page k is extracted
+           in the first; the tabs swap roles on every page
+    http   pages are fetched in a background thread over a keep-alive HTTP
+           pool with the browser's cookies and user agent, and parsed with
+           lxml (no rendering at all; the live site may answer a captcha)
+    none   driver.get one page after the other, for comparison
+
+    crawler = PaginationCrawler(driver, prefetch="tab", max_pages=5)
+    for card in crawler.crawl("wireless headphones"):
+        print(card["page"], card["asin"], card["price"])
+    crawler.report()
+
+    python pagination_crawler.py "wireless headphones" --pages 7
+    python pagination_crawler.py --prefetch all --jsonl cards.jsonl
+    AMAZON_BASE_URL=fixture FIXTURE_LATENCY_MS=300 python pagination_crawler.py --prefetch all
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+import urllib3
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+import browser
+import product_extractor
+import search_url
+
+PREFETCH_MODES = ("tab", "http", "none")
+
+NEXT_SELECTORS = [
+    "a.s-pagination-next",
+    "li.a-last a",
+    "a[aria-label^='Go to next page']",
+]
+
+NEXT_SCRIPT = """
+for (const selector of arguments[0]) {
+    const link = document.querySelector(selector);
+    if (link && link.href) return link.href;
+}
+return null;
+"""
+
+# Navigate only after the command returned, otherwise chromedriver waits for the load
+PREFETCH_SCRIPT = """
+const url = arguments[0];
+window.__crawlerPrefetch = true;
+setTimeout(() => { window.location.href = url; }, 0);
+"""
+
+# The marker is gone once the prefetched document replaced the old one
+READY_SCRIPT = "return !window.__crawlerPrefetch && document.readyState !== 'loading';"
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="page-prefetch")
+
+
+def _next_link(root, page_url):
+    for selector in NEXT_SELECTORS:
+        for link in root.cssselect(selector):
+            if link.get("href"):
+                return urljoin(page_url, link.get("href"))
+    return None
+
+
+class PaginationCrawler:
+
+    def __init__(self, driver, prefetch="tab", max_pages=5, timeout=30, unique=True):
+        if prefetch not in PREFETCH_MODES:
+            raise ValueError(f"Unknown prefetch mode '{prefetch}', choose from {', '.join(PREFETCH_MODES)}")
+        self.driver = driver
+        self.prefetch = prefetch
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.unique = unique
+        self.pages = []
+        self.duplicates = 0
+        self.elapsed = 0.0
+
+    def crawl(self, query=None, url=None, base_url=None):
+        """
+        Yield one dict per card (page, position, and the product_extractor
+        COLUMNS) for a query or a results page URL. With unique=True cards
+        whose ASIN was already seen on an earlier page are skipped.
+        """
+        url = url or search_url.build(query, base_url=base_url)
+        pages = {"tab": self._tab_pages, "http": self._http_pages, "none": self._sequential_pages}[self.prefetch]
+        self.pages = []
+        self.duplicates = 0
+        seen = set()
+        start_time = time.perf_counter()
+        try:
+            for page, page_url, result in pages(url):
+                columns = result["columns"]
+                self.pages.append({"page": page, "url": page_url, "cards": result["card_count"],
+                                   "wait_ms": result["wait_ms"], "extract_ms": result["extract_ms"]})
+                for position in range(result["card_count"]):
+                    card = {name: columns[name][position] for name in product_extractor.COLUMNS}
+                    if self.unique and card["asin"]:
+                        if card["asin"] in seen:
+                            self.duplicates += 1
+                            continue
+                        seen.add(card["asin"])
+                    yield dict(card, page=page, position=position + 1)
+        finally:
+            self.elapsed = time.perf_counter() - start_time
+
+    def _wait_ready(self):
+        WebDriverWait(self.driver, self.timeout, poll_frequency=0.05).until(
+            lambda driver: driver.execute_script(READY_SCRIPT))
+
+    def _extract(self, wait_ms):
+        start_time = time.perf_counter()
+        result = product_extractor.extract_columns(self.driver)
+        result["wait_ms"] = wait_ms
+        result["extract_ms"] = (time.perf_counter() - start_time) * 1000
+        return result
+
+    def _sequential_pages(self, url):
+        driver = self.driver
+        for page in range(1, self.max_pages + 1):
+            start_time = time.perf_counter()
+            driver.get(url)
+            result = self._extract((time.perf_counter() - start_time) * 1000)
+            yield page, driver.current_url, result
+            url = driver.execute_script(NEXT_SCRIPT, NEXT_SELECTORS)
+            if not url:
+                break
+
+    def _tab_pages(self, url):
+        driver = self.driver
+        original = driver.current_window_handle
+        driver.switch_to.new_window("tab")
+        current, spare = original, driver.current_window_handle
+        driver.switch_to.window(current)
+        try:
+            start_time = time.perf_counter()
+            driver.get(url)
+            wait_ms = (time.perf_counter() - start_time) * 1000
+            for page in range(1, self.max_pages + 1):
+                next_url = driver.execute_script(NEXT_SCRIPT, NEXT_SELECTORS) if page < self.max_pages else None
+                if next_url:
+                    driver.switch_to.window(spare)
+                    driver.execute_script(PREFETCH_SCRIPT, next_url)
+                    driver.switch_to.window(current)
+                yield page, driver.current_url, self._extract(wait_ms)
+                if not next_url:
+                    break
+                current, spare = spare, current
+                driver.switch_to.window(current)
+                start_time = time.perf_counter()
+                try:
+                    self._wait_ready()
+                except TimeoutException:
+                    print(f"Page {page + 1} did not load within {self.timeout} seconds, stopping")
+                    break
+                wait_ms = (time.perf_counter() - start_time) * 1000
+        finally:
+            for handle in (current, spare):
+                if handle != original:
+                    driver.switch_to.window(handle)
+                    driver.close()
+            driver.switch_to.window(original)
+
+    def _http_headers(self, url):
+        """The browser's identity for the site, so the server sees the same session"""
+        driver = self.driver
+        if urlsplit(driver.current_url).netloc != urlsplit(url).netloc:
+            driver.get(urljoin(url, "/"))
+        cookies = "; ".join(f"{cookie['name']}={cookie['value']}" for cookie in driver.get_cookies())
+        headers = {
+            "User-Agent": driver.execute_script("return navigator.userAgent"),
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Language": "en-IN,en;q=0.9",
+        }
+        if cookies:
+            headers["Cookie"] = cookies
+        return headers
+
+    def _http_pages(self, url):
+        from lxml import html as lxml_html
+
+        headers = self._http_headers(url)
+        pool = urllib3.PoolManager(num_pools=2, maxsize=2, timeout=urllib3.Timeout(total=self.timeout))
+
+        def fetch(page_url):
+            response = pool.request("GET", page_url, headers=headers)
+            # After redirects response.url may be just the path of the final URL
+            final_url = urljoin(page_url, getattr(response, "url", None) or "")
+            return response.status, response.data.decode("utf-8", "replace"), final_url
+
+        future = _executor.submit(fetch, url)
+        for page in range(1, self.max_pages + 1):
+            start_time = time.perf_counter()
+            status, page_html, page_url = future.result()
+            wait_ms = (time.perf_counter() - start_time) * 1000
+            if status != 200:
+                print(f"Page {page} answered HTTP {status}, stopping")
+                break
+            start_time = time.perf_counter()
+            root = lxml_html.fromstring(page_html)
+            next_url = _next_link(root, page_url) if page < self.max_pages else None
+            future = _executor.submit(fetch, next_url) if next_url else None
+            result = product_extractor.parse_page_source(root)
+            result["wait_ms"] = wait_ms
+            result["extract_ms"] = (time.perf_counter() - start_time) * 1000
+            yield page, page_url, result
+            if future is None:
+                break
+
+    def report(self):
+        if not self.pages:
+            return
+        cards = sum(page["cards"] for page in self.pages)
+        print(f"\n----- PAGINATION CRAWL ({self.prefetch} prefetch) -----")
+        for page in self.pages:
+            print(f"Page {page['page']}: {page['cards']} cards, waited {page['wait_ms']:.0f} ms, "
+                  f"extracted in {page['extract_ms']:.0f} ms")
+        print(f"{len(self.pages)} page(s), {cards} cards ({self.duplicates} repeated ASINs skipped) "
+              f"in {self.elapsed:.2f} seconds, {self.elapsed / len(self.pages):.2f} s/page")
+        print("-" * 40)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("query", nargs="?", default="wireless headphones")
+    parser.add_argument("--pages", type=int, default=5, help="maximum result pages to crawl")
+    parser.add_argument("--prefetch", choices=PREFETCH_MODES + ("all",), default="tab",
+                        help="how the next page is fetched (all = compare every mode)")
+    parser.add_argument("--jsonl", help="write every card as one JSON line to this file")
+    parser.add_argument("--base-url", default=None, help="site to crawl, e.g. a local fixture server")
+    args = parser.parse_args()
+
+    modes = PREFETCH_MODES if args.prefetch == "all" else (args.prefetch,)
+    driver = browser.create_chrome_driver()
+    crawlers = []
+    output = open(args.jsonl, "w", encoding="utf-8") if args.jsonl else None
+    try:
+        for mode in modes:
+            crawler = PaginationCrawler(driver, prefetch=mode, max_pages=args.pages)
+            crawlers.append(crawler)
+            for card in crawler.crawl(args.query, base_url=args.base_url):
+                if output:
+                    output.write(json.dumps(dict(card, prefetch=mode)) + "\n")
+    finally:
+        if output:
+            output.close()
+        driver.quit()
+
+    for crawler in crawlers:
+        crawler.report()
+
+
+if __name__ == "__main__":
+    main()
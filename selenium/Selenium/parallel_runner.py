@@ -0,0 +1,277 @@
+"""
+Run the Selenium tests in parallel worker processes.
+
+Test methods are handed out from a shared queue to --workers processes.
+Every worker keeps one pooled Chrome (see session_pool.py) with its own
+--user-data-dir, so sessions never share cookies, cache or profile locks.
+Results and timing spans from all workers are merged at the end.
+
+Parallel browsers compete for CPU, which inflates the very timings the
+tests measure. The runner therefore caps the workers at one per
+--cores-per-worker cores, limits each Chrome to --renderer-limit renderer
+processes and, on Linux, pins every worker (and the chromedriver and Chrome
+processes it starts, which inherit the affinity) to its own cores.
+
+    python parallel_runner.py --workers 3
+    python parallel_runner.py --workers 4 --scaling        # 1..4 workers, throughput table
+    python parallel_runner.py --workers 2 lowestPriced addToCart
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import session_pool
+from suite_modules import DEFAULT_MODULES
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from harness.benchmark import percentile
+from harness.timing import add_sink
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def max_workers(cores_per_worker):
+    return max(1, len(available_cpus()) // max(1, cores_per_worker))
+
+
+def collect_test_ids(module_names):
+    """Flatten the test suites of the given modules into test ids"""
+    def flatten(suite):
+        for test in suite:
+            if isinstance(test, unittest.TestSuite):
+                yield from flatten(test)
+            else:
+                yield test.id()
+    return list(flatten(unittest.defaultTestLoader.loadTestsFromNames(module_names)))
+
+
+def configure_worker(index, settings):
+    """Give this worker its own profile, renderer budget and (optionally) cores"""
+    user_data_dir = tempfile.mkdtemp(prefix=f"chrome-worker-{index}-")
+    os.environ["CHROME_USER_DATA_DIR"] = user_data_dir
+    os.environ["CHROME_RENDERER_PROCESS_LIMIT"] = str(settings["renderer_limit"])
+    os.environ["CHROME_POOL_SIZE"] = "1"
+
+    cores = settings["cores"][index] if settings["cores"] else None
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    return user_data_dir, cores
+
+
+def run_test(worker_index, test_id, records, verbose):
+    """Run one test id and return its outcome, duration, captured output and timing records"""
+    suite = unittest.defaultTestLoader.loadTestsFromName(test_id)
+    result = unittest.TestResult()
+    output = io.StringIO()
+
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        suite.run(result)
+    elapsed = time.perf_counter() - start_time
+
+    if result.errors:
+        outcome, details = "error", result.errors[0][1]
+    elif result.failures:
+        outcome, details = "fail", result.failures[0][1]
+    elif result.skipped:
+        outcome, details = "skip", result.skipped[0][1]
+    else:
+        outcome, details = "ok", None
+
+    spans = list(records)
+    records.clear()
+    if verbose:
+        print(f"[worker {worker_index}] {test_id}: {outcome} in {elapsed:.2f} seconds")
+    return {
+        "worker": worker_index,
+        "test": test_id,
+        "outcome": outcome,
+        "seconds": elapsed,
+        "details": details,
+        "output": output.getvalue(),
+        "spans": spans,
+    }
+
+
+def worker_main(index, tasks, results, settings):
+    user_data_dir, cores = configure_worker(index, settings)
+
+    records = []
+    add_sink(records.append)
+    try:
+        while True:
+            test_id = tasks.get()
+            if test_id is None:
+                break
+            results.put(run_test(index, test_id, records, settings["verbose"]))
+    finally:
+        session_pool.get_pool().shutdown()
+        shutil.rmtree(user_data_dir, ignore_errors=True)
+        results.put({"worker": index, "done": True, "cores": cores})
+
+
+def plan_cores(workers, cores_per_worker, pin):
+    """Disjoint CPU sets per worker, or None when pinning is off or impossible"""
+    cpus = available_cpus()
+    if not pin or not hasattr(os, "sched_setaffinity") or workers * cores_per_worker > len(cpus):
+        return None
+    return [set(cpus[i * cores_per_worker:(i + 1) * cores_per_worker]) for i in range(workers)]
+
+
+def run_parallel(test_ids, workers, cores_per_worker=2, renderer_limit=1, pin=True, verbose=False):
+    """Run the test ids across `workers` processes; returns (wall seconds, per-test results)"""
+    context = multiprocessing.get_context("spawn")
+    tasks = context.Queue()
+    results = context.Queue()
+    settings = {
+        "cores": plan_cores(workers, cores_per_worker, pin),
+        "renderer_limit": renderer_limit,
+        "verbose": verbose,
+    }
+
+    for test_id in test_ids:
+        tasks.put(test_id)
+    for _ in range(workers):
+        tasks.put(None)
+
+    start_time = time.perf_counter()
+    processes = [context.Process(target=worker_main, args=(i, tasks, results, settings), name=f"selenium-worker-{i}")
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+
+    finished = []
+    done = 0
+    while done < workers:
+        try:
+            message = results.get(timeout=1)
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                print("All workers exited before finishing the queue")
+                break
+            continue
+        if message.get("done"):
+            done += 1
+        else:
+            finished.append(message)
+    wall = time.perf_counter() - start_time
+
+    for process in processes:
+        process.join()
+    return wall, finished
+
+
+def merge_spans(finished):
+    """Group every timing record from every worker by span path"""
+    spans = {}
+    for result in finished:
+        for record in result["spans"]:
+            spans.setdefault(record["path"], []).append(record["duration_ns"] / 1e9)
+    return spans
+
+
+def print_results(workers, wall, finished):
+    print(f"\n----- PARALLEL RUN ({workers} worker{'s' if workers != 1 else ''}) -----")
+    for result in sorted(finished, key=lambda r: r["test"]):
+        print(f"{result['outcome'].upper():5} {result['test']} "
+              f"({result['seconds']:.2f} seconds, worker {result['worker']})")
+    failed = [r for r in finished if r["outcome"] in ("fail", "error")]
+    for result in failed:
+        print(f"\n--- {result['test']} ({result['outcome']}) ---")
+        print(result["output"].rstrip())
+        print(result["details"].rstrip())
+
+    spans = merge_spans(finished)
+    if spans:
+        print("\nSpan timings across workers:")
+        for path, values in sorted(spans.items()):
+            values.sort()
+            print(f"  {path}: n={len(values)}, p50 {percentile(values, 50):.3f} s, max {values[-1]:.3f} s")
+
+    test_time = sum(r["seconds"] for r in finished)
+    print(f"\n{len(finished)} tests, {len(failed)} failed, wall {wall:.2f} seconds "
+          f"(sum of test time {test_time:.2f} seconds)")
+    print("-" * 40)
+
+
+def print_scaling(rows):
+    base_wall = rows[0]["wall"]
+    base_test = rows[0]["mean_test"]
+    print("\n----- SCALING -----")
+    print("workers   wall (s)   tests/min   speedup   efficiency   mean test (s)")
+    for row in rows:
+        speedup = base_wall / row["wall"]
+        print(f"{row['workers']:7d}   {row['wall']:8.2f}   {row['throughput']:9.1f}   {speedup:6.2f}x   "
+              f"{speedup / row['workers'] * 100:9.0f}%   {row['mean_test']:8.2f} ({row['mean_test'] / base_test:.2f}x)")
+    print("Mean test time growing with the worker count means the workers compete for CPU or bandwidth.")
+    print("-------------------")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--cores-per-worker", type=int, default=2,
+                        help="CPU cores reserved per worker (Chrome, chromedriver and the test process)")
+    parser.add_argument("--renderer-limit", type=int, default=1, help="--renderer-process-limit for each Chrome")
+    parser.add_argument("--no-pin", action="store_true", help="don't pin workers to their own cores")
+    parser.add_argument("--oversubscribe", action="store_true", help="allow more workers than the core budget")
+    parser.add_argument("--scaling", action="store_true", help="run with 1..N workers and compare throughput")
+    parser.add_argument("--timing-jsonl", help="write the merged span records to this file")
+    parser.add_argument("--verbose", action="store_true", help="print each test as it finishes")
+    args = parser.parse_args()
+
+    cap = max_workers(args.cores_per_worker)
+    workers = args.workers
+    if workers > cap and not args.oversubscribe:
+        print(f"Capping workers at {cap} ({len(available_cpus())} cores, {args.cores_per_worker} per worker); "
+              f"pass --oversubscribe to override")
+        workers = cap
+
+    test_ids = collect_test_ids(args.modules)
+    print(f"Collected {len(test_ids)} tests from {len(args.modules)} modules")
+
+    rows = []
+    all_results = []
+    for count in (range(1, workers + 1) if args.scaling else [workers]):
+        wall, finished = run_parallel(test_ids, count, args.cores_per_worker, args.renderer_limit,
+                                      pin=not args.no_pin, verbose=args.verbose)
+        print_results(count, wall, finished)
+        all_results.extend(dict(result, workers=count) for result in finished)
+        rows.append({
+            "workers": count,
+            "wall": wall,
+            "throughput": len(finished) / wall * 60,
+            "mean_test": sum(r["seconds"] for r in finished) / max(1, len(finished)),
+        })
+
+    if args.scaling:
+        print_scaling(rows)
+
+    if args.timing_jsonl:
+        with open(args.timing_jsonl, "w", encoding="utf-8") as f:
+            for result in all_results:
+                for record in result["spans"]:
+                    f.write(json.dumps(dict(record, worker=result["worker"], workers=result["workers"]),
+                                       ensure_ascii=False) + "\n")
+        print(f"Wrote merged timing records to {args.timing_jsonl}")
+
+    if any(r["outcome"] in ("fail", "error") for r in all_results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
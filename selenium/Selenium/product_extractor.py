@@ -0,0 +1,281 @@
+"""
+Product extraction from Amazon search results in a single WebDriver call.
+
+Walking the name/price selector cascade from Python costs one HTTP round
+trip per find_elements, .text and get_attribute call. Here the whole
+cascade runs inside the page through one execute_script call, which
+returns a plain record per card together with the selector that matched.
+
+extract_columns() scrapes every card of the page (ASIN, name, price,
+rating, review count, sponsored flag) into parallel arrays, and
+to_record_array() turns them into a NumPy record array when NumPy is
+installed. parse_page_source() does the same from saved HTML with lxml.
+"""
+import math
+import re
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RESULT_CARD_SELECTOR = "div[data-component-type='s-search-result']"
+
+NAME_SELECTORS = [
+    "h2 a span",
+    ".a-size-medium.a-color-base.a-text-normal",
+    ".a-size-base-plus.a-color-base.a-text-normal",
+    "h2 .a-link-normal span",
+    "h2 a",
+    "h2",
+]
+
+PRICE_SELECTORS = [
+    ".a-price .a-offscreen",
+    "span.a-price span.a-offscreen",
+    ".a-price-whole",
+    ".a-color-price",
+    ".a-price",
+]
+
+RATING_SELECTORS = [
+    "i.a-icon-star-small .a-icon-alt",
+    "i[class*='a-star'] .a-icon-alt",
+    ".a-icon-alt",
+    "span[aria-label*='out of 5 stars']",
+]
+
+REVIEW_SELECTORS = [
+    "a[href*='#customerReviews'] span",
+    "span.s-underline-text",
+    "span[aria-label$='ratings']",
+]
+
+SPONSORED_SELECTORS = [
+    ".s-sponsored-label-text",
+    ".puis-sponsored-label-text",
+    "[aria-label='Sponsored']",
+]
+
+COLUMNS = ("asin", "name", "price", "price_text", "rating", "reviews", "sponsored")
+
+EXTRACT_SCRIPT = """
+const [card, cardSelector, nameSelectors, priceSelectors, allCards] = arguments;
+const started = performance.now();
+
+function visibleText(el) {
+    return (el.innerText || el.textContent || '').trim();
+}
+
+function extract(card) {
+    const record = {
+        asin: card.getAttribute('data-asin'),
+        name: null, name_selector: null,
+        price: null, price_selector: null,
+    };
+    for (const selector of nameSelectors) {
+        const el = card.querySelector(selector);
+        const text = el ? visibleText(el) : '';
+        if (text) {
+            record.name = text;
+            record.name_selector = selector;
+            break;
+        }
+    }
+    for (const selector of priceSelectors) {
+        const el = card.querySelector(selector);
+        if (!el) continue;
+        // Offscreen prices are hidden from innerText, so read the markup like the old code did
+        let text = selector.includes('a-offscreen') ? el.innerHTML.trim() : visibleText(el);
+        if (text && selector === '.a-price-whole') text = '\\u20b9' + text;
+        if (text) {
+            record.price = text;
+            record.price_selector = selector;
+            break;
+        }
+    }
+    return record;
+}
+
+const cards = allCards ? Array.from(document.querySelectorAll(cardSelector)) : [];
+const first = card || cards[0] || document.querySelector(cardSelector);
+const products = cards.map(extract);
+return {
+    first: first ? (allCards && first === cards[0] ? products[0] : extract(first)) : null,
+    products: products,
+    card_count: cards.length,
+    script_ms: performance.now() - started,
+};
+"""
+
+
+COLUMNS_SCRIPT = """
+const [cardSelector, nameSelectors, priceSelectors, ratingSelectors, reviewSelectors, sponsoredSelectors] = arguments;
+const started = performance.now();
+
+// textContent needs no layout, unlike innerText, which matters across 60 cards
+function text(el) {
+    return (el.getAttribute('aria-label') && !el.firstElementChild ? el.getAttribute('aria-label') : el.textContent)
+        .replace(/\\s+/g, ' ').trim();
+}
+
+function first(card, selectors) {
+    for (const selector of selectors) {
+        for (const el of card.querySelectorAll(selector)) {
+            const value = text(el);
+            if (value) return [value, selector];
+        }
+    }
+    return [null, null];
+}
+
+function number(value) {
+    const match = value && value.replace(/,/g, '').match(/\\d+(\\.\\d+)?/);
+    return match ? parseFloat(match[0]) : null;
+}
+
+function count(value) {
+    const match = value && value.replace(/[(),\\s]/g, '').match(/^(\\d+(?:\\.\\d+)?)([KkMm]?)/);
+    if (!match) return null;
+    const scale = {k: 1e3, m: 1e6}[match[2].toLowerCase()] || 1;
+    return Math.round(parseFloat(match[1]) * scale);
+}
+
+const columns = {asin: [], name: [], price: [], price_text: [], rating: [], reviews: [], sponsored: []};
+const cards = document.querySelectorAll(cardSelector);
+for (const card of cards) {
+    columns.asin.push(card.getAttribute('data-asin') || null);
+    columns.name.push(first(card, nameSelectors)[0]);
+    let [price, priceSelector] = first(card, priceSelectors);
+    if (price && priceSelector === '.a-price-whole') price = '\\u20b9' + price;
+    columns.price_text.push(price);
+    columns.price.push(number(price));
+    columns.rating.push(number(first(card, ratingSelectors)[0]));
+    columns.reviews.push(count(first(card, reviewSelectors)[0]));
+    columns.sponsored.push(sponsoredSelectors.some(selector => card.querySelector(selector) !== null));
+}
+return {columns: columns, card_count: cards.length, script_ms: performance.now() - started};
+"""
+
+
+def extract_search_results(driver, card=None, all_cards=True):
+    """
+    Extract the first (or given) result card and, optionally, every result card.
+
+    Returns a dict with "first" (record or None), "products" (list of records),
+    "script_ms" (time spent inside the page) and "round_trip_ms" (time seen
+    from Python, including the WebDriver call).
+    """
+    start_time = time.perf_counter()
+    result = driver.execute_script(
+        EXTRACT_SCRIPT, card, RESULT_CARD_SELECTOR, NAME_SELECTORS, PRICE_SELECTORS, all_cards)
+    result["round_trip_ms"] = (time.perf_counter() - start_time) * 1000
+    return result
+
+
+def extract_product(driver, card=None):
+    """Extract name and price of one card (the first result card when card is None)"""
+    result = extract_search_results(driver, card=card, all_cards=False)
+    record = result["first"] or {"asin": None, "name": None, "name_selector": None,
+                                 "price": None, "price_selector": None}
+    record["script_ms"] = result["script_ms"]
+    record["round_trip_ms"] = result["round_trip_ms"]
+    return record
+
+
+def extract_columns(driver):
+    """
+    Every result card of the current page as parallel arrays, in one call.
+
+    Returns a dict with "columns" (COLUMNS -> list, one entry per card; price,
+    rating and reviews are numbers or None), "card_count", "script_ms" and
+    "round_trip_ms".
+    """
+    start_time = time.perf_counter()
+    result = driver.execute_script(
+        COLUMNS_SCRIPT, RESULT_CARD_SELECTOR, NAME_SELECTORS, PRICE_SELECTORS, RATING_SELECTORS,
+        REVIEW_SELECTORS, SPONSORED_SELECTORS)
+    result["round_trip_ms"] = (time.perf_counter() - start_time) * 1000
+    return result
+
+
+def _text(element):
+    if element.get("aria-label") and len(element) == 0:
+        return " ".join(element.get("aria-label").split())
+    return " ".join(element.text_content().split())
+
+
+def _first(card, selectors):
+    for selector in selectors:
+        for element in card.cssselect(selector):
+            value = _text(element)
+            if value:
+                return value, selector
+    return None, None
+
+
+def _number(value):
+    match = value and re.search(r"\d+(\.\d+)?", value.replace(",", ""))
+    return float(match.group(0)) if match else None
+
+
+def _count(value):
+    match = value and re.match(r"(\d+(?:\.\d+)?)([KkMm]?)", re.sub(r"[(),\s]", "", value))
+    if not match:
+        return None
+    scale = {"k": 1e3, "m": 1e6}.get(match.group(2).lower(), 1)
+    return round(float(match.group(1)) * scale)
+
+
+def parse_page_source(page_html):
+    """
+    The same columns as extract_columns(), parsed from saved HTML (e.g.
+    driver.page_source) with lxml instead of inside the browser. An already
+    parsed lxml document is accepted too.
+    """
+    from lxml import html as lxml_html
+
+    start_time = time.perf_counter()
+    root = lxml_html.fromstring(page_html) if isinstance(page_html, (str, bytes)) else page_html
+    columns = {name: [] for name in COLUMNS}
+    cards = root.cssselect(RESULT_CARD_SELECTOR)
+    for card in cards:
+        columns["asin"].append(card.get("data-asin") or None)
+        columns["name"].append(_first(card, NAME_SELECTORS)[0])
+        price, price_selector = _first(card, PRICE_SELECTORS)
+        if price and price_selector == ".a-price-whole":
+            price = "\u20b9" + price
+        columns["price_text"].append(price)
+        columns["price"].append(_number(price))
+        columns["rating"].append(_number(_first(card, RATING_SELECTORS)[0]))
+        columns["reviews"].append(_count(_first(card, REVIEW_SELECTORS)[0]))
+        columns["sponsored"].append(any(card.cssselect(selector) for selector in SPONSORED_SELECTORS))
+    return {"columns": columns, "card_count": len(cards), "parse_ms": (time.perf_counter() - start_time) * 1000}
+
+
+def to_record_array(columns):
+    """
+    NumPy record array of the columns (requires NumPy). Missing prices and
+    ratings become NaN and missing review counts -1.
+    """
+    if np is None:
+        raise ImportError("to_record_array needs NumPy: pip install numpy")
+
+    def width(values):
+        return max([len(value) for value in values if value] or [1])
+
+    def floats(values):
+        return [math.nan if value is None else value for value in values]
+
+    return np.rec.fromarrays(
+        [
+            [value or "" for value in columns["asin"]],
+            [value or "" for value in columns["name"]],
+            floats(columns["price"]),
+            floats(columns["rating"]),
+            [-1 if value is None else value for value in columns["reviews"]],
+            [bool(value) for value in columns["sponsored"]],
+        ],
+        dtype=[("asin", f"U{width(columns['asin'])}"), ("name", f"U{width(columns['name'])}"),
+               ("price", "f8"), ("rating", "f4"), ("reviews", "i8"), ("sponsored", "?")])
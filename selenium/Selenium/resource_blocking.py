@@ -0,0 +1,90 @@
+"""
+Request blocking for functional runs.
+
+Tests that only check DOM results (addToCart, highest_rated) don't need the
+images, video, fonts, ads and trackers Chrome downloads with every page.
+apply() sends DevTools URL patterns for those resource types and
+third-party domains with Network.setBlockedURLs on the existing session;
+measurement runs are left untouched so their timings keep full fidelity.
+
+    RESOURCE_BLOCKING=0                 never block (full fidelity everywhere)
+    RESOURCE_BLOCKING_TYPES=image,font  resource types to drop in functional runs
+    RESOURCE_BLOCKING_EXTRA=*cdn.example.com*,*.gif
+                                        extra URL patterns
+
+Patterns use the DevTools syntax, where * matches any run of characters.
+"""
+import os
+
+ENABLED = os.environ.get("RESOURCE_BLOCKING", "1") != "0"
+
+TYPE_PATTERNS = {
+    "image": ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.ico", "*.svg",
+              "*m.media-amazon.com/images/I/*"],
+    "media": ["*.mp4", "*.webm", "*.m3u8", "*.ts", "*.mp3", "*.m4a"],
+    "font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+}
+
+THIRD_PARTY_PATTERNS = [
+    "*amazon-adsystem.com*",
+    "*aax-eu.amazon*",
+    "*fls-eu.amazon*",
+    "*unagi.amazon*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*facebook.net*",
+    "*scorecardresearch.com*",
+]
+
+DEFAULT_TYPES = ["image", "media", "font"]
+
+
+def _split(value):
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def blocked_patterns(types=None, third_party=True, extra=None):
+    """URL patterns for the given resource types, third-party domains and extra patterns"""
+    if types is None:
+        types = _split(os.environ.get("RESOURCE_BLOCKING_TYPES", "")) or DEFAULT_TYPES
+    if extra is None:
+        extra = _split(os.environ.get("RESOURCE_BLOCKING_EXTRA", ""))
+    patterns = []
+    for resource_type in types:
+        if resource_type not in TYPE_PATTERNS:
+            raise ValueError(f"Unknown resource type '{resource_type}', choose from {', '.join(TYPE_PATTERNS)}")
+        patterns.extend(TYPE_PATTERNS[resource_type])
+    if third_party:
+        patterns.extend(THIRD_PARTY_PATTERNS)
+    patterns.extend(extra)
+    return patterns
+
+
+def apply(driver, purpose="functional", patterns=None):
+    """
+    Block requests for a functional run and return the patterns in effect.
+
+    Measurement runs (purpose="measurement") and RESOURCE_BLOCKING=0 get
+    no blocking; the session is reset to block nothing so a pooled browser
+    never carries patterns over from an earlier test.
+    """
+    if purpose != "functional" or not ENABLED:
+        patterns = []
+    elif patterns is None:
+        patterns = blocked_patterns()
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        print(f"Could not set blocked URLs: {e}")
+        return []
+    if patterns:
+        print(f"Blocking {len(patterns)} URL patterns for a functional run")
+    return patterns
+
+
+def clear(driver):
+    apply(driver, purpose="measurement")
+
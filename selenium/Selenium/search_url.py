@@ -0,0 +1,239 @@
+"""
+Search result URLs with the sort order and filters already applied.
+
+highest_rated.py and lowestPriced.py search, open the "Sort by:" dropdown
+and click an s-result-sort-select option, which costs a page load plus the
+UI round trips. The same results page is one navigation away:
+
+    /s?k=wireless+headphones&s=review-rank&rh=p_36:-100000,p_72:1318476031
+
+    s=          sort order, one of SORT_ORDERS
+    rh=p_36:    price range in paise, "<min>-<max>" with either end open
+    rh=p_72:    "<n> Stars & Up" refinement node, see RATING_NODES
+
+    url = search_url.build("wireless headphones", sort="price-asc-rank", max_price=1000, min_rating=4)
+    search_url.open_results(driver, url)                      # fast path
+    search_url.sort_via_ui(driver, "wireless headphones", "review-rank")  # what the tests do
+
+SORT_PATH=url makes highest_rated.py and lowestPriced.py take the fast path.
+
+Run as a script it prints the URL, or with --bench times both paths for a
+sort order and splits each into server time (Navigation Timing of every
+page it loads) and the rest (typing, clicking, WebDriver round trips):
+
+    python search_url.py "wireless headphones" --sort price-asc-rank --max-price 1000 --min-rating 4
+    python search_url.py --sort review-rank --bench --runs 10
+    AMAZON_BASE_URL=fixture python search_url.py --sort review-rank --bench
+"""
+import argparse
+import os
+import sys
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import browser
+import page_metrics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from harness.benchmark import run_benchmark
+
+# s= value -> label of its option in the "Sort by:" dropdown
+SORT_ORDERS = {
+    "relevanceblender": "Featured",
+    "price-asc-rank": "Price: Low to High",
+    "price-desc-rank": "Price: High to Low",
+    "review-rank": "Avg. Customer Review",
+    "date-desc-rank": "Newest Arrivals",
+}
+
+# Minimum stars -> p_72 refinement node on amazon.in
+RATING_NODES = {
+    4: "1318476031",
+    3: "1318477031",
+    2: "1318478031",
+    1: "1318479031",
+}
+
+RESULT_CARD = (By.CSS_SELECTOR, "div[data-component-type='s-search-result']")
+
+# How the sort tests reach the sorted results: "ui" (dropdown, the default) or "url"
+SORT_PATH = os.environ.get("SORT_PATH", "ui")
+
+
+def _paise(rupees):
+    return "" if rupees is None else str(int(round(rupees * 100)))
+
+
+def refinements(min_price=None, max_price=None, min_rating=None):
+    """The rh= value for a price range in rupees and a minimum star rating"""
+    parts = []
+    if min_price is not None or max_price is not None:
+        parts.append(f"p_36:{_paise(min_price)}-{_paise(max_price)}")
+    if min_rating is not None:
+        if min_rating not in RATING_NODES:
+            raise ValueError(f"No rating filter for {min_rating} stars, choose from {sorted(RATING_NODES)}")
+        parts.append(f"p_72:{RATING_NODES[min_rating]}")
+    return ",".join(parts)
+
+
+def parse_refinements(rh):
+    """Inverse of refinements(): {"min_price", "max_price", "min_rating"} in rupees and stars"""
+    result = {"min_price": None, "max_price": None, "min_rating": None}
+    for part in (rh or "").split(","):
+        name, _, value = part.partition(":")
+        if name == "p_36":
+            low, _, high = value.partition("-")
+            result["min_price"] = int(low) / 100 if low else None
+            result["max_price"] = int(high) / 100 if high else None
+        elif name == "p_72":
+            for stars, node in RATING_NODES.items():
+                if node == value:
+                    result["min_rating"] = stars
+    return result
+
+
+def build(query, sort=None, min_price=None, max_price=None, min_rating=None, page=None, base_url=None):
+    """Results page URL for a query with the sort order and filters applied"""
+    if sort is not None and sort not in SORT_ORDERS:
+        raise ValueError(f"Unknown sort order '{sort}', choose from {', '.join(SORT_ORDERS)}")
+    params = [("k", query)]
+    if sort:
+        params.append(("s", sort))
+    rh = refinements(min_price, max_price, min_rating)
+    if rh:
+        params.append(("rh", rh))
+    if page and page > 1:
+        params.append(("page", str(page)))
+    return f"{(base_url or browser.base_url()).rstrip('/')}/s?{urlencode(params, safe=':,')}"
+
+
+def with_params(url, **params):
+    """The URL with query parameters set or replaced, e.g. with_params(driver.current_url, s="review-rank")"""
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if name not in params]
+    query += [(name, str(value)) for name, value in params.items() if value is not None]
+    return urlunsplit(parts._replace(query=urlencode(query, safe=":,")))
+
+
+def open_results(driver, url, timeout=10):
+    """Fast path: navigate straight to the final results URL and wait for the cards"""
+    start_time = time.perf_counter()
+    driver.get(url)
+    WebDriverWait(driver, timeout).until(EC.presence_of_element_located(RESULT_CARD))
+    return time.perf_counter() - start_time
+
+
+def sort_via_ui(driver, query, sort, timeout=10, after_phase=None):
+    """
+    The tests' path: home page, type the query, open the "Sort by:" dropdown
+    and click the option. Returns the seconds per phase; after_phase(name),
+    if given, is called untimed once each phase's page is ready.
+    """
+    wait = WebDriverWait(driver, timeout)
+    phases = {}
+    after_phase = after_phase or (lambda name: None)
+    start_time = time.perf_counter()
+    driver.get(browser.base_url())
+    search_box = wait.until(EC.presence_of_element_located((By.ID, "twotabsearchtextbox")))
+    phases["home"] = time.perf_counter() - start_time
+    after_phase("home")
+
+    start_time = time.perf_counter()
+    search_box.clear()
+    search_box.send_keys(query + Keys.RETURN)
+    wait.until(EC.title_contains(query))
+    first_card = wait.until(EC.presence_of_element_located(RESULT_CARD))
+    phases["search"] = time.perf_counter() - start_time
+    after_phase("search")
+
+    start_time = time.perf_counter()
+    sort_dropdown = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "[aria-label='Sort by:']")))
+    driver.execute_script("arguments[0].click();", sort_dropdown)
+    option = wait.until(EC.presence_of_element_located((By.XPATH,
+        f"//a[contains(@id, 's-result-sort-select') and contains(text(), '{SORT_ORDERS[sort]}')]")))
+    driver.execute_script("arguments[0].click();", option)
+    wait.until(EC.staleness_of(first_card))
+    wait.until(EC.presence_of_element_located(RESULT_CARD))
+    phases["sort"] = time.perf_counter() - start_time
+    after_phase("sort")
+    return phases
+
+
+def server_ms(driver):
+    """Time to the last response byte of the current page, from Navigation Timing"""
+    navigation = (page_metrics.collect(driver) or {}).get("navigation") or {}
+    return navigation.get("response_end_ms") or 0.0
+
+
+def bench(driver, query, sort, runs=10, warmup=1):
+    """Time the UI path, then the URL path, with the server share of each"""
+    url = build(query, sort=sort)
+    server = {"ui": [], "url": []}
+
+    def ui_flow():
+        pages = []
+        phases = sort_via_ui(driver, query, sort, after_phase=lambda name: pages.append(server_ms(driver)))
+        server["ui"].append(sum(pages) / 1000)
+        return sum(phases.values())
+
+    def url_flow():
+        elapsed = open_results(driver, url)
+        server["url"].append(server_ms(driver) / 1000)
+        return elapsed
+
+    ui_flow.__name__ = f"sort_via_ui[{sort}]"
+    url_flow.__name__ = f"open_results[{sort}]"
+    results = [run_benchmark(flow, runs=runs, warmup=warmup, rel_ci=0) for flow in (ui_flow, url_flow)]
+    for result in results:
+        result.report()
+
+    print(f"\n----- SORT PATHS ({sort}) -----")
+    print(f"URL: {url}")
+    for label, result, key in (("UI path", results[0], "ui"), ("URL path", results[1], "url")):
+        if not result.samples:
+            continue
+        # Warmup runs recorded server times too; only the measured ones count
+        samples = server[key][-result.n:]
+        server_seconds = sum(samples) / len(samples)
+        print(f"{label:9} {result.mean:6.2f} s  (server {server_seconds:5.2f} s over "
+              f"{3 if key == 'ui' else 1} page(s), UI and WebDriver {result.mean - server_seconds:5.2f} s)")
+    if results[0].samples and results[1].samples:
+        print(f"URL path saves {results[0].mean - results[1].mean:.2f} s "
+              f"({(1 - results[1].mean / results[0].mean) * 100:.0f}%) per sorted search")
+    print("-" * 30)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("query", nargs="?", default=browser.search_query())
+    parser.add_argument("--sort", choices=list(SORT_ORDERS), default=None)
+    parser.add_argument("--min-price", type=float, default=None, help="rupees")
+    parser.add_argument("--max-price", type=float, default=None, help="rupees")
+    parser.add_argument("--min-rating", type=int, choices=sorted(RATING_NODES), default=None, help="stars & up")
+    parser.add_argument("--page", type=int, default=None)
+    parser.add_argument("--bench", action="store_true", help="time the dropdown path against the URL path")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    args = parser.parse_args()
+
+    filters = {"min_price": args.min_price, "max_price": args.max_price, "min_rating": args.min_rating}
+    if not args.bench:
+        print(build(args.query, sort=args.sort, page=args.page, **filters))
+        return
+    if any(value is not None for value in filters.values()):
+        parser.error("--bench compares the sort dropdown with the URL; the filters have no UI path to compare")
+    driver = browser.create_chrome_driver()
+    try:
+        bench(driver, args.query, args.sort or "review-rank", runs=args.runs, warmup=args.warmup)
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
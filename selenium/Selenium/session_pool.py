@@ -0,0 +1,217 @@
+"""
+Pool of pre-warmed Chrome sessions shared by the Selenium tests.
+
+Starting Chrome is the slowest part of every test, so the pool starts the
+browsers once, hands them out per test, wipes their state in between and
+only replaces a browser after it has served CHROME_POOL_MAX_USES tests.
+
+    CHROME_POOL_SIZE=0         disable pooling (fresh Chrome per test)
+    CHROME_POOL_SIZE=2         number of browsers to pre-warm (default 1)
+    CHROME_POOL_MAX_USES=20    recycle a browser after this many tests
+    CHROME_POOL_CLEAR_CACHE=0  keep the HTTP cache between tests
+    CHROME_POOL_TIMEOUT=300    seconds acquire() waits for a free browser
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from browser import create_chrome_driver
+
+# Attempts to start a replacement browser in the background before giving up
+REPLACE_ATTEMPTS = 3
+
+
+class ChromeSessionPool:
+
+    def __init__(self, size=1, max_uses=20, clear_cache=True, factory=create_chrome_driver):
+        self.size = size
+        self.max_uses = max_uses
+        self.clear_cache = clear_cache
+        self.factory = factory
+        self.warmup_time = 0.0
+        self.created = 0
+        self.recycled = 0
+        self._idle = queue.Queue()
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._warmed = False
+        self._closed = False
+
+    def _start_driver(self):
+        driver = self.factory()
+        with self._lock:
+            self._uses[driver.session_id] = 0
+            self.created += 1
+        return driver
+
+    def warm_up(self):
+        """Start all pooled browsers in parallel"""
+        with self._lock:
+            if self._warmed or self.size <= 0:
+                return
+            self._warmed = True
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            for driver in executor.map(lambda _: self._start_driver(), range(self.size)):
+                self._idle.put(driver)
+        self.warmup_time = time.perf_counter() - start_time
+        print(f"Warmed {self.size} Chrome session(s) in {self.warmup_time:.2f} seconds")
+
+    def acquire(self, timeout=None):
+        """Hand out a clean browser, starting the pool on first use"""
+        if self._closed:
+            raise RuntimeError("Session pool has been shut down")
+        if self.size <= 0:
+            return self._start_driver()
+
+        self.warm_up()
+        try:
+            driver = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No pooled Chrome session became free within {timeout} seconds") from None
+        if isinstance(driver, Exception):
+            # The background replacement failed; its slot is retried here so the pool does not shrink
+            try:
+                return self._start_driver()
+            except Exception as e:
+                self._idle.put(e)
+                raise
+        return driver
+
+    def release(self, driver):
+        """Return a browser to the pool, recycling it when it is worn out"""
+        with self._lock:
+            uses = self._uses.get(driver.session_id, 0) + 1
+            self._uses[driver.session_id] = uses
+
+        if self.size <= 0 or self._closed:
+            self._discard(driver)
+            return
+
+        if uses >= self.max_uses:
+            self._replace(driver)
+            return
+
+        try:
+            reset_session(driver, clear_cache=self.clear_cache)
+        except Exception as e:
+            print(f"Could not reset browser, replacing it: {e}")
+            self._replace(driver)
+            return
+
+        self._idle.put(driver)
+
+    def _replace(self, driver):
+        self._discard(driver)
+        if self._closed:
+            return
+        with self._lock:
+            self.recycled += 1
+        # Start the replacement in the background so the next test rarely waits for it
+        threading.Thread(target=self._start_replacement, daemon=True).start()
+
+    def _start_replacement(self):
+        """Fill the freed slot with a new browser, or with the error acquire() should raise"""
+        for attempt in range(1, REPLACE_ATTEMPTS + 1):
+            try:
+                self._idle.put(self._start_driver())
+                return
+            except Exception as e:
+                print(f"Could not start a replacement browser (attempt {attempt}/{REPLACE_ATTEMPTS}): {e}")
+                error = e
+                if attempt < REPLACE_ATTEMPTS:
+                    time.sleep(attempt)
+        self._idle.put(error)
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(driver.session_id, None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def shutdown(self):
+        """Quit every idle browser; browsers still checked out are quit on release"""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if not isinstance(driver, Exception):
+                self._discard(driver)
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "created": self.created,
+            "recycled": self.recycled,
+            "warmup_time": self.warmup_time,
+        }
+
+
+def reset_session(driver, clear_cache=True):
+    """Drop cookies, storage and extra tabs so the next test starts clean"""
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+
+    # Storage can only be cleared from a page of the same origin, so do it before leaving
+    try:
+        driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+    except Exception:
+        pass
+
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        if clear_cache:
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+    except Exception:
+        driver.delete_all_cookies()
+
+    driver.get("about:blank")
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def configure(size=None, max_uses=None, clear_cache=None):
+    """Replace the shared pool, shutting down the previous one"""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is not None:
+            _default_pool.shutdown()
+        _default_pool = ChromeSessionPool(
+            size=int(os.environ.get("CHROME_POOL_SIZE", "1")) if size is None else size,
+            max_uses=int(os.environ.get("CHROME_POOL_MAX_USES", "20")) if max_uses is None else max_uses,
+            clear_cache=os.environ.get("CHROME_POOL_CLEAR_CACHE", "1") != "0" if clear_cache is None else clear_cache,
+        )
+        return _default_pool
+
+
+def get_pool():
+    if _default_pool is None:
+        return configure()
+    return _default_pool
+
+
+def acquire():
+    return get_pool().acquire(timeout=float(os.environ.get("CHROME_POOL_TIMEOUT", "300")))
+
+
+def release(driver):
+    get_pool().release(driver)
+
+
+@atexit.register
+def _shutdown_default_pool():
+    if _default_pool is not None:
+        _default_pool.shutdown()
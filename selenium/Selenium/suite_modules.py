@@ -0,0 +1,9 @@
+"""Test modules of the Selenium suite, run by default by bench_session_pool.py and parallel_runner.py."""
+
+DEFAULT_MODULES = [
+    "load_time_test",
+    "WirelessheadphoneSearch",
+    "lowestPriced",
+    "highest_rated",
+    "addToCart",
+]